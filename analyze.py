@@ -0,0 +1,43 @@
+import argparse
+import json
+import time
+
+from modules.GameRecords import Calibration, read_batches, read_records
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check the calibration of the beliefs in a game record archive.")
+    parser.add_argument("path", help="archive directory (e.g. written by simulate.py --record) or chunk file")
+    parser.add_argument("--bins", type=int, default=10, help="probability bins of the reliability curve")
+    parser.add_argument("--batch-size", type=int, default=10000, help="records processed at once")
+    parser.add_argument("--json", action="store_true", help="print the full summary as JSON")
+    parser.add_argument("--quiet", action="store_true", help="do not report progress")
+    return parser.parse_args()
+
+
+def print_summary(summary):
+    print(f"games {summary['games']}, win rate {summary['win_rate']:.4f}, "
+          f"Brier {summary['brier']:.4f}, log-loss {summary['log_loss']:.4f}")
+    print(f"\n{'bin':<12}{'forecasts':>12}{'forecast':>10}{'observed':>10}")
+    for row in summary["reliability"]:
+        print(f"{row['low']:.2f}-{row['high']:.2f}   {row['forecasts']:>12}{row['mean_forecast']:>10.4f}{row['observed']:>10.4f}")
+    for name, groups in summary["breakdowns"].items():
+        print(f"\nwin rate by {name}")
+        for group, counts in groups.items():
+            print(f"  {group:<24}{counts['games']:>10}{counts['win_rate']:>10.4f}")
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    start = time.perf_counter()
+    calibration = Calibration(args.bins)
+    for batch in read_batches(read_records(args.path), args.batch_size):
+        calibration.update(batch)
+        if not args.quiet:
+            print(f"{calibration.games} games, {calibration.games / (time.perf_counter() - start):.0f}/s", flush=True)
+
+    summary = calibration.summary()
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
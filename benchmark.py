@@ -0,0 +1,217 @@
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from modules.BatchEnv import BatchEnv
+from modules.BayesianNetwork import BayesianNetwork
+from modules.GameEngine import GameEngine
+
+
+def measure(function, repeat):
+    """
+    Runs `function` `repeat` times and returns its timings, then runs it once more
+    under tracemalloc for its peak memory, so tracing does not skew the timings.
+    `function` may return a callable, in which case only that callable is measured
+    (the outer call is the untimed setup).
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        timed = function()
+        if callable(timed):
+            start = time.perf_counter()
+            timed()
+        timings.append(time.perf_counter() - start)
+
+    timed = function()
+    tracemalloc.start()
+    if callable(timed):
+        timed()
+    else:
+        function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"min_s": min(timings), "median_s": statistics.median(timings), "peak_bytes": peak}
+
+
+def bench_construction(size, repeat):
+    return measure(lambda: BayesianNetwork(size, size), repeat)
+
+
+def bench_update_belief(size, repeat, probes=20):
+    engine = GameEngine(size, size, seed=0)
+    network = engine.network
+    rng = np.random.default_rng(0)
+    cells = rng.integers(1, size + 1, (probes, 2)).tolist()
+    signals = [network.evidenceGenerator(row, column, engine.treasureLocation, rng) for row, column in cells]
+    network.network["evidences"].clear()
+
+    def run():
+        belief = network.get_initial_belief()
+        for (row, column), signal in zip(cells, signals):
+            network.network["evidences"].append((f"S({row},{column})", signal))
+            belief = network.update_belief(belief)
+
+    result = measure(run, repeat)
+    return {**result, "per_call_s": result["median_s"] / probes}
+
+
+def bench_evidence_generator(size, repeat, probes=1000):
+    engine = GameEngine(size, size, seed=0)
+    network = engine.network
+    rng = np.random.default_rng(0)
+    cells = rng.integers(1, size + 1, (probes, 2)).tolist()
+
+    def run():
+        for row, column in cells:
+            network.evidenceGenerator(row, column, engine.treasureLocation, rng)
+        network.network["evidences"].clear()
+
+    result = measure(run, repeat)
+    return {**result, "per_call_s": result["median_s"] / probes}
+
+
+def bench_batch_env(size, repeat, steps=20):
+    # About a million cells in the batch, so large grids stay within memory
+    games = max(1, min(1024, 2 ** 20 // (size * size)))
+    env = BatchEnv(games, size, size, seed=0)
+    cells = np.random.default_rng(0).integers(0, size * size, (steps, games))
+
+    def run():
+        env.reset()
+        for step_cells in cells:
+            env.probe(step_cells)
+
+    result = measure(run, repeat)
+    return {**result, "steps_per_s": games * steps / result["median_s"]}
+
+
+def bench_gui_refresh(size, repeat, renderer):
+    import tkinter as tk
+
+    from modules.GameData import GameData
+    from modules.GameArea import GameArea
+    from modules.HeatmapArea import HeatmapArea
+
+    root = tk.Tk()
+    try:
+        GameData.initialize(GameEngine(size, size, seed=0))
+        area = (HeatmapArea if renderer == "heatmap" else GameArea)(root)
+        area.pack()
+        root.update()
+        rng = np.random.default_rng(0)
+
+        def probe():
+            engine = GameData.getEngine()
+            cell = rng.integers(1, size + 1, 2).tolist()
+            engine.network.evidenceGenerator(*cell, engine.treasureLocation, rng)
+            engine.network.update_belief(engine.belief)
+
+            def refresh():
+                area.flush_probabilities()
+                root.update_idletasks()
+            return refresh
+
+        return measure(probe, repeat)
+    finally:
+        root.destroy()
+
+
+CASES = {
+    "construction": bench_construction,
+    "update_belief": bench_update_belief,
+    "evidence_generator": bench_evidence_generator,
+    "batch_env": bench_batch_env,
+    "gui_refresh_buttons": lambda size, repeat: bench_gui_refresh(size, repeat, "buttons"),
+    "gui_refresh_heatmap": lambda size, repeat: bench_gui_refresh(size, repeat, "heatmap"),
+}
+GUI_CASES = {"gui_refresh_buttons", "gui_refresh_heatmap"}
+
+
+def display_available():
+    import tkinter as tk
+    try:
+        tk.Tk().destroy()
+        return True
+    except tk.TclError:
+        return False
+
+
+def run(sizes, cases, repeat, gui_max_size):
+    results = {}
+    gui = None
+    for case in cases:
+        for size in sizes:
+            key = f"{case}@{size}x{size}"
+            if case in GUI_CASES:
+                if gui is None:
+                    gui = display_available()
+                if not gui:
+                    print(f"{key}: skipped (no display)", file=sys.stderr)
+                    continue
+                if size > gui_max_size:
+                    print(f"{key}: skipped (larger than --gui-max-size)", file=sys.stderr)
+                    continue
+            results[key] = CASES[case](size, repeat)
+            print(f"{key}: {results[key]['median_s'] * 1e3:.3f} ms, "
+                  f"peak {results[key]['peak_bytes'] / 2 ** 20:.2f} MiB", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, time_threshold, memory_threshold):
+    """
+    Compares results against a baseline run and returns the list of regressions.
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        base = baseline[key]
+        time_ratio = result["median_s"] / base["median_s"] if base["median_s"] else 1.0
+        memory_ratio = result["peak_bytes"] / base["peak_bytes"] if base["peak_bytes"] else 1.0
+        status = "ok"
+        if time_ratio > 1 + time_threshold or memory_ratio > 1 + memory_threshold:
+            status = "REGRESSION"
+            regressions.append(key)
+        print(f"{key:40} time x{time_ratio:6.2f}  memory x{memory_ratio:6.2f}  {status}")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the inference and rendering hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 30, 100, 300],
+                        help="grid side lengths to benchmark")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--gui-max-size", type=int, default=100,
+                        help="largest grid side for the Tk cases")
+    parser.add_argument("--output", default="benchmark.json", help="where to write the results")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file to compare against")
+    parser.add_argument("--time-threshold", type=float, default=0.2,
+                        help="allowed relative slowdown before reporting a regression")
+    parser.add_argument("--memory-threshold", type=float, default=0.2,
+                        help="allowed relative peak memory growth before reporting a regression")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    report = {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__,
+                 "platform": platform.platform(), "repeat": args.repeat},
+        "results": run(args.sizes, args.cases, args.repeat, args.gui_max_size),
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+        if compare(report["results"], baseline, args.time_threshold, args.memory_threshold):
+            sys.exit(1)
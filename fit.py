@@ -0,0 +1,63 @@
+import argparse
+import time
+
+import numpy as np
+import yaml
+
+from modules.Config import Config
+from modules.GameRecords import read_records
+from modules.SensorFitting import ProbeObservations, fit_sensor
+from modules.SensorModels import METRICS, get_sensor_model, register_config
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fit the signal probabilities of a sensor model to a game record archive.")
+    parser.add_argument("path", help="archive directory (e.g. written by simulate.py --record) or chunk file")
+    parser.add_argument("--sensor", default="classic",
+                        help="only fit the games played with this sensor model, and start from its table")
+    parser.add_argument("--all-sensors", action="store_true", help="fit the games of every sensor model")
+    parser.add_argument("--metric", choices=sorted(METRICS), help="distance metric (default: the sensor's)")
+    parser.add_argument("--latent", action="store_true",
+                        help="ignore the recorded treasures and fit with EM over the treasure position")
+    parser.add_argument("--iterations", type=int, default=100, help="maximum EM iterations")
+    parser.add_argument("--tolerance", type=float, default=1e-7, help="relative log-likelihood gain to stop EM")
+    parser.add_argument("--prior", type=float, default=1.0, help="pseudo-count added to every probability")
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: all cores)")
+    parser.add_argument("--name", help="name of the fitted model (default: <sensor>-fitted)")
+    parser.add_argument("--output", metavar="FILE", help="write the fitted model as a sensors section of config.yaml")
+    parser.add_argument("--quiet", action="store_true", help="do not report progress")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    register_config(Config.sensor_models())
+    initial = get_sensor_model(args.sensor)
+
+    start = time.perf_counter()
+    observations = ProbeObservations(read_records(args.path), None if args.all_sensors else args.sensor)
+    if not args.quiet:
+        print(f"{observations.games} games, {observations.probes} probes read in "
+              f"{time.perf_counter() - start:.1f} s", flush=True)
+
+    def progress(iteration, log_likelihood):
+        if not args.quiet:
+            print(f"iteration {iteration + 1}: log-likelihood {log_likelihood:.6f}", flush=True)
+
+    model, history = fit_sensor(observations, initial, name=args.name or f"{initial.name}-fitted",
+                                metric=args.metric, latent=args.latent, iterations=args.iterations,
+                                tolerance=args.tolerance, prior=args.prior, workers=args.workers,
+                                progress=progress)
+    if not args.quiet:
+        print(f"fitted in {time.perf_counter() - start:.1f} s\n")
+        print("distance " + "".join(f"{signal:>9}" for signal in model.signals))
+        for distance, row in enumerate(model.table.tolist()):
+            print(f"{distance:<9}" + "".join(f"{probability:9.4f}" for probability in row))
+        print(f"\nlargest change from {initial.name}: {np.abs(model.table - initial.table).max():.4f}\n")
+
+    section = yaml.safe_dump({"sensors": {model.name: model.to_config()}}, default_flow_style=None, sort_keys=False)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(section)
+    else:
+        print(section, end="")
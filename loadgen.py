@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+
+
+async def request(reader, writer, message, latencies):
+    start = time.perf_counter()
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    latencies.append(time.perf_counter() - start)
+    return response
+
+
+async def client(args, seed, latencies, errors):
+    """
+    Plays games one after the other on a single connection, probing random cells and
+    digging at the most likely cell once the HP budget of the game is spent.
+    """
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    try:
+        for _ in range(args.games):
+            created = await request(reader, writer, {"op": "new", "rows": args.rows, "columns": args.columns,
+                                                     "seed": rng.randrange(2**32)}, latencies)
+            session = created["session"]
+            cells = rng.sample(range(args.rows * args.columns), min(args.probes, args.rows * args.columns))
+            for cell in cells:
+                response = await request(reader, writer, {"op": "detect", "session": session,
+                                                          "row": cell // args.columns + 1,
+                                                          "column": cell % args.columns + 1}, latencies)
+                if not response["ok"]:
+                    errors.append(response["error"])
+                if response.get("over"):
+                    break
+            state = await request(reader, writer, {"op": "state", "session": session, "top": 1}, latencies)
+            if not state["over"]:
+                row, column, _ = state["top"][0]
+                await request(reader, writer, {"op": "dig", "session": session, "row": row, "column": column},
+                              latencies)
+            await request(reader, writer, {"op": "close", "session": session}, latencies)
+    finally:
+        writer.close()
+
+
+async def run(args):
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(args, args.seed + index, latencies, errors) for index in range(args.clients)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    stats = await request(reader, writer, {"op": "stats"}, [])
+    writer.close()
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1e3
+    return {"clients": args.clients, "requests": len(latencies), "errors": len(errors), "seconds": elapsed,
+            "requests_per_second": len(latencies) / elapsed,
+            "latency_ms": {"p50": p50, "p95": p95, "p99": p99, "max": max(latencies) * 1e3},
+            "server": stats}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Drive a server.py instance with concurrent bot players.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=100, help="concurrent connections")
+    parser.add_argument("--games", type=int, default=5, help="games per client")
+    parser.add_argument("--probes", type=int, default=20, help="probes per game before digging")
+    parser.add_argument("--rows", type=int, default=10)
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    print(json.dumps(asyncio.run(run(parse_args())), indent=2))
@@ -1,6 +1,22 @@
-from modules.App import App
+import argparse
+import time
+
+started = time.perf_counter()
 
 
 if __name__ == '__main__':
-    app = App().run()
+    parser = argparse.ArgumentParser(description="Treasure hunt game driven by a Bayesian network.")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print how long every startup phase took, up to the first frame")
+    parser.add_argument("--record-timings", action="store_true",
+                        help="start recording timings at launch, including the network construction")
+    parser.add_argument("--publish", metavar="NAME", nargs="?", const="",
+                        help="publish the game in shared memory for spectate.py (under NAME if given)")
+    args = parser.parse_args()
+
+    if args.record_timings:
+        from modules.Instrumentation import instrumentation
+        instrumentation.enable()
 
+    from modules.App import App
+    app = App(profile_startup=args.profile_startup, started=started, publish=args.publish).run()
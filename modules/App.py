@@ -1,5 +1,4 @@
-import os
-import sys
+import time
 import tkinter as tk
 from tkinter import ttk
 
@@ -15,18 +14,45 @@ class App(tk.Tk):
     This class extends the base functionality of tkinter.Tk to create and manage
     a structured application layout with a menu bar and game area. It leverages
     customizable configurations through a config instance and themes provided by
-    ttk. The application also provides the ability to restart programmatically.
+    ttk. Restarting starts a new game in place, reusing the window, the widgets
+    and the network tables.
+
+    :ivar startup: (phase, seconds) of every startup phase, when profiling the startup.
+    :type startup: list
+    :ivar publisher: Publishes the game in shared memory for spectators, if asked to.
+    :type publisher: BeliefPublisher
     """
     menubar: MenuBar
     gamebar: GameArea
 
-    def __init__(self):
+    def __init__(self, profile_startup=False, started=None, publish=None):
+        self.profile_startup = profile_startup
+        self.publisher = None
+        self.startup = []
+        self._phase_start = started if started is not None else time.perf_counter()
+        self._phase("imports")
+
         super().__init__()
+        self._phase("Tk root")
         self.config = Config()
+        self._phase("config")
         GameData.initialize()
+        self._phase("game data")
         self.setup_ui()
+        self._phase("styles")
         self.create_widgets()
+        if publish is not None:
+            from modules.BeliefPublisher import BeliefPublisher
+            self.publisher = BeliefPublisher(GameData.getEngine(), publish or None, worker=self.gamebar.worker)
+            print(f"Publishing the game as {self.publisher.name}")
+        self._phase("widgets")
         self.create_layout()
+        self._phase("layout")
+
+    def _phase(self, name):
+        now = time.perf_counter()
+        self.startup.append((name, now - self._phase_start))
+        self._phase_start = now
 
     def setup_ui(self):
         current_theme = 'clam'
@@ -38,11 +64,13 @@ class App(tk.Tk):
         style.theme_use(current_theme)
         style.configure('.', font=(self.config.font_overall[0], self.config.font_overall[1]), background="black")
 
-        print(f"Configurable options for 'TFrame': {style.configure('TWidget')}")
-
     def create_widgets(self):
         self.menubar = MenuBar(parent=self)
-        self.gamebar = GameArea(parent=self)
+        if Config.static_gamedata()['renderer'] == 'heatmap':
+            from modules.HeatmapArea import HeatmapArea
+            self.gamebar = HeatmapArea(parent=self)
+        else:
+            self.gamebar = GameArea(parent=self)
 
     def create_layout(self):
         self.menubar.pack(side='left', fill='both')
@@ -50,9 +78,31 @@ class App(tk.Tk):
 
 
     def run(self):
-        self.mainloop()
+        if self.profile_startup:
+            self.update()
+            self._phase("first frame")
+            self.print_startup()
+        try:
+            self.mainloop()
+        finally:
+            if self.publisher is not None:
+                self.publisher.close()
+
+    def print_startup(self):
+        """
+        Prints the time spent in every startup phase.
+        """
+        total = sum(seconds for _, seconds in self.startup)
+        for name, seconds in self.startup:
+            print(f"{name:<12} {seconds * 1e3:9.1f} ms {seconds / total:6.1%}")
+        print(f"{'total':<12} {total * 1e3:9.1f} ms")
 
-    def restart(self):
-        self.destroy()
-        python = sys.executable
-        os.execl(python, python, *sys.argv)
\ No newline at end of file
+    def reset(self):
+        """
+        Starts a new game, once the pending probes are done. The game area and HP bar
+        restyle themselves from the engine's "reset" event.
+        """
+        if self.gamebar.worker.busy:
+            return
+        GameData.reset()
+        self.menubar.mode_button.reset_mode()
\ No newline at end of file
@@ -0,0 +1,199 @@
+import numpy as np
+
+from modules.ConditionalProbabilities import CPTStore
+from modules.GameEngine import GameEngine
+
+
+class BatchEnv:
+    """
+    K independent treasure hunts on the same grid, stepped in lockstep, for training
+    and evaluating automated players.
+
+    Every game has its own treasure, HP, probed cells and belief, and follows the
+    rules of `GameEngine`: a probe reads a signal drawn from the sensor model given
+    its distance to the treasure (as `BayesianNetwork.evidenceGenerator` does),
+    updates the belief with the likelihood of that signal (as
+    `BayesianNetwork.update_belief` does) and costs `pointDmg` HP; the game is lost
+    when the HP runs out, and a dig ends it. One call probes, or digs, in all K
+    games at once.
+
+    All the state lives in preallocated arrays that the calls update in place and
+    return, so stepping allocates nothing: the arrays returned by a call are
+    overwritten by the next one. The likelihood of a probe only depends on the
+    (row, column) offset of every cell from it, so it is looked up with a single
+    `np.take` from a table of the signal likelihood per offset, instead of computing
+    distances (indices are always in range, so `np.take` runs unbuffered in "clip"
+    mode). Beliefs are kept as probabilities normalized after every probe,
+    rather than in log space: the likelihoods are bounded away from zero, and
+    skipping the exponentials is what makes the lockstep updates cheap.
+
+    Cells are flat, row-major indices (see `CPTStore.index`, minus one).
+
+    :ivar games: Number of games K.
+    :type games: int
+    :ivar cpt: Grid layout and sensor model.
+    :type cpt: CPTStore
+    :ivar belief: Array of shape (K, N) with the posterior of every game.
+    :type belief: numpy.ndarray
+    :ivar treasure: Flat index of the treasure of every game.
+    :type treasure: numpy.ndarray
+    :ivar hp: HP of every game.
+    :type hp: numpy.ndarray
+    :ivar probed: Array of shape (K, N), True where a game has probed a cell.
+    :type probed: numpy.ndarray
+    :ivar signal: Signal level read by the last probe of every game, -1 if it did not probe.
+    :type signal: numpy.ndarray
+    :ivar done: Whether every game is over.
+    :type done: numpy.ndarray
+    :ivar won: Whether every game was won by digging at the treasure.
+    :type won: numpy.ndarray
+    :ivar moves: Number of probes of every game.
+    :type moves: numpy.ndarray
+    """
+    def __init__(self, games, rows, columns, cpt=None, seed=None):
+        self.games = games
+        self.rows, self.columns = rows, columns
+        self.cpt = cpt if cpt is not None else CPTStore(rows, columns)
+        self.total = rows * columns
+        self.pointDmg = GameEngine.initialHp / self.total
+        self.rng = np.random.default_rng(seed)
+
+        # Distance class and signal likelihood of every (row, column) offset, and the
+        # flat offset of every cell from the probe at (0, 0)
+        self._offset_columns = 2 * columns - 1
+        d_rows = np.arange(-(rows - 1), rows)[:, None]
+        d_columns = np.arange(-(columns - 1), columns)
+        far = self.cpt.distance_classes - 1
+        self._offset_class = np.minimum(self.cpt.metric(d_rows, d_columns), far).ravel()
+        self._offset_likelihood = np.ascontiguousarray(self.cpt.table[self._offset_class].T).ravel()
+        cell_rows, cell_columns = np.divmod(np.arange(self.total), columns)
+        self._cell_offset = cell_rows * self._offset_columns + cell_columns
+        self._probe_offset = (rows - 1) * self._offset_columns + (columns - 1) - self._cell_offset
+        self._cumulative = np.cumsum(self.cpt.table, axis=1)
+        self._cumulative[:, -1] = 1.0
+
+        self.belief = np.empty((games, self.total))
+        self.treasure = np.empty(games, dtype=np.int64)
+        self.hp = np.empty(games)
+        self.probed = np.empty((games, self.total), dtype=bool)
+        self.signal = np.empty(games, dtype=np.int64)
+        self.done = np.empty(games, dtype=bool)
+        self.won = np.empty(games, dtype=bool)
+        self.moves = np.empty(games, dtype=np.int64)
+
+        # Scratch buffers reused by every step
+        self._index = np.empty((games, self.total), dtype=np.int64)
+        self._likelihood = np.empty((games, self.total))
+        self._sums = np.empty(games)
+        self._draws = np.empty(games)
+        self._level_cumulative = np.empty((games, self.cpt.table.shape[1]))
+        self._below = np.empty((games, self.cpt.table.shape[1]), dtype=bool)
+        self._row_start = np.arange(games) * self.total
+        self._flat = np.empty(games, dtype=np.int64)
+        self._active = np.empty(games, dtype=bool)
+        self._inactive = np.empty(games, dtype=bool)
+        self._was_probed = np.empty(games, dtype=bool)
+        self._scratch = np.empty(games, dtype=np.int64)
+        self._other = np.empty(games, dtype=np.int64)
+        self._mask = np.empty(games, dtype=bool)
+
+        self.reset()
+
+    @property
+    def beliefs(self):
+        """
+        The beliefs as a (K, rows, columns) view.
+        """
+        return self.belief.reshape(self.games, self.rows, self.columns)
+
+    def reset(self, games=None):
+        """
+        Starts new games: all of them, or the ones where the boolean mask `games` is
+        True (e.g. `env.done`, to keep the batch full while training).
+
+        :return: The beliefs.
+        """
+        mask = self._mask
+        if games is None:
+            mask.fill(True)
+        else:
+            np.copyto(mask, games)
+        self.rng.random(out=self._draws)
+        np.multiply(self._draws, self.total, out=self._draws)
+        np.copyto(self.treasure, self._draws, casting="unsafe", where=mask)
+        np.copyto(self.belief, 1 / self.total, where=mask[:, None])
+        np.copyto(self.hp, GameEngine.initialHp, where=mask)
+        np.copyto(self.probed, False, where=mask[:, None])
+        np.copyto(self.signal, -1, where=mask)
+        np.copyto(self.done, False, where=mask)
+        np.copyto(self.won, False, where=mask)
+        np.copyto(self.moves, 0, where=mask)
+        return self.belief
+
+    def _check(self, cells):
+        if len(cells) != self.games or cells.min() < 0 or cells.max() >= self.total:
+            raise ValueError(f"Expected {self.games} cells between 0 and {self.total - 1}")
+
+    def probe(self, cells):
+        """
+        Probes one cell per game. Games that are over, or that already probed their
+        cell, are left unchanged and read no signal.
+
+        :param cells: Flat index of the cell probed in every game.
+        :return: The signal level read in every game (-1 for none) and whether every
+            game is over.
+        :raises ValueError: If a cell is outside the grid.
+        """
+        self._check(cells)
+        active, inactive, index, other = self._active, self._inactive, self._scratch, self._other
+        probed = self.probed.reshape(-1)
+        np.add(self._row_start, cells, out=self._flat)
+        np.take(probed, self._flat, out=self._was_probed, mode="clip")
+        np.logical_or(self.done, self._was_probed, out=inactive)
+        np.logical_not(inactive, out=active)
+
+        # Signals: the distance class of the treasure from the probe picks a cumulative row
+        np.take(self._probe_offset, cells, out=index, mode="clip")
+        np.take(self._cell_offset, self.treasure, out=other, mode="clip")
+        index += other
+        np.take(self._offset_class, index, out=other, mode="clip")
+        np.take(self._cumulative, other, axis=0, out=self._level_cumulative, mode="clip")
+        self.rng.random(out=self._draws)
+        np.less(self._level_cumulative, self._draws[:, None], out=self._below)
+        np.sum(self._below, axis=1, out=self.signal)
+
+        # Beliefs: the likelihood of every cell is read at its offset from the probe
+        np.take(self._probe_offset, cells, out=index, mode="clip")
+        np.multiply(self.signal, len(self._offset_class), out=other)
+        index += other
+        np.add(index[:, None], self._cell_offset, out=self._index)
+        np.take(self._offset_likelihood, self._index, out=self._likelihood, mode="clip")
+        np.copyto(self._likelihood, 1.0, where=inactive[:, None])
+        self.belief *= self._likelihood
+        np.sum(self.belief, axis=1, out=self._sums)
+        self.belief /= self._sums[:, None]
+
+        self._was_probed |= active
+        np.put(probed, self._flat, self._was_probed)
+        np.copyto(self.signal, -1, where=inactive)
+        np.subtract(self.hp, self.pointDmg, out=self.hp, where=active)
+        np.add(self.moves, active, out=self.moves)
+        np.less_equal(self.hp, 0, out=self._mask)
+        self.done |= self._mask
+        return self.signal, self.done
+
+    def dig(self, cells):
+        """
+        Digs one cell per game, which ends every game still running.
+
+        :param cells: Flat index of the cell dug in every game.
+        :return: Whether every game was won, and whether every game is over.
+        :raises ValueError: If a cell is outside the grid.
+        """
+        self._check(cells)
+        np.logical_not(self.done, out=self._active)
+        np.equal(cells, self.treasure, out=self._mask)
+        self._mask &= self._active
+        self.won |= self._mask
+        self.done.fill(True)
+        return self.won, self.done
@@ -1,7 +1,13 @@
-import random
+from functools import cached_property
 
-from modules.GameData import GameData
-import pprint
+import numpy as np
+
+from modules.BeliefState import BeliefState, BeliefView, summarize
+from modules.ConditionalProbabilities import CPTStore, ProbabilityTables, SignalEdges, SignalNodes, UniformPrior
+from modules.EvidenceSampler import EvidenceSampler
+from modules.Instrumentation import instrumentation
+from modules.PosteriorCache import PosteriorCache
+from modules.SensorModels import CLASSIC
 
 class BayesianNetwork:
     """
@@ -18,10 +24,24 @@ class BayesianNetwork:
         edges define dependencies; probabilities store initial and conditional
         probabilities; evidences record observed data.
     :type network: dict
+    :ivar cpt: Distance-indexed CPTs shared by every signal node. It is read-only and
+        can be shared between several networks of the same grid size.
+    :type cpt: CPTStore
+    :ivar sensor: The sensor model the CPTs are compiled from, the classic detector by
+        default. Ignored when a `cpt` is given.
+    :type sensor: SensorModel
+    :ivar storage: How the belief is stored: "dense" (`BeliefState`), "sparse"
+        (`SparseBelief`, for very large maps) or "tiled" (`TiledBelief`, memory-mapped,
+        for maps larger than RAM). Extra keyword arguments are passed to the belief.
+    :type storage: str
+    :ivar belief: Current posterior over the treasure position.
+    :type belief: BeliefState
     """
-    def __init__(self):
-        rows, columns = GameData.columns, GameData.rows
-        total = GameData.totalLocations
+    def __init__(self, rows, columns, cpt=None, storage="dense", sensor=CLASSIC, **options):
+        self.rows, self.columns = rows, columns
+        self.sensor = sensor if cpt is None else cpt.sensor
+        self.storage = storage
+        self.options = options
 
         # Create initial setup
         self.network = {
@@ -31,94 +51,165 @@ class BayesianNetwork:
             "evidences": [] #Takes edge + Signal Read
         }
 
-        # Fill nodes / edges
-        for row in range(1, rows + 1):
-            for column in range(1, columns + 1):
-                signalnode = f"S({row},{column})"
-                self.network["nodes"].append(signalnode)
-                self.network["edges"].append(("Treasure", signalnode))
-
-        # Fill initial Treasure prob
-        self.network["probabilities"]["Treasure"] = {
-            f"({row},{col})": 1/total for row in range(1, rows + 1) for col in range(1, columns + 1)
-        }
-
         # Fill Conditional Prob
-        self.fill_conditional_probabilities()
-
-
+        with instrumentation.span("network"):
+            self.fill_conditional_probabilities(cpt)
 
-    def fill_conditional_probabilities(self):
+    def fill_conditional_probabilities(self, cpt=None):
         """
-        Fills the conditional probabilities for signal nodes in the Bayesian network based
-        on the positions of potential treasure locations. The distances between signal nodes
-        and treasure positions are calculated using the Chebyshev distance formula, and the
-        probabilities are determined by a detector probability function.
+        Fills the conditional probabilities for signal nodes in the Bayesian network.
+        The sensor model only depends on the distance between the signal node and the
+        treasure position, so the CPTs are stored as a single table indexed by distance
+        class (see `CPTStore`) instead of one entry per probe/treasure pair.
+        `network["probabilities"]` keeps exposing the original
+        [signal_node][treasure_position][signal] lookups on top of that table.
         """
-        treasure_positions = list(self.network["probabilities"]["Treasure"].keys())
-
-        for edge in self.network["edges"]:
-            _, signal_node = edge
-            self.network["probabilities"][signal_node] = {}
-            for treasure_position in treasure_positions:
-                t_row, t_col = map(int, treasure_position.strip("()").split(","))
-                s_row, s_col = map(int, signal_node.strip("S()").split(","))
-
-                # fórmula da distância de Chebyshev
-                distance = max(abs(t_row - s_row),abs(t_col - s_col))
-                self.network["probabilities"][signal_node][treasure_position] = detectorFactoryProb(distance)
+        self.cpt = cpt if cpt is not None else CPTStore(self.rows, self.columns, self.sensor)
+
+        # Nodes, edges and the uniform Treasure prior are generated on demand from the grid
+        self.network["nodes"] = SignalNodes(self.cpt)
+        self.network["edges"] = SignalEdges(self.cpt)
+        self.prior = UniformPrior(self.cpt)
+        self.network["probabilities"] = ProbabilityTables(self.cpt, self.prior)
+
+        match self.storage:
+            case "dense":
+                self.belief = BeliefState(self.cpt)
+            case "sparse":
+                from modules.SparseBelief import SparseBelief
+                self.belief = SparseBelief(self.cpt, **self.options)
+            case "tiled":
+                from modules.TiledBelief import TiledBelief
+                self.belief = TiledBelief(self.cpt, **self.options)
+            case _:
+                raise ValueError(f"Unknown belief storage: {self.storage}")
+        self.sampler = EvidenceSampler(self.cpt)
 
     def get_initial_belief(self):
-        return self.network["probabilities"]["Treasure"]
+        """
+        Resets the belief to the uniform prior and returns a dict view of it.
+        """
+        self.belief.reset()
+        return self.belief.view()
 
     def update_belief(self, prior):
         """
         Updates the belief of the Bayesian network based on given prior and
         the latest evidence in the network. The method pops the most recent
-        evidence from the network, adjusts the belief using the given conditional
-        probabilities for the evidence, and normalizes the belief distribution.
+        evidence from the network and applies it in place to the log-space belief,
+        which is normalized in the same pass.
+
+        `prior` is normally the view returned by a previous call; any other mapping
+        of positions to probabilities is loaded into the belief first.
+
+        The view returned is live, not a new dict: the later updates change it, and
+        the views returned before. Copy it (`dict(view)`) to keep the belief as it is.
         """
         evidence = self.network["evidences"].pop()
-        signal_node, signal_value = evidence[0], evidence[1]
+        self._load_prior(prior)
+        self.belief.apply(*self._parse_evidence(evidence))
+        return self.belief.view()
 
-        belief = {key: value * self.network["probabilities"][signal_node][key][signal_value]
-                  for key, value in prior.items()} # Calculate the new belief
+    def update_belief_batch(self, prior):
+        """
+        Same as `update_belief`, but consumes every pending evidence at once and
+        normalizes only once.
+        """
+        evidences = [self._parse_evidence(evidence) for evidence in self.network["evidences"]]
+        self.network["evidences"].clear()
+        self._load_prior(prior)
+        self.belief.apply_batch(evidences)
+        return self.belief.view()
+
+    def _load_prior(self, prior):
+        if isinstance(prior, BeliefView) and prior.state is self.belief:
+            return
+        self.belief.set_probabilities([prior[key] for key in self.cpt.keys])
+
+    @staticmethod
+    def _parse_evidence(evidence):
+        signal_node, signal_value = evidence[0], evidence[1]
+        s_row, s_col = map(int, signal_node.strip("S()").split(","))
+        return s_row, s_col, signal_value
 
-        normal_factor = sum(belief.values())
-        new_belief = {key: (prob / normal_factor) for key, prob in belief.items()}
+    @cached_property
+    def posterior_cache(self):
+        """
+        LRU cache of the posteriors computed by `preview`, keyed by their evidence set.
+        """
+        return PosteriorCache(self.cpt)
 
-        return new_belief
+    @property
+    def belief_is_exact(self):
+        """
+        Whether `belief` is the exact posterior; a sparse belief prunes its unlikely
+        cells to zero while it is sparse.
+        """
+        return self.storage != "sparse" or not self.belief.is_sparse
 
-    def evidenceGenerator(self, row, column):
+    def preview(self, evidence, probes, top=5):
+        """
+        Previews the posterior after hypothetical probes, without touching
+        `network["evidences"]` or the belief. Every probe is previewed on its own, from
+        the current belief.
+
+        Posteriors are cached in `posterior_cache` under the evidence set they follow
+        from, and so are their summaries, so previewing the same probe again (hovering
+        back over a cell, after an undo and a redo...) does not recompute anything.
+        The cache only holds exact posteriors: when the belief is not exact (see
+        `belief_is_exact`), the base posterior is replayed from `evidence` instead.
+
+        :param evidence: The (row, column, signal) probes the current belief follows from.
+        :param probes: Hypothetical probes, as (row, column, signal), or (row, column)
+            to preview every signal the probe can read.
+        :param top: Number of most likely cells to list per preview.
+        :return: One dict per previewed (probe, signal) with its "row", "column", "signal",
+            predictive "probability", and the "max", "map", "entropy" and "top" of the
+            posterior (see `summarize`). Signals that cannot be read are left out.
+        """
+        cache = self.posterior_cache
+        signal_index = self.cpt.signal_index
+        key = PosteriorCache.key((row, column, signal_index[signal]) for row, column, signal in evidence)
+        if key not in cache and self.belief_is_exact:
+            cache.put(key, np.array(self.belief.probabilities, dtype=np.float64))
+        base = cache.posterior(key)
+
+        previews = []
+        for probe in probes:
+            row, column = probe[0], probe[1]
+            levels = range(len(self.cpt.signals)) if len(probe) == 2 else (signal_index[probe[2]],)
+            likelihood = predictive = None
+            for level in levels:
+                child = PosteriorCache.extend(key, row, column, level)
+                preview = cache.get_value(("preview", child, top))
+                if preview is None:
+                    if likelihood is None:
+                        likelihood = self.cpt.table[self.cpt.distance_class(row, column)]
+                        predictive = (base @ likelihood).tolist()
+                    if predictive[level] <= 0:
+                        continue
+                    posterior = cache.get(child)
+                    if posterior is None:
+                        posterior = base * likelihood[:, level] / predictive[level]
+                        cache.put(child, posterior)
+                    preview = {"row": row, "column": column, "signal": self.cpt.signals[level],
+                               "probability": predictive[level], **summarize(posterior, self.cpt.columns, top)}
+                    cache.put_value(("preview", child, top), preview)
+                previews.append(dict(preview))
+        return previews
+
+    def evidenceGenerator(self, row, column, position_treasure, rng=None):
         """
         Determines and generates evidence signal for a given location on a grid based on the
         Conditional Probability Table (CPT) associated with the location and the treasure's position.
-        It evaluates the probabilities for different signal levels by comparing random values against
-        cumulative probabilities defined in the CPT. The generated signal evidence is then stored
-        in the network's evidence list.
-        """
-        position_treasure = GameData.treasureLocation
-
-        # Grab CPT for the location to detect (CPT stands for Conditional Probability Table)
-        cpt = self.network["probabilities"][f"S({row},{column})"][position_treasure]
-        random_probability = random.random()
-        probability_signal_1 = cpt["+"]
-        probability_signal_2 = cpt["++"] + probability_signal_1
-        probability_signal_3 = cpt["+++"] + probability_signal_2
-        probability_signal_4 = cpt["++++"] + probability_signal_3
-
-        signal_return = ""
-
-        if probability_signal_1 >= random_probability:
-            signal_return = '+'
-        elif probability_signal_2 >= random_probability:
-            signal_return = "++"
-        elif probability_signal_3 >= random_probability:
-            signal_return = "+++"
-        elif probability_signal_4 >= random_probability:
-            signal_return = "++++"
-        else:
-            print(f"Error Detection on S({row},{column}) with treasure on {position_treasure}")
+        The signal is drawn by the network's `EvidenceSampler` from precomputed cumulative tables.
+        The generated signal evidence is then stored in the network's evidence list.
+
+        :param position_treasure: The treasure position as a "(row,column)" string.
+        :param rng: NumPy Generator to draw from, defaults to the sampler's own.
+        """
+        t_row, t_col = map(int, position_treasure.strip("()").split(","))
+        signal_return = self.cpt.signals[self.sampler.sample(row, column, t_row, t_col, rng)]
 
         self.network["evidences"].append((f"S({row},{column})", signal_return))
 
@@ -127,35 +218,7 @@ class BayesianNetwork:
 def detectorFactoryProb(distance):
     """
     Determines and returns a dictionary representing probabilities based on the
-    given `distance`. This function uses pattern matching to associate specific
-    distances with a predefined probability distribution across four categories.
+    given `distance`, as read by the classic detector. Kept for callers of the
+    original factory; the sensor models are compiled in `SensorModels`.
     """
-    match distance:
-        case 0:
-            return {
-                "++++": 0.8,
-                "+++": 0.1,
-                "++": 0.07,
-                "+": 0.03
-            }
-        case 1:
-            return {
-                "++++": 0.08,
-                "+++": 0.8,
-                "++": 0.08,
-                "+": 0.04
-            }
-        case 2:
-            return {
-                "++++": 0.04,
-                "+++": 0.08,
-                "++": 0.8,
-                "+": 0.08
-            }
-        case _:
-            return {
-                "++++": 0.03,
-                "+++": 0.07,
-                "++": 0.1,
-                "+": 0.8
-            }
\ No newline at end of file
+    return CLASSIC.distribution(distance)
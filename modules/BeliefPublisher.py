@@ -0,0 +1,229 @@
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Header fields, as int64
+MAGIC, SEQUENCE, ROWS, COLUMNS, MOVES, FLAGS, TREASURE = range(7)
+HEADER_FIELDS = 8
+MAGIC_VALUE = 0x54485342  # "THSB"
+OVER, WON, CLOSED = 1, 2, 4
+
+# Segments published by this process, which its resource tracker removes at exit
+_published = set()
+
+
+def segment_size(total):
+    """
+    Returns the size in bytes of the segment of a grid of `total` cells: the header,
+    the HP, the belief as float64 and the signal grid as int8.
+    """
+    return 8 * HEADER_FIELDS + 8 + 9 * total
+
+
+def _views(buffer, total):
+    header = np.ndarray(HEADER_FIELDS, dtype=np.int64, buffer=buffer)
+    hp = np.ndarray(1, dtype=np.float64, buffer=buffer, offset=8 * HEADER_FIELDS)
+    belief = np.ndarray(total, dtype=np.float64, buffer=buffer, offset=8 * HEADER_FIELDS + 8)
+    signals = np.ndarray(total, dtype=np.int8, buffer=buffer, offset=8 * HEADER_FIELDS + 8 + 8 * total)
+    return header, hp, belief, signals
+
+
+class BeliefPublisher:
+    """
+    Publishes a live game in a shared memory segment, for spectator and analysis
+    processes on the same machine.
+
+    The segment holds a header (grid size, number of probes, whether the game is over
+    or won, and the treasure once it is over), the HP, the belief over every cell and
+    the signal level read at every cell (-1 where nothing was probed), in row-major
+    order. The publisher follows the engine's events, so the segment is rewritten
+    after every probe, dig, undo/redo and new game, from the thread that sends them.
+    When the game is played through an `InferenceWorker`, the engine belongs to the
+    worker while it is busy: the publisher then writes from the worker thread after
+    every batch, and ignores the events sent until the worker is done.
+
+    Writes are guarded by a sequence counter (a seqlock): it is odd while the segment
+    is being written and is incremented again once it is consistent. Readers never
+    block the writer; they map the segment once and check the counter around what
+    they read (see `BeliefReader`), instead of receiving pickled copies.
+
+    :ivar engine: The game published.
+    :type engine: GameEngine
+    :ivar name: Name of the shared memory segment, for the readers.
+    :type name: str
+    :ivar version: Number of snapshots published.
+    :type version: int
+    """
+    def __init__(self, engine, name=None, worker=None):
+        if engine.network.storage == "tiled":
+            raise ValueError("Tiled beliefs are too large to publish")
+        self.engine = engine
+        self.worker = worker
+        self._memory = shared_memory.SharedMemory(name=name, create=True, size=segment_size(engine.totalLocations))
+        self.name = self._memory.name
+        _published.add(self.name)
+        self.version = 0
+        self.header, self.hp, self.belief, self.signals = _views(self._memory.buf, engine.totalLocations)
+        self.header[:] = 0
+        self.header[ROWS], self.header[COLUMNS] = engine.rows, engine.columns
+        self.publish()
+        self.header[MAGIC] = MAGIC_VALUE
+        engine.subscribe(self.on_game_event)
+        if worker is not None:
+            worker.listeners.append(self.on_worker_batch)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def on_game_event(self, event, engine):
+        # The worker already published the batches it ran; the engine is not ours to read while it is busy
+        if self.worker is None or not self.worker.busy:
+            self.publish()
+
+    def on_worker_batch(self, action):
+        self.publish()
+
+    def publish(self):
+        """
+        Writes the current state of the game into the segment.
+        """
+        engine = self.engine
+        header = self.header
+        header[SEQUENCE] += 1
+        self.hp[0] = engine.hp
+        np.copyto(self.belief, engine.network.belief.probabilities)
+        self.signals.fill(-1)
+        signal_index = engine.network.cpt.signal_index
+        for (row, column), signal in engine.signals.items():
+            self.signals[(row - 1) * engine.columns + column - 1] = signal_index[signal]
+        over = engine.isOver()
+        header[MOVES] = len(engine.signals)
+        header[FLAGS] = over * OVER | engine.isWon() * WON
+        header[TREASURE] = (engine.treasure[0] - 1) * engine.columns + engine.treasure[1] - 1 if over else -1
+        header[SEQUENCE] += 1
+        self.version += 1
+
+    def close(self):
+        """
+        Stops publishing and removes the segment; readers already attached keep their mapping.
+        """
+        if self._memory is None:
+            return
+        self.engine.unsubscribe(self.on_game_event)
+        if self.worker is not None:
+            self.worker.listeners.remove(self.on_worker_batch)
+        self.header[SEQUENCE] += 1
+        self.header[FLAGS] |= CLOSED
+        self.header[SEQUENCE] += 1
+        self.header = self.hp = self.belief = self.signals = None
+        self._memory.close()
+        self._memory.unlink()
+        self._memory = None
+        _published.discard(self.name)
+
+
+class BeliefReader:
+    """
+    Reads a game published by a `BeliefPublisher` in another process.
+
+    `belief`, `signals` and `hp` are views of the shared segment, not copies. They may
+    change at any time, so a read is only consistent if the sequence counter was even
+    and unchanged around it:
+
+        while True:
+            version = reader.begin()
+            frame = render(reader.belief, reader.signals)
+            if not reader.retry(version):
+                break
+
+    `snapshot` does the same for copies of the arrays, into buffers it reuses.
+
+    :ivar rows: Number of rows in the grid.
+    :type rows: int
+    :ivar columns: Number of columns in the grid.
+    :type columns: int
+    """
+    def __init__(self, name):
+        self._memory = _attach(name)
+        header = np.ndarray(HEADER_FIELDS, dtype=np.int64, buffer=self._memory.buf)
+        if header[MAGIC] != MAGIC_VALUE:
+            self._memory.close()
+            raise ValueError(f"{name} is not a published game")
+        self.rows, self.columns = int(header[ROWS]), int(header[COLUMNS])
+        self.header, self.hp, self.belief, self.signals = _views(self._memory.buf, self.rows * self.columns)
+        self._copies = (np.empty_like(self.belief), np.empty_like(self.signals))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def begin(self):
+        """
+        Waits for the writer to finish the snapshot it is writing, and returns its version.
+        """
+        while True:
+            version = int(self.header[SEQUENCE])
+            if not version % 2:
+                return version
+            time.sleep(0)
+
+    def retry(self, version):
+        """
+        Returns whether the segment changed since `begin` returned `version`.
+        """
+        return int(self.header[SEQUENCE]) != version
+
+    def snapshot(self):
+        """
+        Returns a consistent copy of the game as a dict with "version", "hp", "moves",
+        "over", "won", "treasure" (1-based (row, column), None until the game is
+        over), "closed" (whether the publisher stopped), "belief" and "signals". The
+        arrays are overwritten by the next call.
+        """
+        belief, signals = self._copies
+        while True:
+            version = self.begin()
+            np.copyto(belief, self.belief)
+            np.copyto(signals, self.signals)
+            hp = float(self.hp[0])
+            moves, flags, treasure = (int(value) for value in self.header[[MOVES, FLAGS, TREASURE]])
+            if not self.retry(version):
+                break
+        return {
+            "version": version // 2,
+            "hp": hp,
+            "moves": moves,
+            "over": bool(flags & OVER),
+            "won": bool(flags & WON),
+            "closed": bool(flags & CLOSED),
+            "treasure": (treasure // self.columns + 1, treasure % self.columns + 1) if treasure >= 0 else None,
+            "belief": belief.reshape(self.rows, self.columns),
+            "signals": signals.reshape(self.rows, self.columns),
+        }
+
+    def close(self):
+        if self._memory is None:
+            return
+        self.header = self.hp = self.belief = self.signals = None
+        self._memory.close()
+        self._memory = None
+
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 the resource tracker of a reader would remove the segment when it exits
+        from multiprocessing import resource_tracker
+        memory = shared_memory.SharedMemory(name=name)
+        if memory.name not in _published:
+            resource_tracker.unregister(memory._name, "shared_memory")
+        return memory
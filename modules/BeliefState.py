@@ -0,0 +1,228 @@
+from collections.abc import ItemsView, Mapping, ValuesView
+
+import numpy as np
+
+
+class BeliefState:
+    """
+    Posterior distribution over the treasure position, kept as a contiguous
+    float64 array in log space.
+
+    Evidence is applied in place: the log-likelihood of the observed signal is added
+    to the log-belief and the result is normalized in the same pass, which also
+    refreshes the probability array used for display. Working in log space keeps the
+    posterior from underflowing after hundreds of low-likelihood observations.
+
+    The normalization also yields the entropy shown in the HUD, from one dot product
+    of the two arrays it leaves normalized. The top cells, the first of which is the
+    most likely one, are only selected, with `np.argpartition`, when `stats` asks for
+    them, once per update.
+
+    :ivar cpt: The CPTStore providing the grid layout and sensor model.
+    :type cpt: CPTStore
+    :ivar log_belief: Normalized log-probability of every grid cell, in row-major order.
+    :type log_belief: numpy.ndarray
+    :ivar probabilities: Normalized probability of every grid cell, in row-major order.
+    :type probabilities: numpy.ndarray
+    :ivar entropy: Entropy of the belief, in nats.
+    :type entropy: float
+    """
+    def __init__(self, cpt):
+        self.cpt = cpt
+        with np.errstate(divide="ignore"):
+            self._log_table = np.log(cpt.table)
+        self.log_belief = np.full(cpt.total, -np.log(cpt.total), dtype=np.float64)
+        self.probabilities = np.full(cpt.total, 1 / cpt.total, dtype=np.float64)
+        self._set_uniform_stats()
+
+    def reset(self):
+        """
+        Restores the uniform prior.
+        """
+        self.log_belief.fill(-np.log(self.cpt.total))
+        self.probabilities.fill(1 / self.cpt.total)
+        self._set_uniform_stats()
+
+    def _set_uniform_stats(self):
+        self.entropy = float(np.log(self.cpt.total))
+        self._top = None
+
+    def set_probabilities(self, probabilities):
+        """
+        Replaces the belief with the given (possibly unnormalized) probabilities,
+        ordered as `cpt.keys`.
+        """
+        with np.errstate(divide="ignore"):
+            np.log(np.asarray(probabilities, dtype=np.float64), out=self.log_belief)
+        self._normalize()
+
+    def set_log_belief(self, log_belief):
+        """
+        Replaces the belief with the given (possibly unnormalized) log-probabilities.
+        """
+        self.log_belief[:] = log_belief
+        self._normalize()
+
+    def log_likelihood(self, row, column, signal):
+        """
+        Returns log P(signal | Treasure) for every treasure position, for a probe at (row, column).
+        """
+        return self._log_table[self.cpt.distance_class(row, column), self.cpt.signal_index[signal]]
+
+    def apply(self, row, column, signal):
+        """
+        Applies a single evidence item in place.
+        """
+        self.log_belief += self.log_likelihood(row, column, signal)
+        self._normalize()
+
+    def apply_batch(self, evidences):
+        """
+        Applies several (row, column, signal) evidence items in place with a single
+        normalization. Evidence updates commute, so the result matches applying them
+        one at a time.
+        """
+        for row, column, signal in evidences:
+            self.log_belief += self.log_likelihood(row, column, signal)
+        self._normalize()
+
+    def _normalize(self):
+        # probabilities doubles as the scratch buffer for the log-sum-exp
+        shift = self.log_belief.max()
+        np.subtract(self.log_belief, shift, out=self.probabilities)
+        np.exp(self.probabilities, out=self.probabilities)
+        total = self.probabilities.sum()
+        self.probabilities /= total
+        self.log_belief -= shift + np.log(total)
+        self.entropy = entropy(self.probabilities, self.log_belief)
+        self._top = None
+
+    def stats(self, top=5):
+        """
+        Returns the largest probability, the 1-based (row, column) of that cell, the
+        entropy in nats and the `top` most likely cells as (row, column, probability),
+        most likely first, like `summarize`.
+        """
+        if self._top is None or len(self._top[0]) < min(max(top, 1), self.cpt.total):
+            self._top = top_cells(self.probabilities, max(top, 1))
+        cells, probabilities = self._top
+        return stats_dict(probabilities[0], cells[0], self.entropy, cells[:top], probabilities[:top], self.cpt.columns)
+
+    def window(self, row0, row1, column0, column1, block=1):
+        """
+        Returns the probabilities of the 0-based, end-exclusive window of cells, summed
+        over block x block squares (see `block_sum`).
+        """
+        grid = self.probabilities.reshape(self.cpt.rows, self.cpt.columns)
+        return block_sum(grid[row0:row1, column0:column1], block)
+
+    def view(self):
+        return BeliefView(self)
+
+
+def block_sum(window, block):
+    """
+    Sums a 2D array over block x block squares, the last ones possibly partial.
+    """
+    if block == 1:
+        return window
+    height, width = -(-window.shape[0] // block), -(-window.shape[1] // block)
+    padded = np.zeros((height * block, width * block))
+    padded[:window.shape[0], :window.shape[1]] = window
+    return padded.reshape(height, block, width, block).sum(axis=(1, 3))
+
+
+def summarize(probabilities, columns, top=5):
+    """
+    Summarizes a distribution over the grid: its largest probability, the 1-based
+    (row, column) of that cell, its entropy in nats and the `top` most likely cells
+    as (row, column, probability), most likely first.
+    """
+    with np.errstate(divide="ignore"):
+        value = entropy(probabilities, np.log(probabilities))
+    cells, best = top_cells(probabilities, max(top, 1))
+    return stats_dict(best[0], cells[0], value, cells[:top], best[:top], columns)
+
+
+def entropy(probabilities, log_probabilities):
+    """
+    Returns the entropy, in nats, of a distribution given with its logarithm.
+    """
+    with np.errstate(invalid="ignore"):
+        value = -np.dot(probabilities, log_probabilities)
+        if np.isnan(value):
+            # Impossible cells: 0 * log 0 counts as 0
+            value = -np.nansum(probabilities * log_probabilities)
+    return float(value)
+
+
+def top_cells(probabilities, top, indices=None):
+    """
+    Returns the cells of the `top` largest probabilities and these probabilities,
+    most likely first, ties by cell like argmax. Probabilities equal up to rounding
+    errors (a relative 2**-40) are ties, so every belief storage lists the same
+    cells. `indices` gives the cell of every probability, their position by default.
+    """
+    top = min(top, len(probabilities))
+    if top <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    peak = probabilities.max()
+    keys = np.round(probabilities * (2.0 ** 40 / peak)) if peak > 0 else probabilities
+    best = np.argpartition(keys, len(keys) - top)[len(keys) - top:]
+    # argpartition keeps any of the cells tied at the threshold: keep the first ones
+    threshold = keys[best].min()
+    above = np.flatnonzero(keys > threshold)
+    tied = np.flatnonzero(keys == threshold)
+    if indices is not None:
+        tied = tied[np.argsort(indices[tied], kind="stable")]
+    best = np.concatenate((above, tied[:top - len(above)]))
+    cells = best if indices is None else indices[best]
+    order = np.lexsort((cells, -keys[best]))
+    return cells[order], probabilities[best[order]]
+
+
+def stats_dict(probability, index, value, cells, probabilities, columns):
+    return {
+        "max": float(probability),
+        "map": (int(index) // columns + 1, int(index) % columns + 1),
+        "entropy": value,
+        "top": [(cell // columns + 1, cell % columns + 1, probability)
+                for cell, probability in zip(cells.tolist(), probabilities.tolist())],
+    }
+
+
+class BeliefView(Mapping):
+    """
+    Read-only dict view of a BeliefState, keyed by "(row,column)" position strings.
+    It always reflects the current state of the underlying belief.
+    """
+    def __init__(self, state):
+        self.state = state
+
+    def __getitem__(self, key):
+        return float(self.state.probabilities[self.state.cpt.key_index[key]])
+
+    def __iter__(self):
+        return iter(self.state.cpt.keys)
+
+    def __len__(self):
+        return self.state.cpt.total
+
+    def __contains__(self, key):
+        return key in self.state.cpt.key_index
+
+    def items(self):
+        return _BeliefItems(self)
+
+    def values(self):
+        return _BeliefValues(self)
+
+
+class _BeliefItems(ItemsView):
+    def __iter__(self):
+        return zip(self._mapping.state.cpt.keys, self._mapping.state.probabilities.tolist())
+
+
+class _BeliefValues(ValuesView):
+    def __iter__(self):
+        return iter(self._mapping.state.probabilities.tolist())
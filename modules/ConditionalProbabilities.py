@@ -0,0 +1,225 @@
+from collections.abc import Mapping, Sequence
+from functools import cached_property
+from types import MappingProxyType
+
+import numpy as np
+
+from modules.SensorModels import CLASSIC, METRICS, SensorModel
+
+
+SIGNALS = CLASSIC.signals
+
+
+class CPTStore:
+    """
+    Compact, distance-indexed store of the Conditional Probability Tables (CPTs)
+    used by the Bayesian Network.
+
+    Every signal node shares the same sensor model (see `SensorModel`), which only
+    depends on the distance between the probed cell and the treasure. Instead of one
+    CPT entry per probe/treasure pair, the store keeps a small table indexed by
+    distance class and signal level, plus integer coordinate arrays for the grid.
+    Likelihood rows over all treasure positions are produced on demand, and the
+    per-cell coordinate arrays and position keys are only built the first time they
+    are used, so very large grids that never need them do not pay for them.
+
+    :ivar rows: Number of rows in the grid.
+    :type rows: int
+    :ivar columns: Number of columns in the grid.
+    :type columns: int
+    :ivar sensor: The sensor model the table is compiled from.
+    :type sensor: SensorModel
+    :ivar metric: Distance between a probe and the cells, from their row and column offsets.
+    :type metric: callable
+    :ivar signals: Signal levels, ordered from weakest to strongest.
+    :type signals: tuple
+    :ivar table: Array of shape (distance classes, signal levels) with P(signal | distance).
+    :type table: numpy.ndarray
+    :ivar row_index: 1-based row of every grid cell, in row-major order.
+    :type row_index: numpy.ndarray
+    :ivar column_index: 1-based column of every grid cell, in row-major order.
+    :type column_index: numpy.ndarray
+    :ivar keys: Position keys "(row,column)" of every grid cell, in row-major order.
+    :type keys: list
+    :ivar key_index: Maps a position key to its flat index.
+    :type key_index: dict
+    """
+    def __init__(self, rows, columns, sensor=CLASSIC, distance_classes=None):
+        self.rows = rows
+        self.columns = columns
+        self.total = rows * columns
+
+        if not isinstance(sensor, SensorModel):
+            # A legacy factory mapping a distance to a {signal: probability} dict, with
+            # every distance >= distance_classes - 1 mapped to the same row
+            factory = sensor
+            sensor = SensorModel(getattr(factory, "__name__", "factory"), [
+                [factory(distance)[signal] for signal in SIGNALS] for distance in range(distance_classes or 4)
+            ])
+        elif distance_classes not in (None, sensor.distance_classes):
+            raise ValueError(f"Sensor model {sensor.name} has {sensor.distance_classes} distance classes, "
+                             f"not {distance_classes}")
+        self.sensor = sensor
+        self.metric = METRICS[sensor.metric]
+        self.signals = sensor.signals
+        self.signal_index = {signal: index for index, signal in enumerate(self.signals)}
+        self.distance_classes = sensor.distance_classes
+        self.table = sensor.table
+        self._rows_as_dicts = [
+            MappingProxyType(dict(zip(self.signals, map(float, row)))) for row in self.table
+        ]
+
+    @cached_property
+    def row_index(self):
+        return np.arange(self.total) // self.columns + 1
+
+    @cached_property
+    def column_index(self):
+        return np.arange(self.total) % self.columns + 1
+
+    @cached_property
+    def keys(self):
+        return [f"({row},{column})" for row in range(1, self.rows + 1) for column in range(1, self.columns + 1)]
+
+    @cached_property
+    def key_index(self):
+        return {key: index for index, key in enumerate(self.keys)}
+
+    def index(self, row, column):
+        """
+        Returns the flat, row-major index of a 1-based (row, column) position.
+        """
+        return (row - 1) * self.columns + (column - 1)
+
+    def distance_class(self, row, column):
+        """
+        Returns the distance class of every grid cell as seen from the probe at (row, column).
+        """
+        distance = self.metric(self.row_index - row, self.column_index - column)
+        return np.minimum(distance, self.distance_classes - 1, out=distance)
+
+    def likelihood(self, row, column, signal):
+        """
+        Returns P(signal | Treasure) for every treasure position, for a probe at (row, column).
+        """
+        return self.table[self.distance_class(row, column), self.signal_index[signal]]
+
+    def cpt_row(self, signal_position, treasure_position):
+        """
+        Returns the signal distribution for a probe at `signal_position` given the
+        treasure at `treasure_position`, both as flat indices.
+        """
+        s_row, s_col = divmod(signal_position, self.columns)
+        t_row, t_col = divmod(treasure_position, self.columns)
+
+        distance = int(self.metric(t_row - s_row, t_col - s_col))
+        return self._rows_as_dicts[min(distance, self.distance_classes - 1)]
+
+
+class SignalCPT(Mapping):
+    """
+    Read-only view of the CPT of a single signal node, keyed by treasure position.
+    """
+    def __init__(self, store, signal_position):
+        self._store = store
+        self._signal_position = signal_position
+
+    def __getitem__(self, treasure_position):
+        return self._store.cpt_row(self._signal_position, self._store.key_index[treasure_position])
+
+    def __iter__(self):
+        return iter(self._store.keys)
+
+    def __len__(self):
+        return self._store.total
+
+
+class ProbabilityTables(Mapping):
+    """
+    Compatibility accessor exposing the CPTStore with the original
+    network["probabilities"][node][position][signal] lookups.
+
+    "Treasure" maps to the prior distribution, every "S(row,column)" node maps to
+    a SignalCPT view built on demand.
+    """
+    def __init__(self, store, prior):
+        self._store = store
+        self._prior = prior
+
+    def __getitem__(self, node):
+        if node == "Treasure":
+            return self._prior
+        if not node.startswith("S"):
+            raise KeyError(node)
+        return SignalCPT(self._store, self._store.key_index[node[1:]])
+
+    def __iter__(self):
+        yield "Treasure"
+        for key in self._store.keys:
+            yield f"S{key}"
+
+    def __len__(self):
+        return self._store.total + 1
+
+
+class UniformPrior(Mapping):
+    """
+    Uniform prior over the treasure position, keyed by "(row,column)" position strings.
+    """
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, position):
+        if position not in self._store.key_index:
+            raise KeyError(position)
+        return 1 / self._store.total
+
+    def __iter__(self):
+        return iter(self._store.keys)
+
+    def __len__(self):
+        return self._store.total
+
+
+class SignalNodes(Sequence):
+    """
+    The nodes of the network, "Treasure" followed by one "S(row,column)" node per cell
+    in row-major order, generated on demand.
+    """
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        if index == 0:
+            return "Treasure"
+        row, column = divmod(index - 1, self._store.columns)
+        return f"S({row + 1},{column + 1})"
+
+    def __len__(self):
+        return self._store.total + 1
+
+
+class SignalEdges(Sequence):
+    """
+    The ("Treasure", "S(row,column)") edges of the network, generated on demand.
+    """
+    def __init__(self, store):
+        self._nodes = SignalNodes(store)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return "Treasure", self._nodes[index + 1]
+
+    def __len__(self):
+        return len(self._nodes) - 1
@@ -1,23 +1,45 @@
-import yaml
 import os
+from functools import lru_cache
+
+import yaml
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.yaml')
+
+
+@lru_cache(maxsize=None)
+def load_config(path=CONFIG_PATH):
+    """
+    Parses the configuration file once; later calls share the parsed document.
+    """
+    with open(path, 'r') as file:
+        return yaml.safe_load(file)
+
 
 class Config:
     def __init__(self):
-        with open(r'modules/config.yaml', 'r') as file:
-
-            config = yaml.safe_load(file)
-            self.width = config['App']['size']['width']
-            self.height = config['App']['size']['height']
-            self.title = config['App']['title']
-            self.font_overall = (
-                config['App']['overall']['font'],
-                config['App']['overall']['font_size']
-            )
+        config = load_config()
+        self.width = config['App']['size']['width']
+        self.height = config['App']['size']['height']
+        self.title = config['App']['title']
+        self.font_overall = (
+            config['App']['overall']['font'],
+            config['App']['overall']['font_size']
+        )
 
 
     @staticmethod
     def static_gamedata():
-        with open(r'modules/config.yaml', 'r') as file:
-            config = yaml.safe_load(file)
-            data = {'rows': config['App']['gamedata']['rows'], 'columns': config['App']['gamedata']['columns']}
-            return data
+        gamedata = load_config()['App']['gamedata']
+        data = {'rows': gamedata['rows'], 'columns': gamedata['columns'],
+                'renderer': gamedata.get('renderer', 'buttons'),
+                'belief': gamedata.get('belief', 'dense'),
+                'sensor': gamedata.get('sensor', 'classic'),
+                'hint': gamedata.get('hint', 'information-gain')}
+        return data
+
+    @staticmethod
+    def sensor_models():
+        """
+        Returns the `sensors` section: the sensor models defined next to the built-in one.
+        """
+        return load_config()['App'].get('sensors') or {}
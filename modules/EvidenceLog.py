@@ -0,0 +1,178 @@
+import json
+import os
+import time
+
+import numpy as np
+
+
+RECORD = np.dtype([
+    ("row", "<u4"),
+    ("column", "<u4"),
+    ("signal", "u1"),
+    ("timestamp", "<f8"),
+    # PCG64 state before the signal was drawn: state (high, low) and increment (high, low)
+    ("rng_state", "<u8", (4,)),
+    ("rng_has_uint32", "u1"),
+    ("rng_uinteger", "<u4"),
+])
+FORMAT_VERSION = 1
+_MASK64 = (1 << 64) - 1
+
+
+def pack_rng_state(rng):
+    state = rng.bit_generator.state
+    pcg = state["state"]
+    return ((pcg["state"] >> 64, pcg["state"] & _MASK64, pcg["inc"] >> 64, pcg["inc"] & _MASK64),
+            state["has_uint32"], state["uinteger"])
+
+
+def unpack_rng_state(record):
+    high, low, inc_high, inc_low = (int(value) for value in record["rng_state"])
+    return {
+        "bit_generator": "PCG64",
+        "state": {"state": (high << 64) | low, "inc": (inc_high << 64) | inc_low},
+        "has_uint32": int(record["rng_has_uint32"]),
+        "uinteger": int(record["rng_uinteger"]),
+    }
+
+
+class EvidenceLog:
+    """
+    Append-only history of the probes of a game, with periodic belief snapshots.
+
+    Every probe is stored as a fixed-size binary record (position, signal index,
+    timestamp and the RNG state before the signal was drawn). Every
+    `snapshot_interval` moves a copy of the log-belief is kept, so restoring the
+    belief at any move only replays the records since the closest earlier snapshot.
+    The uniform prior is the implicit snapshot of move 0. With a `snapshot_interval`
+    of 0 no snapshot is taken and the belief is always replayed from the prior.
+
+    The log has a cursor: undoing moves it back without discarding the records
+    after it, so they can be redone or jumped to; appending a new probe drops them.
+
+    :ivar records: Record buffer; only the first `count` entries are valid.
+    :type records: numpy.ndarray
+    :ivar count: Number of valid records.
+    :type count: int
+    :ivar cursor: Number of records that make up the current game state.
+    :type cursor: int
+    :ivar snapshots: Log-belief after the given number of moves.
+    :type snapshots: dict
+    :ivar head_rng_state: RNG state after the last record, kept while the cursor is
+        moved back so it can be restored when returning to the last move.
+    :type head_rng_state: dict
+    """
+    snapshot_interval = 100
+
+    def __init__(self, snapshot_interval=snapshot_interval, max_snapshots=8):
+        self.snapshot_interval = snapshot_interval
+        self.max_snapshots = max_snapshots
+        self.records = np.zeros(64, dtype=RECORD)
+        self.count = 0
+        self.cursor = 0
+        self.snapshots = {}
+        self.head_rng_state = None
+
+    def append(self, row, column, signal, rng_state, belief):
+        """
+        Records a probe at the cursor, discarding any undone records, and snapshots
+        the belief (after the probe) when due.
+
+        :param signal: Index of the signal in `cpt.signals`.
+        :param rng_state: Packed RNG state before the signal was drawn (see `pack_rng_state`).
+        :param belief: The BeliefState after the probe, or None when it is not up to date
+            yet (batched probes), in which case no snapshot is taken.
+        """
+        self.truncate(self.cursor)
+        self.head_rng_state = None
+        if self.count == len(self.records):
+            self.records = np.resize(self.records, 2 * len(self.records))
+
+        self.records[self.count] = (row, column, signal, time.time(), *rng_state)
+        self.count += 1
+        self.cursor = self.count
+
+        if belief is not None and self.snapshot_interval and self.cursor % self.snapshot_interval == 0:
+            self.snapshot(belief)
+
+    def snapshot(self, belief):
+        self.snapshots[self.cursor] = belief.log_belief.copy()
+        while len(self.snapshots) > self.max_snapshots:
+            del self.snapshots[min(self.snapshots)]
+
+    def truncate(self, move):
+        self.count = move
+        self.cursor = min(self.cursor, move)
+        for snapshot in [snapshot for snapshot in self.snapshots if snapshot > move]:
+            del self.snapshots[snapshot]
+
+    def history(self, move=None):
+        """
+        Returns the records of the first `move` moves (the current state by default).
+        """
+        return self.records[:self.cursor if move is None else move]
+
+    def restore(self, move, belief, signals):
+        """
+        Restores `belief` to its state after `move` moves and moves the cursor there.
+
+        :param signals: Signal labels indexed by the record signal indices.
+        """
+        if not 0 <= move <= self.count:
+            raise ValueError(f"No move {move} in a log of {self.count} moves")
+
+        start = max((snapshot for snapshot in self.snapshots if snapshot <= move), default=0)
+        if start:
+            belief.set_log_belief(self.snapshots[start])
+        else:
+            belief.reset()
+        tail = self.records[start:move]
+        belief.apply_batch(zip(tail["row"].tolist(), tail["column"].tolist(),
+                               (signals[signal] for signal in tail["signal"].tolist())))
+        self.cursor = move
+
+    def save(self, path, header, belief):
+        """
+        Saves the log up to the cursor in the directory `path`: the game header as
+        JSON, the records, and a single snapshot of the current belief unless
+        snapshots are disabled.
+        """
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "game.json"), "w") as file:
+            json.dump({**header, "version": FORMAT_VERSION, "moves": self.cursor,
+                       "snapshot_interval": self.snapshot_interval}, file)
+        np.save(os.path.join(path, "evidence.npy"), self.records[:self.cursor])
+        if self.snapshot_interval:
+            np.save(os.path.join(path, "snapshot.npy"), belief.log_belief)
+
+    @staticmethod
+    def read_header(path):
+        with open(os.path.join(path, "game.json")) as file:
+            header = json.load(file)
+        if header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported saved game version: {header.get('version')}")
+        return header
+
+    @classmethod
+    def load(cls, path, belief, signals):
+        """
+        Loads a log saved with `save`, restoring `belief` from the memory-mapped snapshot,
+        or by replaying the records if it was saved without one.
+
+        :return: The log and the game header.
+        """
+        header = cls.read_header(path)
+
+        log = cls(header["snapshot_interval"])
+        records = np.load(os.path.join(path, "evidence.npy"))
+        log.records = np.zeros(max(64, 2 * len(records)), dtype=RECORD)
+        log.records[:len(records)] = records
+        log.count = log.cursor = len(records)
+
+        snapshot = os.path.join(path, "snapshot.npy")
+        if header["snapshot_interval"] and os.path.exists(snapshot):
+            belief.set_log_belief(np.load(snapshot, mmap_mode="r"))
+            log.snapshots[log.cursor] = belief.log_belief.copy()
+        else:
+            log.restore(log.cursor, belief, signals)
+        return log, header
@@ -0,0 +1,49 @@
+from bisect import bisect_left
+
+import numpy as np
+
+
+class EvidenceSampler:
+    """
+    Draws sensor signals from the CPTs with an explicit, seedable NumPy Generator.
+
+    The cumulative distribution of every distance class is computed once, with its
+    last entry pinned to 1.0 so rounding in the CPT can never leave a draw without a
+    signal. Signals are returned as indices into `cpt.signals`; `sample_batch` draws
+    any number of them in a single vectorized call, e.g. many probes against one
+    treasure, or one probe against many simulated treasure placements.
+
+    :ivar cpt: The CPTStore providing the sensor model.
+    :type cpt: CPTStore
+    :ivar rng: Default random number generator.
+    :type rng: numpy.random.Generator
+    :ivar cumulative: Array of shape (distance classes, signal levels) with the
+        cumulative signal probabilities of every distance class.
+    :type cumulative: numpy.ndarray
+    """
+    def __init__(self, cpt, rng=None):
+        self.cpt = cpt
+        self.rng = rng if isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
+        self.cumulative = np.cumsum(cpt.table, axis=1)
+        self.cumulative[:, -1] = 1.0
+        self._cumulative_rows = self.cumulative.tolist()
+
+    def distance_class(self, rows, columns, treasure_rows, treasure_columns):
+        distance = self.cpt.metric(np.subtract(rows, treasure_rows), np.subtract(columns, treasure_columns))
+        return np.minimum(distance, self.cpt.distance_classes - 1)
+
+    def sample(self, row, column, treasure_row, treasure_column, rng=None):
+        """
+        Draws the signal index read by a probe at (row, column) with the treasure at
+        (treasure_row, treasure_column).
+        """
+        distance = min(int(self.cpt.metric(row - treasure_row, column - treasure_column)), self.cpt.distance_classes - 1)
+        return bisect_left(self._cumulative_rows[distance], (rng or self.rng).random())
+
+    def sample_batch(self, rows, columns, treasure_rows, treasure_columns, rng=None):
+        """
+        Draws one signal index per element of the broadcast probe/treasure coordinate arrays.
+        """
+        distance = self.distance_class(rows, columns, treasure_rows, treasure_columns)
+        draws = (rng or self.rng).random(distance.shape)
+        return np.count_nonzero(self.cumulative[distance] < draws[..., None], axis=-1)
@@ -1,9 +1,17 @@
+import time
 import tkinter as tk
+from collections import deque
 from tkinter import messagebox
 from tkinter import ttk
 
-from modules.BayesianNetwork import BayesianNetwork
+import numpy as np
+
+from modules.Config import Config
 from modules.GameData import GameData
+from modules.InferenceWorker import InferenceWorker
+from modules.Instrumentation import instrumentation
+from modules.LookaheadSolver import LookaheadSolver
+from modules.ProbeAdvisor import ProbeAdvisor
 
 
 class GameArea(ttk.Frame):
@@ -12,31 +20,63 @@ class GameArea(ttk.Frame):
     in a treasure-hunting game. It allows users to interact with a grid of
     buttons, reflecting Bayesian belief updates based on user actions.
 
-    The class initializes and manages the user interface layout, button styles,
-    and game interactions. It integrates with a Bayesian network to update
-    beliefs and visually represent the game's state as the player makes
-    selections or decisions.
-
-    :ivar bayesnetwork: Instance of `BayesianNetwork` for managing game states
-        and generating evidence based on the user's actions.
-    :type bayesnetwork: BayesianNetwork
-    :ivar button_grid: A dictionary mapping button positions (tuple of row and
-        column) to ttk Button instances in the game grid.
-    :type button_grid: dict
-    :ivar clicked: List of strings representing grid positions that the user has
-        already interacted with.
-    :type clicked: list
+    The class initializes and manages the user interface layout and button styles.
+    The game itself is played by the `GameEngine` held by `GameData`; GameArea
+    forwards the player's clicks to it and observes its events to keep the grid
+    up to date.
+
+    :ivar engine: The game being displayed.
+    :type engine: GameEngine
+    :ivar button_grid: The ttk Button instances of the game grid, indexed by the
+        flat, row-major cell index (see `CPTStore.index`).
+    :type button_grid: list
+    :ivar touched: Number of buttons whose text changed during the last refresh.
+    :type touched: int
+    :ivar advisor: Scores the cells by expected information gain for hints.
+    :type advisor: ProbeAdvisor
+    :ivar hint: Position of the currently highlighted hint, if any.
+    :type hint: tuple
+    :ivar solver: Plans the hints when the `hint` setting is "lookahead"; it is kept
+        across games so its cached posteriors are reused.
+    :type solver: LookaheadSolver
+    :ivar worker: Runs the probes and digs off the Tk thread.
+    :type worker: InferenceWorker
     """
+    poll_ms = 10
+    hover_ms = 30
+    hud_top = 5
+
     def __init__(self, parent):
         super().__init__(master = parent)
-        self.bayesnetwork = BayesianNetwork()
-        self.button_grid = {}
-        self.clicked = []
+        self.engine = GameData.getEngine()
+        self.advisor = ProbeAdvisor(self.engine.network.cpt)
+        self.hint = None
+        self.solver = None
+        self.hint_mode = Config.static_gamedata()['hint']
+        self.button_grid = []
+        self.touched = 0
+        self._signalled = set()
+        self._rendered = []
+        self._rendered_keys = None
+        self._flush_id = None
+        self._refresh_deferred = False
+        self._queued = set()
+        self._clicks = deque()
+        self._poll_id = None
+        self._hover = None
+        self._hover_id = None
+        self.worker = InferenceWorker(self.engine)
 
         self.setup_ui()
         self.create_widgets()
         self.create_layout()
+        self.engine.subscribe(self.on_game_event)
+        self.update_hud()
+
 
+    def destroy(self):
+        self.worker.stop()
+        super().destroy()
 
     def setup_ui(self):
         for rc in range(GameData.rows):
@@ -59,29 +99,24 @@ class GameArea(ttk.Frame):
             foreground=[("active", "black")],
         )
 
-        # GameArea button Signal +
-        style.configure('S1.GameArea.TButton',
-                        font=('Helvetica', 10, 'bold'),
-                        relief="sunken", borderwidth=2, background="green",
-                        bordercolor="aqua", foreground="black")
-
-        # GameArea button Signal ++
-        style.configure('S2.GameArea.TButton',
-                        font=('Helvetica', 10, 'bold'),
-                        relief="sunken", borderwidth=2, background="yellow",
-                        bordercolor="aqua", foreground="black")
+        # GameArea buttons Signal + to ++++..., in the colours of the sensor model
+        for level, colour in enumerate(self.engine.network.cpt.sensor.colours, start=1):
+            style.configure(f'S{level}.GameArea.TButton',
+                            font=('Helvetica', 10, 'bold'),
+                            relief="sunken", borderwidth=2, background=colour,
+                            bordercolor="aqua", foreground=self.text_colour(colour))
 
-        # GameArea button Signal +++
-        style.configure('S3.GameArea.TButton',
+        # GameArea button queued for probing
+        style.configure('Pending.GameArea.TButton',
                         font=('Helvetica', 10, 'bold'),
-                        relief="sunken", borderwidth=2, background="orange",
-                        bordercolor="aqua", foreground="black")
+                        relief="sunken", borderwidth=2, background="gray40",
+                        bordercolor="aqua", foreground="white")
 
-        # GameArea button Signal ++++
-        style.configure('S4.GameArea.TButton',
+        # GameArea button Hint
+        style.configure('Hint.GameArea.TButton',
                         font=('Helvetica', 10, 'bold'),
-                        relief="sunken", borderwidth=2, background="firebrick4",
-                        bordercolor="aqua", foreground="white")
+                        relief="sunken", borderwidth=2, background="deep sky blue",
+                        bordercolor="white", foreground="black")
 
         # GameArea button Treasure Area
         style.configure('T.GameArea.TButton',
@@ -89,28 +124,38 @@ class GameArea(ttk.Frame):
                         relief="sunken", borderwidth=2, background="gold",
                         bordercolor="yellow", foreground="black")
 
+    def text_colour(self, background):
+        """
+        Returns black or white, whichever reads best on `background`.
+        """
+        red, green, blue = self.winfo_rgb(background)
+        return "black" if 0.299 * red + 0.587 * green + 0.114 * blue > 0.25 * 65535 else "white"
+
     def create_widgets(self):
-        belief = self.bayesnetwork.get_initial_belief()
-        GameData.setBelief(belief)
+        cpt = self.engine.network.cpt
+        probabilities = self.engine.network.belief.probabilities
+        self._rendered = [GameData.getProbText(prob) for prob in probabilities.tolist()]
+        self._rendered_keys = self._display_keys(probabilities)
 
-        for pos, prob in GameData.getBelief().items():
-            row , column = map(int, pos.strip("()").split(","))
-            text = f"{prob:.4f}"
+        for row, column, text in zip(cpt.row_index.tolist(), cpt.column_index.tolist(), self._rendered):
             button = ttk.Button(
                 master = self,
                 text=text,
                 command= lambda r=row, c=column: self.detect_or_dig(r,c),
                 style='Initial.GameArea.TButton'
             )
-            self.button_grid[pos] = button
+            button.bind("<Enter>", lambda event, r=row, c=column: self.on_hover((r, c)))
+            button.bind("<Leave>", lambda event: self.on_hover(None))
+            self.button_grid.append(button)
 
     def create_layout(self):
-        for pos, button in self.button_grid.items():
-            row , column = map(int, pos.strip("()").split(","))
-            button.grid(row=row-1, column=column-1, ipady=5, sticky="nsew")
+        columns = self.engine.columns
+        for index, button in enumerate(self.button_grid):
+            button.grid(row=index // columns, column=index % columns, ipady=5, sticky="nsew")
         self.configure(style="GameArea.TFrame")
 
-
+    def button(self, row, column):
+        return self.button_grid[(row - 1) * self.engine.columns + (column - 1)]
 
     def detect_or_dig(self, row, column):
         """
@@ -118,11 +163,13 @@ class GameArea(ttk.Frame):
         either detect signals or dig for treasure depending on the current mode (`DetectMode` or
         `DigMode`).
 
-        The method updates the game state based on the actions performed by the player. If in
-        detect mode, it processes clicked tiles to reveal signals, update beliefs using a Bayesian
-        network, and adjust probabilities. In dig mode, it confirms the player's intent, checks
-        for treasure location, and determines if the game is won or lost. Additionally, it handles
-        game conclusion if the player runs out of health points.
+        In detect mode, the probe is queued on the inference worker, which reveals the signal,
+        updates the belief and charges the HP off the Tk thread; the cell is shown as pending
+        and the game area shows a busy cursor until the result is collected (see
+        `poll_worker`). Probes clicked while the worker is busy are handled in click order, in
+        one batched belief update and one redraw.
+        In dig mode, it confirms the player's intent and queues the dig after the pending
+        probes; the outcome is reported once it is collected.
 
         :param row: The row index of the grid location being interacted with.
         :type row: int
@@ -133,60 +180,248 @@ class GameArea(ttk.Frame):
         pos = f"({row},{column})"
 
         if GameData.isDetectModeOn():
-            if pos not in self.clicked:
-                self.clicked.append(pos)
-                signal = self.bayesnetwork.evidenceGenerator(row, column) # Generate the new signal
-                self.update_button(row, column, signal) # Update button colour based on signal
-                GameData.setBelief(self.bayesnetwork.update_belief(GameData.getBelief())) # Updates Belief with prior
-                GameData.damage() # Updated HP
-                self.updateButtonsProbabilities() # Updated Grid Prob
+            if not self.engine.isProbed(row, column) and (row, column) not in self._queued:
+                self._clicks.append(time.perf_counter())
+                self._queued.add((row, column))
+                self.show_pending(row, column)
+                self.worker.submit("detect", row, column)
+                self.poll_worker()
             else:
                 messagebox.showinfo(title="Sorry", message="Already clicked there.")
         else:
-            pos = f"({row},{column})"
             text = f"Do you really want to dig in: {pos}"
             awner = messagebox.askquestion(title="Question", message=text)
             if awner == "yes":
-                tpos = GameData.treasureLocation
-                r, c = map(int, tpos.strip("()").split(","))
-                self.button_grid[f"({r},{c})"].config(style="T.GameArea.TButton")
-                if pos == tpos:
-                    messagebox.showinfo(title="Congrats!", message=f"Congrats you found the TREASURE\n You won {int(GameData.currentHp)} Points!")
+                self._clicks.append(time.perf_counter())
+                self.worker.submit("dig", row, column)
+                self.poll_worker()
+
+    def poll_worker(self):
+        """
+        Collects the finished actions of the worker and sends their engine events from the
+        Tk thread, polling again every `poll_ms` while actions are pending.
+        """
+        self._poll_id = None
+        for action, count, result, error in self.worker.collect():
+            clicked = [self._clicks.popleft() for _ in range(count)][0]
+            if error is not None:
+                continue
+            self.engine.notify(action)
+            if instrumentation.enabled:
+                # Redraws are idle callbacks themselves: record from the idle pass after them
+                self.after_idle(self.after_idle, instrumentation.record, "click_to_idle", clicked)
+            if action == "dig":
+                if result:
+                    messagebox.showinfo(title="Congrats!", message=f"Congrats you found the TREASURE\n You won {int(self.engine.hp)} Points!")
                 else:
-                    messagebox.showwarning(title="Sorry!", message=f"You failed to find the treasure located at {GameData.treasureLocation}")
+                    messagebox.showwarning(title="Sorry!", message=f"You failed to find the treasure located at {self.engine.treasureLocation}")
+                self.master.quit()
+            elif self.engine.isPlayerDead():
+                self.show_treasure()
+                messagebox.showwarning(title="0 HP!",
+                                       message=f"You failed to find the treasure located at {self.engine.treasureLocation}")
                 self.master.quit()
 
-        if GameData.isPlayerDead():
-            tpos = GameData.treasureLocation
-            r, c = map(int, tpos.strip("()").split(","))
-            self.button_grid[f"({r},{c})"].config(style="T.GameArea.TButton")
-            messagebox.showwarning(title="0 HP!",
-                                   message=f"You failed to find the treasure located at {GameData.treasureLocation}")
-            self.master.quit()
-
-    def updateButtonsProbabilities(self):
-        for pos_renew, prob in GameData.getBelief().items():
-            r, c = map(int, pos_renew.strip("()").split(","))
-            self.button_grid[f"({r},{c})"].config(text=GameData.getProbText(prob))
-        return
-
-    def update_button(self, row, column, signal):
-        match signal:
-            case "+":
-                signal = 1
-            case "++":
-                signal = 2
-            case "+++":
-                signal = 3
-            case "++++":
-                signal = 4
-        self.button_grid[f"({row},{column})"].config(style=f"S{signal}.GameArea.TButton")
-
+        if self.worker.busy:
+            self.configure(cursor="watch")
+            self._poll_id = self.after(self.poll_ms, self.poll_worker)
+        else:
+            self.configure(cursor="")
+            # Probes skipped because the game ended while they were queued
+            for row, column in self._queued - self.engine.signals.keys():
+                self.show_pending(row, column, False)
+            self._queued.clear()
+            if self._refresh_deferred:
+                self._refresh_deferred = False
+                self.updateButtonsProbabilities()
+
+    def on_hover(self, cell):
+        """
+        Schedules the preview of the cell under the cursor, coalescing fast moves into
+        one preview every `hover_ms`.
+        """
+        self._hover = cell
+        if self._hover_id is None:
+            self._hover_id = self.after(self.hover_ms, self.show_preview)
 
+    def show_preview(self):
+        """
+        Shows in the menu bar what probing the hovered cell could tell: for every signal,
+        its probability, the largest posterior it would lead to and where, and the
+        entropy of the posterior. Nothing is shown while the worker is busy or over
+        probed cells.
+        """
+        self._hover_id = None
+        menubar = getattr(self.master, "menubar", None)
+        if menubar is None:
+            return
+        cell = self._hover
+        if (cell is None or self.worker.busy or self.engine.isOver() or self.engine.isProbed(*cell)
+                or not self.previewable()):
+            menubar.preview.config(text="")
+            return
+        lines = [f"Probe ({cell[0]},{cell[1]})?", f"{'':<5}{'P':>5}{'max':>6} {'at':<8}{'H':>5}"]
+        for item in self.engine.preview([cell], top=1):
+            at = "({},{})".format(*item["map"])
+            lines.append(f"{item['signal']:<5}{item['probability']:5.2f}{item['max']:6.2f} {at:<8}{item['entropy']:5.2f}")
+        menubar.preview.config(text="\n".join(lines))
+
+    def update_hud(self):
+        """
+        Shows the live statistics of the belief in the menu bar: its entropy, the most
+        likely cell and the `hud_top` most likely cells. The entropy is kept by the
+        normalization of the belief. A dense belief selects its top cells once per
+        update, with one `argpartition` over the grid; sparse and tiled beliefs pick
+        them from their support or from the top cells they keep per tile.
+        """
+        menubar = getattr(self.master, "menubar", None)
+        if menubar is None or self.worker.busy:
+            return
+        stats = self.engine.network.belief.stats(self.hud_top)
+        lines = [f"H {stats['entropy']:.2f} nats",
+                 "MAP ({},{}) {:.2f}".format(*stats["map"], stats["max"])]
+        lines += ["{:>2}. ({},{}) {:.3f}".format(rank, *cell) for rank, cell in enumerate(stats["top"], start=1)]
+        menubar.hud.config(text="\n".join(lines))
+
+    def previewable(self):
+        # Previews read the whole belief
+        return self.engine.network.storage != "tiled"
+
+    def show_pending(self, row, column, pending=True):
+        """
+        Shows (or stops showing) a cell as queued for probing.
+        """
+        self.button(row, column).config(style="Pending.GameArea.TButton" if pending else "Initial.GameArea.TButton")
 
+    def on_game_event(self, event, engine):
+        """
+        Engine observer: keeps the grid in sync with the game.
+        """
+        if event == "detect":
+            self.clear_hint()
+            for row, column in engine.signals.keys() - self._signalled:
+                self._queued.discard((row, column))
+                self.update_button(row, column, engine.signals[(row, column)]) # Update button colour based on signal
+            self.updateButtonsProbabilities() # Updated Grid Prob
+        elif event == "dig":
+            self.show_treasure()
+        elif event in ("restore", "reset"):
+            self.sync_signals()
+        self.update_hud()
+        self.on_hover(self._hover)
+
+    def sync_signals(self):
+        """
+        Restyles the grid in place after the engine moved back or forth in its history,
+        or started a new game.
+        """
+        self.clear_hint()
+        for row, column in self._signalled - self.engine.signals.keys():
+            self.button(row, column).config(style="Initial.GameArea.TButton")
+        self._signalled.clear()
+        for (row, column), signal in self.engine.signals.items():
+            self.update_button(row, column, signal)
+        self.updateButtonsProbabilities()
+
+    def undo(self):
+        """
+        Takes back the last probe, if the game is still running and no probe is pending.
+        """
+        if not self.worker.busy and self.engine.dug is None and self.engine.moves:
+            self.engine.undo()
 
+    def show_hint(self):
+        """
+        Highlights the cell that is expected to be the most informative to probe next.
+        """
+        if self.worker.busy:
+            return
+        self.clear_hint()
+        self.hint = self.suggest()
+        # A dig hint can point at a probed cell, which keeps its signal colour
+        if self.hint is not None and not self.engine.isProbed(*self.hint):
+            self.button(*self.hint).config(style="Hint.GameArea.TButton")
+
+    def suggest(self):
+        """
+        Returns the cell to hint at: the most informative probe, or with the "lookahead"
+        hint, the next move of the look-ahead solver, which says so when it is time to dig.
+        """
+        if self.hint_mode != "lookahead":
+            return self.advisor.best_probe(self.engine.network.belief.probabilities, self.engine.signals)
+        if self.solver is None:
+            self.solver = LookaheadSolver(self.engine.network.cpt, cache=self.engine.network.posterior_cache)
+        action, row, column, _ = self.solver.plan(self.engine)
+        if action == "dig":
+            messagebox.showinfo(title="Hint", message=f"Time to dig, at ({row},{column})")
+        return row, column
+
+    def clear_hint(self):
+        if self.hint is not None and not self.engine.isProbed(*self.hint):
+            self.button(*self.hint).config(style="Initial.GameArea.TButton")
+        self.hint = None
+
+    def show_treasure(self):
+        self.button(*self.engine.treasure).config(style="T.GameArea.TButton")
+        self._signalled.add(self.engine.treasure)
 
+    def updateButtonsProbabilities(self):
+        """
+        Schedules a refresh of the probabilities shown on the grid. Bursts of calls are
+        coalesced into a single refresh once Tk is idle, and the refresh waits for the
+        worker to finish while it is updating the belief.
+        """
+        if self._flush_id is None:
+            self._flush_id = self.after_idle(self._refresh)
 
+    def _refresh(self):
+        self._flush_id = None
+        if self.worker.busy:
+            self._refresh_deferred = True
+        else:
+            self.flush_probabilities()
 
+    def flush_probabilities(self):
+        """
+        Pushes the current probabilities to the grid, only configuring the buttons whose
+        displayed text changed since the last refresh.
 
+        :return: The number of buttons updated.
+        """
+        if self._flush_id is not None:
+            self.after_cancel(self._flush_id)
+            self._flush_id = None
+
+        with instrumentation.span("refresh"):
+            probabilities = self.engine.network.belief.probabilities
+            keys = self._display_keys(probabilities)
+            # Near a rounding tie the key may round the other way than the text: compare the text
+            changed = np.flatnonzero((keys != self._rendered_keys) | self._near_tie(probabilities))
+            self._rendered_keys = keys
+
+            touched = 0
+            for index, prob in zip(changed.tolist(), probabilities[changed].tolist()):
+                text = GameData.getProbText(prob)
+                if text != self._rendered[index]:
+                    self.button_grid[index].config(text=text)
+                    self._rendered[index] = text
+                    touched += 1
+        instrumentation.count("buttons_touched", touched)
+        self.touched = touched
+        return touched
+
+    @staticmethod
+    def _display_keys(probabilities):
+        # Probabilities quantized the way getProbText rounds them
+        return np.rint(probabilities * 1e4).astype(np.int64)
+
+    @staticmethod
+    def _near_tie(probabilities):
+        # np.rint rounds half to even on the scaled value, the text rounds the exact float
+        scaled = probabilities * 1e4
+        return np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
 
+    def update_button(self, row, column, signal):
+        level = self.engine.network.cpt.signal_index[signal] + 1
+        self.button(row, column).config(style=f"S{level}.GameArea.TButton")
+        self._signalled.add((row, column))
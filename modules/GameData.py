@@ -1,45 +1,48 @@
-import random
-import tkinter as tk
-
 from modules.Config import Config
+from modules.GameEngine import GameEngine
+from modules.SensorModels import get_sensor_model, register_config
 
 
 class GameData:
-    pointsVar: tk.IntVar
+    """
+    GameData gives the user interface access to the current game.
+
+    The game state itself lives in a `GameEngine`; GameData only keeps the engine
+    used by the window and the interface mode (Detect or Dig).
+    """
+    engine: GameEngine
     mode: str
-    treasureLocation: str
-    belief: dict
 
     @classmethod
-    def initialize(cls):
-        cls.pointsVar = tk.IntVar(value=100)
+    def initialize(cls, engine=None):
+        if engine is None:
+            data = Config.static_gamedata()
+            register_config(Config.sensor_models())
+            engine = GameEngine(data['rows'], data['columns'], storage=data['belief'],
+                                sensor=get_sensor_model(data['sensor']))
+        cls.engine = engine
         cls.mode = "Detect"
-        data = Config.static_gamedata()
-        cls.columns = data['columns']
-        cls.rows = data['rows']
-        cls.currentHp = 100
-        cls.pointDmg = cls.currentHp / (cls.rows * cls.columns)
-        cls.game = {}
-        x, y = random.randint(1, cls.rows), random.randint(1, cls.columns)
-        cls.treasureLocation = f"({x},{y})"
-        print(f"Treasure in: {cls.treasureLocation}")
+        cls.rows = engine.rows
+        cls.columns = engine.columns
+        cls.totalLocations = engine.totalLocations
+        cls.pointDmg = engine.pointDmg
+        print(f"Treasure in: {engine.treasureLocation}")
 
-        cls.totalLocations = cls.rows * cls.columns
-        for row in range(cls.rows):
-            for col in range(cls.columns):
-                cls.game[f"T({row},{col})"] = {
-                    'initial_prob': 1/cls.totalLocations,
-                    'signal': None,
-                }
+    @classmethod
+    def reset(cls):
+        """
+        Starts a new game on the current engine, reusing its network and tables.
+        """
+        cls.mode = "Detect"
+        cls.engine.new_game()
 
     @classmethod
-    def getPointsVar(cls):
-        return cls.pointsVar
+    def getEngine(cls):
+        return cls.engine
 
     @classmethod
     def damage(cls):
-        cls.currentHp -= cls.pointDmg
-        cls.pointsVar.set(int(cls.currentHp))
+        cls.engine.damage()
 
     @classmethod
     def isDetectModeOn(cls):
@@ -54,16 +57,16 @@ class GameData:
 
     @classmethod
     def setBelief(cls, newBelief):
-        cls.belief = newBelief
+        cls.engine.belief = newBelief
 
     @classmethod
     def getBelief(cls):
-        return cls.belief
+        return cls.engine.belief
 
     @classmethod
     def isPlayerDead(cls):
-        return cls.currentHp <= 0
+        return cls.engine.isPlayerDead()
 
     @staticmethod
     def getProbText(prob):
-        return f"{prob:.4f}"
\ No newline at end of file
+        return f"{prob:.4f}"
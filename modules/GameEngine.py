@@ -0,0 +1,272 @@
+import numpy as np
+
+from modules.BayesianNetwork import BayesianNetwork
+from modules.EvidenceLog import EvidenceLog, pack_rng_state, unpack_rng_state
+from modules.Instrumentation import instrumentation
+from modules.SensorModels import CLASSIC, get_sensor_model
+
+
+class GameEngine:
+    """
+    GameEngine holds the complete state of a single treasure hunt, independently of
+    any user interface.
+
+    It owns the grid size, the treasure location, the random number generator, the
+    player's HP and the Bayesian belief over the treasure position. Several engines
+    can live in the same process, and none of them needs a Tk root, which makes it
+    suitable for automated tests and batch simulations. Interfaces follow the game by
+    subscribing callbacks, which are called as `callback(event, engine)` after every
+    "detect", "dig" and "reset" event, and after a "restore" event when the game is
+    moved back or forth in its history.
+
+    :ivar rows: Number of rows in the grid.
+    :type rows: int
+    :ivar columns: Number of columns in the grid.
+    :type columns: int
+    :ivar rng: Random number generator used for the treasure and the signals.
+    :type rng: numpy.random.Generator
+    :ivar network: Bayesian network holding the CPTs and the belief.
+    :type network: BayesianNetwork
+    :ivar treasure: 1-based (row, column) of the treasure.
+    :type treasure: tuple
+    :ivar hp: Remaining health points.
+    :type hp: float
+    :ivar signals: Signal read at every probed (row, column).
+    :type signals: dict
+    :ivar log: History of the probes, used for undo/redo, replays and saved games.
+    :type log: EvidenceLog
+    """
+    initialHp = 100
+
+    def __init__(self, rows, columns, seed=None, network=None, storage="dense", **options):
+        self.rows = rows
+        self.columns = columns
+        self.totalLocations = rows * columns
+        self.pointDmg = self.initialHp / self.totalLocations
+        self.network = network if network is not None else BayesianNetwork(rows, columns, storage=storage, **options)
+        self.seed(seed)
+        self.observers = []
+        self.new_game()
+
+    def seed(self, seed=None):
+        """
+        Replaces the random number generator, making the following games reproducible.
+        """
+        self.rng = np.random.default_rng(seed)
+
+    def new_game(self):
+        """
+        Starts a new game on the same grid: new treasure, full HP and uniform belief.
+        """
+        self.treasure = (int(self.rng.integers(1, self.rows + 1)), int(self.rng.integers(1, self.columns + 1)))
+        self.hp = self.initialHp
+        self.signals = {}
+        self.dug = None
+        # Tiled beliefs are too large to snapshot, and replaying a probe only touches a few tiles
+        self.log = EvidenceLog(0 if self.network.storage == "tiled" else EvidenceLog.snapshot_interval)
+        self.network.network["evidences"].clear()
+        self.belief = self.network.get_initial_belief()
+        self.notify("reset")
+
+    @property
+    def treasureLocation(self):
+        return f"({self.treasure[0]},{self.treasure[1]})"
+
+    def subscribe(self, callback):
+        self.observers.append(callback)
+
+    def unsubscribe(self, callback):
+        self.observers.remove(callback)
+
+    def notify(self, event):
+        for callback in self.observers:
+            callback(event, self)
+
+    def isProbed(self, row, column):
+        return (row, column) in self.signals
+
+    def isPlayerDead(self):
+        return self.hp <= 0
+
+    def isOver(self):
+        return self.dug is not None or self.isPlayerDead()
+
+    def isWon(self):
+        return self.dug == self.treasure
+
+    def damage(self):
+        self.hp -= self.pointDmg
+
+    def detect(self, row, column):
+        """
+        Probes the cell at (row, column): samples a signal from the sensor model,
+        updates the belief with it and charges the probe's HP cost.
+
+        :return: The signal read, one of "+", "++", "+++" or "++++".
+        :raises ValueError: If the cell was already probed or the game is over.
+        """
+        if self.isOver():
+            raise ValueError("The game is over")
+        if self.isProbed(row, column):
+            raise ValueError(f"Already probed ({row},{column})")
+
+        rng_state = pack_rng_state(self.rng)
+        with instrumentation.span("evidence"):
+            signal = self.network.evidenceGenerator(row, column, self.treasureLocation, self.rng)
+        self.signals[(row, column)] = signal
+        with instrumentation.span("belief"):
+            self.belief = self.network.update_belief(self.belief)
+        with instrumentation.span("log"):
+            self.log.append(row, column, self.network.cpt.signal_index[signal], rng_state, self.network.belief)
+        with instrumentation.span("hp"):
+            self.damage()
+        instrumentation.count("probes")
+        self.notify("detect")
+        return signal
+
+    def detect_batch(self, cells, notify=True):
+        """
+        Probes several cells in order with a single, batched belief update. Cells
+        already probed are skipped, and probing stops when the HP runs out.
+
+        :param notify: Whether to send the "detect" event; callers running this off the
+            interface thread send it themselves, from that thread, with `notify`.
+        :return: The (row, column, signal) of every cell probed.
+        :raises ValueError: If the game is over.
+        """
+        if self.isOver():
+            raise ValueError("The game is over")
+
+        probed = []
+        moves = self.log.cursor
+        for row, column in cells:
+            if self.isOver():
+                break
+            if self.isProbed(row, column):
+                continue
+            rng_state = pack_rng_state(self.rng)
+            with instrumentation.span("evidence"):
+                signal = self.network.evidenceGenerator(row, column, self.treasureLocation, self.rng)
+            self.signals[(row, column)] = signal
+            self.log.append(row, column, self.network.cpt.signal_index[signal], rng_state, None)
+            self.damage()
+            probed.append((row, column, signal))
+
+        with instrumentation.span("belief"):
+            self.belief = self.network.update_belief_batch(self.belief)
+        interval = self.log.snapshot_interval
+        if interval and self.log.cursor // interval > moves // interval:
+            self.log.snapshot(self.network.belief)
+        instrumentation.count("probes", len(probed))
+        if notify:
+            self.notify("detect")
+        return probed
+
+    def dig(self, row, column, notify=True):
+        """
+        Digs at (row, column), which ends the game.
+
+        :param notify: Whether to send the "dig" event (see `detect_batch`).
+        :return: True if the treasure was found.
+        :raises ValueError: If the game is over.
+        """
+        if self.isOver():
+            raise ValueError("The game is over")
+
+        self.dug = (row, column)
+        instrumentation.count("digs")
+        if notify:
+            self.notify("dig")
+        return self.isWon()
+
+    def preview(self, probes, top=5):
+        """
+        Previews the belief after hypothetical probes, without playing them (see
+        `BayesianNetwork.preview`).
+
+        :param probes: (row, column, signal) or (row, column) hypothetical probes.
+        """
+        evidence = [(row, column, signal) for (row, column), signal in self.signals.items()]
+        return self.network.preview(evidence, probes, top)
+
+    @property
+    def moves(self):
+        return self.log.cursor
+
+    def jump_to(self, move):
+        """
+        Moves the game to the state after `move` probes of its history, in either
+        direction. The belief is restored from the closest snapshot and the RNG is
+        rewound, so probing again after an undo reads the same signals.
+
+        :raises ValueError: If the game ended by digging or the move is not in the history.
+        """
+        if self.dug is not None:
+            raise ValueError("The game is over")
+
+        if self.log.cursor == self.log.count:
+            self.log.head_rng_state = self.rng.bit_generator.state
+        self.log.restore(move, self.network.belief, self.network.cpt.signals)
+        self._sync_with_log()
+        if move < self.log.count:
+            self.rng.bit_generator.state = unpack_rng_state(self.log.records[move])
+        elif self.log.head_rng_state is not None:
+            self.rng.bit_generator.state = self.log.head_rng_state
+        self.notify("restore")
+
+    def undo(self, moves=1):
+        self.jump_to(max(self.log.cursor - moves, 0))
+
+    def redo(self, moves=1):
+        self.jump_to(min(self.log.cursor + moves, self.log.count))
+
+    def save(self, path):
+        """
+        Saves the game, up to the current move, in the directory `path`, with the
+        cell dug if it is over.
+        """
+        header = {"rows": self.rows, "columns": self.columns, "treasure": self.treasure,
+                  "sensor": self.network.cpt.sensor.name, "rng": self.rng.bit_generator.state, "dug": self.dug}
+        self.log.save(path, header, self.network.belief)
+
+    @classmethod
+    def load(cls, path, network=None, storage="dense", **options):
+        """
+        Loads a game saved with `save`. Only the latest belief snapshot is read, so
+        loading does not depend on the length of the game. The game is played with the
+        registered sensor model it was saved with, unless a network or a `sensor` is given.
+        """
+        header = EvidenceLog.read_header(path)
+        if network is None and "sensor" not in options:
+            options["sensor"] = get_sensor_model(header.get("sensor", CLASSIC.name))
+        engine = cls(header["rows"], header["columns"], network=network, storage=storage, **options)
+        engine.log, header = EvidenceLog.load(path, engine.network.belief, engine.network.cpt.signals)
+        engine.treasure = tuple(header["treasure"])
+        engine.dug = tuple(header["dug"]) if header.get("dug") is not None else None
+        engine.rng.bit_generator.state = header["rng"]
+
+        engine._sync_with_log()
+        return engine
+
+    def _sync_with_log(self):
+        history = self.log.history()
+        signals = self.network.cpt.signals
+        self.signals = {(row, column): signals[signal] for row, column, signal in
+                        zip(history["row"].tolist(), history["column"].tolist(), history["signal"].tolist())}
+        self.hp = self.initialHp - self.pointDmg * self.log.cursor
+
+    def state(self):
+        """
+        Returns a snapshot of the game. The treasure is only revealed once the game is over.
+        """
+        over = self.isOver()
+        return {
+            "rows": self.rows,
+            "columns": self.columns,
+            "hp": self.hp,
+            "signals": dict(self.signals),
+            "belief": self.network.belief.probabilities.copy(),
+            "over": over,
+            "won": self.isWon(),
+            "treasure": self.treasure if over else None,
+        }
@@ -0,0 +1,255 @@
+import glob
+import gzip
+import json
+import os
+import re
+import zlib
+
+import numpy as np
+
+
+class GameRecordWriter:
+    """
+    Append-only writer of finished games, for analysing large batches of games.
+
+    Games are written as JSON lines into gzip-compressed chunk files of at most
+    `chunk_records` games, named "<name>-<index>.jsonl.gz" in `directory`. Chunks are
+    never reopened: a new writer starts after the last chunk of the same name, so
+    archives only grow, and several writers (e.g. one per simulation worker) can add
+    to the same directory under different names. With `append` False, a writer
+    refuses a name that already has chunks, so a run written twice is not counted
+    twice by the readers. A record holds:
+
+    - "rows", "columns", "sensor" and "seed": the game configuration
+    - "probes": [row, column, signal level] of every probe, in order
+    - "dig": [row, column] of the dig, or null if the HP ran out
+    - "treasure", "won" and "hp": the outcome
+    - "belief": the posterior of every cell at dig time, in row-major order, to six
+      significant digits
+    - any extra fields given to `write`, e.g. the "policy"
+
+    :ivar directory: Directory of the archive.
+    :type directory: str
+    :ivar written: Number of games written by this writer.
+    :type written: int
+    """
+    def __init__(self, directory, name="records", chunk_records=100_000, append=True):
+        self.directory = directory
+        self.name = name
+        self.chunk_records = chunk_records
+        self.written = 0
+        os.makedirs(directory, exist_ok=True)
+        pattern = re.compile(rf"{re.escape(name)}-(\d+)\.jsonl\.gz$")
+        existing = [int(match.group(1)) for match in map(pattern.match, os.listdir(directory)) if match]
+        if existing and not append:
+            raise ValueError(f"{directory} already holds records named {name}")
+        self._index = max(existing, default=-1) + 1
+        self._file = None
+        self._in_chunk = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def write(self, engine, seed=None, **extra):
+        """
+        Writes the finished game of `engine`.
+
+        :param seed: The seed the game was played with, if any.
+        :return: The record written.
+        """
+        history = engine.log.history()
+        record = {
+            "rows": engine.rows,
+            "columns": engine.columns,
+            "sensor": engine.network.cpt.sensor.name,
+            "seed": seed,
+            "probes": np.stack((history["row"], history["column"], history["signal"]), axis=1).tolist(),
+            "dig": list(engine.dug) if engine.dug is not None else None,
+            "treasure": list(engine.treasure),
+            "won": engine.isWon(),
+            "hp": engine.hp,
+            "belief": [float(f"{probability:.6g}") for probability in engine.network.belief.probabilities.tolist()],
+            **extra,
+        }
+        self.write_record(record)
+        return record
+
+    def write_record(self, record):
+        if self._file is None or self._in_chunk == self.chunk_records:
+            self.close()
+            path = os.path.join(self.directory, f"{self.name}-{self._index:06d}.jsonl.gz")
+            self._index += 1
+            self._file = gzip.open(path, "xt", encoding="utf-8")
+            self._in_chunk = 0
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._in_chunk += 1
+        self.written += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def chunk_paths(path):
+    """
+    Returns the chunk files of an archive directory (or the single chunk `path`), in name order.
+    """
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "*.jsonl.gz")))
+    return [path]
+
+
+def read_records(path):
+    """
+    Yields the records of an archive one at a time, reading its chunks as streams.
+    A chunk cut short (e.g. by a crash while it was written) is read up to its last
+    complete record.
+    """
+    for chunk in chunk_paths(path):
+        with gzip.open(chunk, "rt", encoding="utf-8") as file:
+            try:
+                for line in file:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+            except (EOFError, zlib.error):
+                pass
+
+
+def read_batches(records, size=10_000):
+    """
+    Groups a stream of records into lists of at most `size` records.
+    """
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Calibration:
+    """
+    Running calibration and outcome statistics over a stream of game records, in
+    constant memory.
+
+    Every cell of the belief at dig time is a forecast of whether the treasure is
+    there. Forecasts are counted in `bins` equal-width probability bins, with the sum
+    of their probabilities and the number of them that held the treasure, which gives
+    the reliability curve: a calibrated belief has the treasure in about 30% of the
+    cells shown at 0.30. The multi-class Brier score and the log-loss of the treasure
+    cell are averaged per game, and wins are broken down by grid and sensor, by number
+    of probes and by the confidence of the belief when digging.
+
+    Records are added in batches, vectorized over the records of the same grid size.
+
+    :ivar games: Number of games added.
+    :type games: int
+    :ivar counts: Number of forecasts per probability bin.
+    :type counts: numpy.ndarray
+    :ivar forecast: Sum of the forecast probabilities per bin.
+    :type forecast: numpy.ndarray
+    :ivar hits: Number of forecasts per bin where the treasure was.
+    :type hits: numpy.ndarray
+    :ivar breakdowns: {breakdown: {group: [games, wins]}}.
+    :type breakdowns: dict
+    """
+    probe_buckets = (0, 1, 2, 4, 8, 16, 32, 64, 128)
+
+    def __init__(self, bins=10):
+        self.bins = bins
+        self.games = 0
+        self.wins = 0
+        self.brier = 0.0
+        self.log_loss = 0.0
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.forecast = np.zeros(bins)
+        self.hits = np.zeros(bins, dtype=np.int64)
+        self.breakdowns = {"grid": {}, "probes": {}, "confidence": {}}
+
+    def update(self, records):
+        """
+        Adds a batch of records.
+        """
+        by_size = {}
+        for record in records:
+            by_size.setdefault(len(record["belief"]), []).append(record)
+        for group in by_size.values():
+            self._update_group(group)
+
+    def _update_group(self, records):
+        belief = np.array([record["belief"] for record in records], dtype=np.float64)
+        treasure = np.array([(record["treasure"][0] - 1) * record["columns"] + record["treasure"][1] - 1
+                             for record in records])
+        won = np.array([record["won"] for record in records], dtype=bool)
+        games = np.arange(len(records))
+
+        # Reliability: every cell is a forecast, the treasure cell is its only hit
+        bins = np.minimum((belief * self.bins).astype(np.int64), self.bins - 1)
+        self.counts += np.bincount(bins.ravel(), minlength=self.bins)
+        self.forecast += np.bincount(bins.ravel(), weights=belief.ravel(), minlength=self.bins)
+        self.hits += np.bincount(bins[games, treasure], minlength=self.bins)
+
+        at_treasure = belief[games, treasure]
+        self.brier += float(np.sum(belief ** 2) - 2 * at_treasure.sum() + len(records))
+        self.log_loss += float(-np.log(np.maximum(at_treasure, 1e-15)).sum())
+        self.games += len(records)
+        self.wins += int(won.sum())
+
+        confidence = np.minimum((belief.max(axis=1) * self.bins).astype(np.int64), self.bins - 1)
+        probes = np.searchsorted(self.probe_buckets, [len(record["probes"]) for record in records], side="right") - 1
+        for record, outcome, level, bucket in zip(records, won.tolist(), confidence.tolist(), probes.tolist()):
+            self._count("grid", f"{record['rows']}x{record['columns']} {record.get('sensor', 'classic')}", outcome)
+            self._count("probes", f">={self.probe_buckets[bucket]}", outcome)
+            self._count("confidence", f"{level / self.bins:.2f}-{(level + 1) / self.bins:.2f}", outcome)
+
+    def _count(self, breakdown, group, won):
+        counts = self.breakdowns[breakdown].setdefault(group, [0, 0])
+        counts[0] += 1
+        counts[1] += won
+
+    def reliability(self):
+        """
+        Returns the reliability curve as one (bin low, bin high, forecasts, mean
+        forecast, observed frequency) tuple per non-empty bin.
+        """
+        return [(index / self.bins, (index + 1) / self.bins, int(count),
+                 float(self.forecast[index] / count), float(self.hits[index] / count))
+                for index, count in enumerate(self.counts.tolist()) if count]
+
+    def summary(self):
+        games = max(self.games, 1)
+        return {
+            "games": self.games,
+            "win_rate": self.wins / games,
+            "brier": self.brier / games,
+            "log_loss": self.log_loss / games,
+            "reliability": [dict(zip(("low", "high", "forecasts", "mean_forecast", "observed"), row))
+                            for row in self.reliability()],
+            "breakdowns": {name: {group: {"games": count, "win_rate": wins / count}
+                                  for group, (count, wins) in sorted(groups.items(), key=_natural_order)}
+                           for name, groups in self.breakdowns.items()},
+        }
+
+
+def _natural_order(item):
+    # ">=2" before ">=16", "4x4" before "10x10"
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", item[0])]
+
+
+def calibrate(path, bins=10, batch_size=10_000):
+    """
+    Streams an archive through a `Calibration` and returns it.
+    """
+    calibration = Calibration(bins)
+    for batch in read_batches(read_records(path), batch_size):
+        calibration.update(batch)
+    return calibration
@@ -0,0 +1,276 @@
+import asyncio
+import itertools
+import json
+import sys
+import time
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+from modules.BayesianNetwork import BayesianNetwork
+from modules.ConditionalProbabilities import CPTStore
+from modules.GameEngine import GameEngine
+
+
+class Session:
+    """
+    One game hosted by the server.
+
+    :ivar engine: The game.
+    :type engine: GameEngine
+    :ivar last_used: `time.monotonic()` of the last request on the session.
+    :type last_used: float
+    """
+    def __init__(self, session_id, engine):
+        self.id = session_id
+        self.engine = engine
+        self.last_used = time.monotonic()
+
+    def memory(self):
+        """
+        Returns the approximate number of bytes held by the session, not counting the
+        sensor tables shared with the other sessions of the same grid size.
+        """
+        engine = self.engine
+        belief = engine.network.belief
+        return (belief.log_belief.nbytes + belief.probabilities.nbytes
+                + engine.log.records.nbytes + sum(snapshot.nbytes for snapshot in engine.log.snapshots.values())
+                + sys.getsizeof(engine.signals) + 2 * sys.getsizeof((0, 0)) * len(engine.signals))
+
+
+class SessionManager:
+    """
+    Keeps the sessions of the server, evicting the least recently used ones when
+    `max_sessions` is reached or when a new grid would take the cells of all the
+    sessions beyond `max_total_cells`, and the ones idle for longer than
+    `idle_timeout` seconds.
+
+    Sessions of the same grid size share one read-only `CPTStore`, dropped with the
+    last session of that size; each one only owns its belief, its evidence log and
+    its random number generator.
+
+    :ivar sessions: Sessions by id, from least to most recently used.
+    :type sessions: OrderedDict
+    :ivar tables: Shared CPTStore by (rows, columns), for the grid sizes in use.
+    :type tables: dict
+    :ivar cells: Number of cells of all the sessions.
+    :type cells: int
+    """
+    def __init__(self, max_sessions=10000, idle_timeout=600.0, max_cells=1_000_000, max_total_cells=20_000_000):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_cells = min(max_cells, max_total_cells)
+        self.max_total_cells = max_total_cells
+        self.sessions = OrderedDict()
+        self.tables = {}
+        self.cells = 0
+        self.evicted = 0
+        self._ids = itertools.count(1)
+        self._grid_sessions = Counter()
+
+    def create(self, rows, columns, seed=None):
+        if rows < 1 or columns < 1 or rows * columns > self.max_cells:
+            raise ValueError(f"Grid size must be between 1 and {self.max_cells} cells")
+        while self.sessions and (len(self.sessions) >= self.max_sessions
+                                 or self.cells + rows * columns > self.max_total_cells):
+            self._remove(next(iter(self.sessions)))
+            self.evicted += 1
+
+        cpt = self.tables.get((rows, columns))
+        if cpt is None:
+            cpt = self.tables[(rows, columns)] = CPTStore(rows, columns)
+        engine = GameEngine(rows, columns, seed, network=BayesianNetwork(rows, columns, cpt=cpt))
+        session = Session(str(next(self._ids)), engine)
+        self.sessions[session.id] = session
+        self.cells += engine.totalLocations
+        self._grid_sessions[(rows, columns)] += 1
+        return session
+
+    def _remove(self, session_id):
+        engine = self.sessions.pop(session_id).engine
+        self.cells -= engine.totalLocations
+        grid = (engine.rows, engine.columns)
+        self._grid_sessions[grid] -= 1
+        if not self._grid_sessions[grid]:
+            del self._grid_sessions[grid]
+            del self.tables[grid]
+
+    def get(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise KeyError(f"No session {session_id}")
+        session.last_used = time.monotonic()
+        self.sessions.move_to_end(session_id)
+        return session
+
+    def close(self, session_id):
+        if session_id not in self.sessions:
+            raise KeyError(f"No session {session_id}")
+        self._remove(session_id)
+
+    def evict_idle(self):
+        """
+        Removes the sessions idle for longer than `idle_timeout`.
+
+        :return: The number of sessions removed.
+        """
+        deadline = time.monotonic() - self.idle_timeout
+        evicted = 0
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if session.last_used > deadline:
+                break
+            self._remove(session.id)
+            evicted += 1
+        self.evicted += evicted
+        return evicted
+
+    def memory(self):
+        """
+        Returns the approximate bytes held by the sessions and by the shared tables,
+        including the cell index arrays they build on the first probe.
+        """
+        sessions = sum(session.memory() for session in self.sessions.values())
+        tables = sum(value.nbytes for cpt in self.tables.values()
+                     for value in vars(cpt).values() if isinstance(value, np.ndarray))
+        return {"sessions": sessions, "shared_tables": tables}
+
+
+class GameServer:
+    """
+    Asyncio server hosting many independent treasure hunts over a JSON-lines TCP
+    protocol, for players and bots on the local machine.
+
+    Every request is a JSON object on its own line with an "op" and its arguments;
+    every response is a JSON object on its own line with "ok" and either the result
+    or an "error" message:
+
+    - {"op": "new", "rows", "columns", "seed"?} -> {"session", "rows", "columns", "hp"}
+    - {"op": "detect", "session", "row", "column"} -> {"signal", "hp", "over"}
+    - {"op": "dig", "session", "row", "column"} -> {"won", "treasure"}
+    - {"op": "state", "session", "top"?} -> {"hp", "moves", "over", "won", "treasure", "top"},
+      where "top" lists the most likely [row, column, probability]
+    - {"op": "close", "session"} -> {}
+    - {"op": "stats"} -> {"sessions", "evicted", "memory"}
+
+    Requests are handled one at a time on the event loop; a belief update on the
+    grid sizes allowed by `SessionManager.max_cells` takes well under a millisecond.
+
+    :ivar manager: The hosted sessions.
+    :type manager: SessionManager
+    """
+    def __init__(self, manager=None, sweep_interval=30.0):
+        self.manager = manager if manager is not None else SessionManager()
+        self.sweep_interval = sweep_interval
+        self.requests = 0
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        sweeper = asyncio.create_task(self._sweep())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            sweeper.cancel()
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self.manager.evict_idle()
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as error:
+                    # End of the stream, possibly after a last line without a newline
+                    line = error.partial
+                except asyncio.LimitOverrunError as error:
+                    await self._skip_line(reader, error.consumed)
+                    line = None
+                if line is None:
+                    response = {"ok": False, "error": "Request line too long"}
+                elif not line:
+                    break
+                else:
+                    response = self.handle(line)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _skip_line(reader, consumed):
+        """
+        Drops the rest of a line longer than the stream limit, up to its newline, so
+        it gets a single response. `consumed` is the number of bytes buffered that
+        can be dropped, from the `LimitOverrunError`.
+        """
+        while True:
+            await reader.readexactly(consumed)
+            try:
+                await reader.readuntil(b"\n")
+                return
+            except asyncio.LimitOverrunError as error:
+                consumed = error.consumed
+
+    def handle(self, line):
+        """
+        Handles one request line and returns the response object.
+        """
+        self.requests += 1
+        try:
+            request = json.loads(line)
+            return {"ok": True, **self.dispatch(request)}
+        except (ValueError, KeyError, TypeError, OverflowError) as error:
+            message = error.args[0] if isinstance(error, KeyError) and error.args else str(error)
+            return {"ok": False, "error": message}
+
+    def dispatch(self, request):
+        match request["op"]:
+            case "new":
+                session = self.manager.create(int(request["rows"]), int(request["columns"]), request.get("seed"))
+                engine = session.engine
+                return {"session": session.id, "rows": engine.rows, "columns": engine.columns, "hp": engine.hp}
+            case "detect":
+                engine = self.manager.get(request["session"]).engine
+                signal = engine.detect(*self.cell(engine, request))
+                return {"signal": signal, "hp": engine.hp, "over": engine.isOver()}
+            case "dig":
+                engine = self.manager.get(request["session"]).engine
+                won = engine.dig(*self.cell(engine, request))
+                return {"won": won, "treasure": engine.treasure}
+            case "state":
+                engine = self.manager.get(request["session"]).engine
+                return self.state(engine, int(request.get("top", 5)))
+            case "close":
+                self.manager.close(request["session"])
+                return {}
+            case "stats":
+                return {"sessions": len(self.manager.sessions), "evicted": self.manager.evicted,
+                        "requests": self.requests, "memory": self.manager.memory()}
+            case op:
+                raise ValueError(f"Unknown op: {op}")
+
+    @staticmethod
+    def cell(engine, request):
+        row, column = int(request["row"]), int(request["column"])
+        if not (1 <= row <= engine.rows and 1 <= column <= engine.columns):
+            raise ValueError(f"({row},{column}) is outside the {engine.rows}x{engine.columns} grid")
+        return row, column
+
+    @staticmethod
+    def state(engine, top):
+        best = engine.network.belief.stats(top)["top"] if top > 0 else []
+        over = engine.isOver()
+        return {
+            "hp": engine.hp,
+            "moves": engine.moves,
+            "over": over,
+            "won": engine.isWon(),
+            "treasure": engine.treasure if over else None,
+            "top": [list(cell) for cell in best],
+        }
@@ -0,0 +1,266 @@
+import math
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+import numpy as np
+
+from modules.ConditionalProbabilities import CPTStore
+from modules.GameArea import GameArea
+from modules.GameData import GameData
+from modules.Instrumentation import instrumentation
+from modules.ProbeAdvisor import ProbeAdvisor
+from modules.TiledBelief import TiledBelief
+
+
+class HeatmapArea(GameArea):
+    """
+    HeatmapArea is an alternative renderer of the game area for large grids.
+
+    Instead of one ttk Button per cell, the whole belief is drawn as a colour-mapped
+    heatmap into a single PhotoImage shown on a tk.Canvas, and clicks are hit-tested
+    back to (row, column). The view can be zoomed with the mouse wheel and panned by
+    dragging with the middle button or with the arrow keys. Zoomed out, each pixel
+    aggregates a block of cells; zoomed in far enough, the probability of every cell
+    is written on top of it. Probed cells, the hint and the treasure use the same
+    colours as the button grid.
+
+    :ivar canvas: The canvas the grid is drawn on.
+    :type canvas: tk.Canvas
+    :ivar level: Index of the current zoom level in `levels`.
+    :type level: int
+    :ivar origin: 0-based (row, column) of the top-left visible cell.
+    :type origin: list
+    """
+    # (pixels per block, cells per block side), from zoomed out to zoomed in
+    levels = [(1, 64), (1, 32), (1, 16), (1, 8), (1, 4), (1, 2),
+              (1, 1), (2, 1), (3, 1), (4, 1), (6, 1), (8, 1), (12, 1), (16, 1), (24, 1), (32, 1), (48, 1), (64, 1)]
+    viewport = (600, 600)
+    text_min_pixels = 48
+    hint_colour = "deep sky blue"
+    treasure_colour = "gold"
+
+    def __init__(self, parent):
+        self.image = None
+        self.origin = [0, 0]
+        self._drag = None
+        super().__init__(parent)
+
+    def setup_ui(self):
+        style = ttk.Style()
+        style.configure("GameArea.TFrame", background="black",
+                        relief="solid", borderwith=2, bordercolor="aqua",)
+
+    def create_widgets(self):
+        self.canvas = tk.Canvas(self, width=self.viewport[0], height=self.viewport[1],
+                                background="black", highlightthickness=0)
+        self.image_item = self.canvas.create_image(0, 0, anchor="nw")
+
+        # Signal levels are drawn in the colours of the sensor model
+        self.signal_colours = self.engine.network.cpt.sensor.colours
+        self._colours = {name: self._rgb(name) for name in
+                         (*self.signal_colours, self.hint_colour, self.treasure_colour)}
+        self._low, self._mid, self._high = self._rgb("blue4"), self._rgb("aqua"), self._rgb("white")
+
+        # Fit the whole grid in the viewport
+        fit = min(self.viewport[0] / self.engine.columns, self.viewport[1] / self.engine.rows)
+        self.level = max([0] + [level for level, (pixels, block) in enumerate(self.levels) if pixels / block <= fit])
+
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<Motion>", lambda event: self.on_hover(self.cell_at(event.x, event.y)
+                                                                  if self.scale[1] == 1 else None))
+        self.canvas.bind("<Leave>", lambda event: self.on_hover(None))
+        self.canvas.bind("<ButtonPress-2>", self.on_drag_start)
+        self.canvas.bind("<B2-Motion>", self.on_drag)
+        self.canvas.bind("<MouseWheel>", lambda event: self.zoom(1 if event.delta > 0 else -1, event.x, event.y))
+        self.canvas.bind("<Button-4>", lambda event: self.zoom(1, event.x, event.y))
+        self.canvas.bind("<Button-5>", lambda event: self.zoom(-1, event.x, event.y))
+        for key, (d_row, d_column) in {"<Up>": (-1, 0), "<Down>": (1, 0), "<Left>": (0, -1), "<Right>": (0, 1)}.items():
+            self.canvas.bind(key, lambda event, dr=d_row, dc=d_column: self.pan_blocks(dr * 8, dc * 8))
+
+    def create_layout(self):
+        self.canvas.pack(fill="both", expand=True)
+        self.configure(style="GameArea.TFrame")
+        self.render()
+
+    def _rgb(self, colour):
+        return np.array([value // 256 for value in self.winfo_rgb(colour)], dtype=np.uint8)
+
+    @property
+    def scale(self):
+        """
+        Returns (pixels per block, cells per block side) at the current zoom level.
+        """
+        return self.levels[self.level]
+
+    def visible_cells(self):
+        """
+        Returns the 0-based, end-exclusive (row0, row1, column0, column1) range of visible cells.
+        """
+        pixels, block = self.scale
+        row0, column0 = self.origin
+        row1 = min(self.engine.rows, row0 + math.ceil(self.viewport[1] / pixels) * block)
+        column1 = min(self.engine.columns, column0 + math.ceil(self.viewport[0] / pixels) * block)
+        return row0, row1, column0, column1
+
+    def belief_window(self, row0, row1, column0, column1, block=1):
+        """
+        Returns the belief over the visible cells, summed over block x block squares.
+        Only this window is read from the belief, which matters for tiled beliefs.
+        """
+        return self.engine.network.belief.window(row0, row1, column0, column1, block)
+
+    def render(self):
+        """
+        Redraws the visible part of the grid.
+        """
+        pixels, block = self.scale
+        row0, row1, column0, column1 = self.visible_cells()
+        # Level of detail: the belief is summed over block x block squares
+        window = self.belief_window(row0, row1, column0, column1, block)
+
+        peak = window.max()
+        shade = np.sqrt(window / peak) if peak > 0 else window
+        rgb = self._colour_map(shade)
+
+        def paint(row, column, colour):
+            r, c = (row - 1 - row0) // block, (column - 1 - column0) // block
+            if 0 <= r < rgb.shape[0] and 0 <= c < rgb.shape[1]:
+                rgb[r, c] = self._colours[colour]
+
+        for (row, column), signal in self.engine.signals.items():
+            paint(row, column, self.signal_colours[self.engine.network.cpt.signal_index[signal]])
+        if self.hint is not None:
+            paint(*self.hint, self.hint_colour)
+        if self.engine.isOver():
+            paint(*self.engine.treasure, self.treasure_colour)
+
+        if pixels > 1:
+            rgb = rgb.repeat(pixels, axis=0).repeat(pixels, axis=1)
+        header = f"P6 {rgb.shape[1]} {rgb.shape[0]} 255\n".encode()
+        self.image = tk.PhotoImage(master=self, data=header + rgb.tobytes(), format="PPM")
+        self.canvas.itemconfig(self.image_item, image=self.image)
+
+        self.canvas.delete("prob")
+        if block == 1 and pixels >= self.text_min_pixels:
+            for r, (values, shades) in enumerate(zip(window.tolist(), shade.tolist())):
+                for c, (prob, level) in enumerate(zip(values, shades)):
+                    self.canvas.create_text((c + 0.5) * pixels, (r + 0.5) * pixels, tags="prob",
+                                            text=GameData.getProbText(prob),
+                                            fill="black" if level >= 0.5 else "white",
+                                            font=('Helvetica', 10, 'bold'))
+
+    def _colour_map(self, values):
+        values = values[..., None]
+        low_half = self._low + (self._mid.astype(float) - self._low) * np.clip(values * 2, 0, 1)
+        high_half = self._mid + (self._high.astype(float) - self._mid) * np.clip(values * 2 - 1, 0, 1)
+        return np.where(values < 0.5, low_half, high_half).astype(np.uint8)
+
+    def cell_at(self, x, y):
+        """
+        Returns the 1-based (row, column) under the canvas coordinates (x, y), or None.
+        """
+        pixels, block = self.scale
+        row = self.origin[0] + int(y // pixels) * block
+        column = self.origin[1] + int(x // pixels) * block
+        if 0 <= row < self.engine.rows and 0 <= column < self.engine.columns:
+            return row + 1, column + 1
+        return None
+
+    def on_click(self, event):
+        self.canvas.focus_set()
+        cell = self.cell_at(event.x, event.y)
+        if cell is None:
+            return
+        if self.scale[1] > 1:
+            # Aggregated blocks are too coarse to probe, zoom in on them instead
+            self.zoom(1, event.x, event.y)
+        else:
+            self.detect_or_dig(*cell)
+
+    def zoom(self, steps, x, y):
+        level = min(max(self.level + steps, 0), len(self.levels) - 1)
+        if level == self.level:
+            return
+        # Keep the cell under the cursor in place
+        pixels, block = self.scale
+        anchor_row = self.origin[0] + y / pixels * block
+        anchor_column = self.origin[1] + x / pixels * block
+        self.level = level
+        pixels, block = self.scale
+        self.origin = [int(anchor_row - y / pixels * block), int(anchor_column - x / pixels * block)]
+        self.pan_blocks(0, 0)
+
+    def on_drag_start(self, event):
+        self._drag = (event.x, event.y)
+
+    def on_drag(self, event):
+        pixels, _ = self.scale
+        d_column, d_row = (self._drag[0] - event.x) // pixels, (self._drag[1] - event.y) // pixels
+        if d_row or d_column:
+            self._drag = (self._drag[0] - d_column * pixels, self._drag[1] - d_row * pixels)
+            self.pan_blocks(d_row, d_column)
+
+    def pan_blocks(self, d_row, d_column):
+        """
+        Moves the view by whole blocks of the current zoom level, keeping it inside the grid.
+        """
+        pixels, block = self.scale
+        visible_rows = math.ceil(self.viewport[1] / pixels) * block
+        visible_columns = math.ceil(self.viewport[0] / pixels) * block
+        self.origin = [
+            min(max(self.origin[0] + d_row * block, 0), max(self.engine.rows - visible_rows, 0)),
+            min(max(self.origin[1] + d_column * block, 0), max(self.engine.columns - visible_columns, 0)),
+        ]
+        self.updateButtonsProbabilities()
+
+    def flush_probabilities(self):
+        if self._flush_id is not None:
+            self.after_cancel(self._flush_id)
+            self._flush_id = None
+        with instrumentation.span("refresh"):
+            self.render()
+        self.touched = 1
+        return self.touched
+
+    def show_pending(self, row, column, pending=True):
+        # Drawing the cell would read the belief the worker is writing; the busy cursor shows instead
+        pass
+
+    def update_button(self, row, column, signal):
+        self.updateButtonsProbabilities()
+
+    def sync_signals(self):
+        self.clear_hint()
+        self.updateButtonsProbabilities()
+
+    def show_hint(self):
+        if self.worker.busy:
+            return
+        belief = self.engine.network.belief
+        if not isinstance(belief, TiledBelief):
+            self.hint = self.suggest()
+        elif self.scale[1] > 1:
+            self.hint = None
+            messagebox.showinfo(title="Hint", message="This map is too large to search at once:\n"
+                                                      "zoom in to search the cells in view for a hint")
+        else:
+            # The whole belief may not fit in memory: look for the hint among the visible cells
+            row0, row1, column0, column1 = self.visible_cells()
+            window = self.belief_window(row0, row1, column0, column1)
+            cpt = CPTStore(row1 - row0, column1 - column0, belief.cpt.sensor)
+            probed = [(row - row0, column - column0) for row, column in self.engine.signals
+                      if row0 < row <= row1 and column0 < column <= column1]
+            mass = window.sum()
+            # No hint when the posterior left the visible cells, whose mass can underflow to 0
+            hint = ProbeAdvisor(cpt).best_probe(window / mass, probed) if mass > 0 else None
+            self.hint = None if hint is None else (hint[0] + row0, hint[1] + column0)
+            if hint is None:
+                messagebox.showinfo(title="Hint", message="No hint among the cells in view:\n"
+                                                          "move to where the treasure is more likely")
+        self.updateButtonsProbabilities()
+
+    def clear_hint(self):
+        self.hint = None
+
+    def show_treasure(self):
+        self.updateButtonsProbabilities()
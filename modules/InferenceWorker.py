@@ -0,0 +1,94 @@
+import queue
+import threading
+
+
+class InferenceWorker:
+    """
+    Runs the probes and digs of a game on a background thread, so the interface
+    thread never waits for a belief update.
+
+    Actions are submitted in click order. The worker takes them in the same order and
+    coalesces the probes queued while it was busy into one `detect_batch` call: one
+    batched posterior update, and one redraw once the result is collected. Engine
+    events are not sent from the worker: `collect`, called from the interface thread,
+    returns the finished actions, and the caller sends the events from there.
+
+    Only the worker touches the engine while `busy`; the interface must not read or
+    change the game until the pending actions are collected.
+
+    :ivar engine: The game being played.
+    :type engine: GameEngine
+    :ivar pending: Number of actions submitted and not collected yet.
+    :type pending: int
+    :ivar listeners: Called as `listener(action)` from the worker thread after every
+        batch, before it is returned by `collect`, while the worker still owns the engine.
+    :type listeners: list
+    """
+    def __init__(self, engine):
+        self.engine = engine
+        self.pending = 0
+        self.listeners = []
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="inference", daemon=True)
+        self._thread.start()
+
+    @property
+    def busy(self):
+        return self.pending > 0
+
+    def submit(self, action, row, column):
+        """
+        Queues a "detect" or "dig" at (row, column).
+        """
+        self.pending += 1
+        self._requests.put((action, row, column))
+
+    def collect(self):
+        """
+        Returns the finished actions, oldest first, as (action, count, result, error)
+        tuples: `count` actions were handled together, `result` is the return value of
+        `detect_batch` or `dig`, and `error` the ValueError raised, if any.
+        """
+        finished = []
+        while True:
+            try:
+                finished.append(self._results.get_nowait())
+            except queue.Empty:
+                break
+            self.pending -= finished[-1][1]
+        return finished
+
+    def stop(self):
+        self._requests.put(None)
+
+    def _run(self):
+        request = self._requests.get()
+        while request is not None:
+            cells = []
+            # Coalesce consecutive probes, up to the first dig or the end of the queue
+            while request and request[0] == "detect":
+                cells.append(request[1:])
+                try:
+                    request = self._requests.get_nowait()
+                except queue.Empty:
+                    request = ()
+
+            if cells:
+                self._finish("detect", len(cells), self._call(self.engine.detect_batch, cells, notify=False))
+            if request:
+                self._finish("dig", 1, self._call(self.engine.dig, *request[1:], notify=False))
+            if request is not None:
+                request = self._requests.get()
+
+    def _finish(self, action, count, result):
+        for listener in self.listeners:
+            listener(action)
+        self._results.put((action, count, *result))
+
+    @staticmethod
+    def _call(function, *args, **kwargs):
+        try:
+            return function(*args, **kwargs), None
+        except ValueError as error:
+            return None, error
@@ -0,0 +1,163 @@
+import json
+import os
+import time
+
+import numpy as np
+
+
+class Instrumentation:
+    """
+    Low-overhead timing and counter instrumentation of the game's hot paths.
+
+    Timings are recorded as (phase, start, duration) entries in fixed-size ring
+    buffers, so recording never allocates and only the latest `capacity` entries are
+    kept. Recording can be switched on and off at runtime; while it is off, `span`
+    returns a shared no-op context manager and `record` and `count` return at once.
+    The buffers can be summarized per phase (count, p50, p95, max), dumped to JSON,
+    or exported in the Chrome trace event format, which chrome://tracing and
+    Perfetto open.
+
+    A single process-wide instance, `instrumentation`, is shared by the engine and
+    the interface, and outlives the games.
+
+    :ivar enabled: Whether timings and counters are being recorded.
+    :type enabled: bool
+    :ivar capacity: Number of timings kept.
+    :type capacity: int
+    :ivar counters: Event counters, by name.
+    :type counters: dict
+    """
+    def __init__(self, capacity=8192, enabled=False):
+        self.enabled = enabled
+        self.capacity = capacity
+        self.phases = []
+        self._phase_ids = {}
+        self._phase = np.zeros(capacity, dtype=np.int32)
+        self._start = np.zeros(capacity)
+        self._duration = np.zeros(capacity)
+        self._epoch = time.perf_counter()
+        self.clear()
+
+    def clear(self):
+        self.recorded = 0
+        self.counters = {}
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def span(self, phase):
+        """
+        Returns a context manager timing the code it wraps as `phase`.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, phase)
+
+    def record(self, phase, start, end=None):
+        """
+        Records a timing of `phase` from `start` to `end` (now by default), both from
+        `time.perf_counter()`.
+        """
+        if not self.enabled:
+            return
+        if end is None:
+            end = time.perf_counter()
+        phase_id = self._phase_ids.get(phase)
+        if phase_id is None:
+            phase_id = self._phase_ids[phase] = len(self.phases)
+            self.phases.append(phase)
+
+        slot = self.recorded % self.capacity
+        self._phase[slot] = phase_id
+        self._start[slot] = start - self._epoch
+        self._duration[slot] = end - start
+        self.recorded += 1
+
+    def count(self, counter, n=1):
+        if self.enabled:
+            self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def _entries(self):
+        # The valid part of the ring buffers, oldest first
+        kept = min(self.recorded, self.capacity)
+        order = (np.arange(kept) + self.recorded - kept) % self.capacity
+        return self._phase[order], self._start[order], self._duration[order]
+
+    def stats(self):
+        """
+        Returns {phase: {"count", "p50", "p95", "max"}} over the kept timings, in seconds.
+        """
+        phases, _, durations = self._entries()
+        stats = {}
+        for phase_id, phase in enumerate(self.phases):
+            samples = durations[phases == phase_id]
+            if len(samples):
+                p50, p95 = np.percentile(samples, [50, 95])
+                stats[phase] = {"count": len(samples), "p50": float(p50), "p95": float(p95),
+                                "max": float(samples.max())}
+        return stats
+
+    def to_json(self, path=None):
+        """
+        Returns the kept timings, their summary and the counters as a JSON-serializable
+        dict, and writes it to `path` if given.
+        """
+        phases, starts, durations = self._entries()
+        data = {
+            "recorded": self.recorded,
+            "stats": self.stats(),
+            "counters": dict(self.counters),
+            "timings": [{"phase": self.phases[phase], "start": start, "duration": duration}
+                        for phase, start, duration in zip(phases.tolist(), starts.tolist(), durations.tolist())],
+        }
+        if path is not None:
+            with open(path, "w") as file:
+                json.dump(data, file, indent=2)
+        return data
+
+    def to_chrome_trace(self, path):
+        """
+        Writes the kept timings, and the counters, as Chrome trace events.
+        """
+        phases, starts, durations = self._entries()
+        pid = os.getpid()
+        events = [{"name": self.phases[phase], "ph": "X", "ts": start * 1e6, "dur": duration * 1e6,
+                   "pid": pid, "tid": 0}
+                  for phase, start, duration in zip(phases.tolist(), starts.tolist(), durations.tolist())]
+        if self.counters:
+            end = float((starts + durations).max()) if len(starts) else 0.0
+            events.append({"name": "counters", "ph": "C", "ts": end * 1e6, "pid": pid,
+                           "args": dict(self.counters)})
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+class _Span:
+    __slots__ = ("_instrumentation", "_phase", "_start")
+
+    def __init__(self, instrumentation, phase):
+        self._instrumentation = instrumentation
+        self._phase = phase
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._instrumentation.record(self._phase, self._start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+instrumentation = Instrumentation()
@@ -0,0 +1,115 @@
+import numpy as np
+
+from modules.PosteriorCache import PosteriorCache
+from modules.ProbeAdvisor import ProbeAdvisor
+
+
+class LookaheadSolver:
+    """
+    Plans the next move by expectimax over the signals of the next `depth` probes.
+
+    A node of the search is the evidence gathered so far and the number of probes
+    the remaining HP still allows. Its value is the best of digging now, which scores
+    the win probability (the largest posterior) times the reward for winning, and of
+    every candidate probe, which scores the expected value of the node after reading
+    each signal, weighted by its predictive probability. Winning is rewarded with
+    1 + `hp_weight` times the fraction of HP left, so every probe trades its HP cost
+    against the win probability it buys. Past the horizon, the node digs.
+
+    Only the `width` unprobed cells with the highest expected information gain are
+    expanded at every node. Posteriors and node values go through a shared
+    `PosteriorCache`, keyed on the evidence multiset, so the probes of a plan
+    explored in different orders, and the positions reached again in later turns
+    and later games, are computed only once. The root posterior is the belief of the
+    engine, or is replayed from its probes when the belief is not exact (see
+    `BayesianNetwork.belief_is_exact`).
+
+    :ivar cpt: The CPTStore of the grid being played.
+    :type cpt: CPTStore
+    :ivar depth: Number of probes planned ahead.
+    :type depth: int
+    :ivar width: Number of candidate probes expanded at every node.
+    :type width: int
+    :ivar hp_weight: Reward of winning with full HP, on top of the reward of 1 for winning.
+    :type hp_weight: float
+    :ivar cache: Transposition table of posteriors and node values.
+    :type cache: PosteriorCache
+    """
+    def __init__(self, cpt, depth=2, width=6, hp_weight=1.0, cache=None):
+        self.cpt = cpt
+        self.depth = depth
+        self.width = width
+        self.hp_weight = hp_weight
+        self.cache = cache if cache is not None else PosteriorCache(cpt)
+        self.advisor = ProbeAdvisor(cpt)
+
+    def evidence_key(self, engine):
+        """
+        Returns the cache key of the probes made so far in `engine`.
+        """
+        return PosteriorCache.key((row, column, self.cpt.signal_index[signal])
+                                  for (row, column), signal in engine.signals.items())
+
+    @staticmethod
+    def probe_budget(engine):
+        """
+        Returns the number of probes the remaining HP allows without dying.
+        """
+        return max(int(round(engine.hp / engine.pointDmg)) - 1, 0)
+
+    def plan(self, engine):
+        """
+        Returns the best move from the current state of `engine` as
+        (action, row, column, value), where action is "detect" or "dig".
+        """
+        key = self.evidence_key(engine)
+        if key not in self.cache and engine.network.belief_is_exact:
+            self.cache.put(key, np.array(engine.network.belief.probabilities, dtype=np.float64))
+        value, index = self._search(key, self.probe_budget(engine), self.depth)
+        action = "detect" if index is not None else "dig"
+        if index is None:
+            index = int(self.cache.posterior(key).argmax())
+        return action, index // self.cpt.columns + 1, index % self.cpt.columns + 1, value
+
+    def _reward(self, budget):
+        # Digging with `budget` probes left means winning with (budget + 1) probes' worth of HP
+        return 1 + self.hp_weight * (budget + 1) / self.cpt.total
+
+    def _search(self, key, budget, depth):
+        """
+        Returns (value, flat index of the best probe or None to dig) of a node.
+        """
+        probabilities = self.cache.posterior(key)
+        dig = float(probabilities.max()) * self._reward(budget)
+        if depth == 0 or budget == 0 or len(key) == self.cpt.total:
+            return dig, None
+
+        memo = (key, budget, depth)
+        cached = self.cache.get_value(memo)
+        if cached is not None:
+            return cached
+
+        gain = self.advisor.information_gain(probabilities)
+        for row, column, _ in key:
+            gain[self.cpt.index(row, column)] = -np.inf
+        width = min(self.width, self.cpt.total - len(key))
+        candidates = np.argpartition(gain, len(gain) - width)[len(gain) - width:]
+
+        best = (dig, None)
+        for index in candidates.tolist():
+            row, column = index // self.cpt.columns + 1, index % self.cpt.columns + 1
+            likelihood = self.cpt.table[self.cpt.distance_class(row, column)]
+            predictive = (probabilities @ likelihood).tolist()
+            value = 0.0
+            for level, probability in enumerate(predictive):
+                if probability <= 0:
+                    continue
+                child = PosteriorCache.extend(key, row, column, level)
+                if child not in self.cache:
+                    self.cache.put(child, probabilities * likelihood[:, level] / probability)
+                value += probability * self._search(child, budget - 1, depth - 1)[0]
+            if value > best[0]:
+                best = (value, index)
+
+        self.cache.put_value(memo, best)
+        return best
@@ -5,15 +5,22 @@ import tkinter.font as font
 
 from modules.widgets.Action import Action
 from modules.widgets.HpBar import HpBar
+from modules.widgets.StatsPanel import StatsPanel
 
 
 class MenuBar(ttk.Frame):
     """
     MenuBar class defines a side menu with buttons and widgets for controlling the application.
-    Includes a mode toggle button, an HP bar, and Restart/Quit buttons.
+    Includes a mode toggle button, an HP bar, Hint/Undo buttons, the belief HUD, the
+    preview of the cell under the cursor, a collapsible stats panel and Restart/Quit buttons.
     """
     mode_button: Action
     hpbar: HpBar
+    stats: StatsPanel
+    hint: ttk.Button
+    undo: ttk.Button
+    hud: ttk.Label
+    preview: ttk.Label
     quit_restart_frame: ttk.Frame
     restart: ttk.Button
     quit: ttk.Button
@@ -45,14 +52,27 @@ class MenuBar(ttk.Frame):
             foreground=[("active", "black")],
         )
 
+        # Belief HUD and preview of the hovered cell
+        style.configure('Preview.MenuBar.TLabel', foreground="white", background="black",
+                        font=("Courier", 9))
+
 
     def create_widgets(self, parent):
         self.mode_button = Action(self)
         self.hpbar = HpBar(self)
+        self.hint = ttk.Button(self, text="Hint",
+                               command=lambda: parent.gamebar.show_hint(),
+                               style="QRButton.MenuBar.TButton")
+        self.undo = ttk.Button(self, text="Undo",
+                               command=lambda: parent.gamebar.undo(),
+                               style="QRButton.MenuBar.TButton")
+        self.hud = ttk.Label(self, justify="left", style='Preview.MenuBar.TLabel')
+        self.preview = ttk.Label(self, justify="left", style='Preview.MenuBar.TLabel')
+        self.stats = StatsPanel(self)
 
         self.quit_restart_frame = ttk.Frame(self, style='QRFrame.MenuBar.TFrame')
         self.restart = ttk.Button(self.quit_restart_frame, text="Restart",
-                                  command=lambda: self.master.restart(),
+                                  command=lambda: self.master.reset(),
                                   style="QRButton.MenuBar.TButton")
         self.quit = ttk.Button(self.quit_restart_frame, text="Quit",
                                command = lambda: parent.quit(),
@@ -61,6 +81,11 @@ class MenuBar(ttk.Frame):
     def create_layout(self):
         self.mode_button.pack(padx=20, pady=20)
         self.hpbar.pack(padx=20, pady=20, fill='y')
+        self.hint.pack(pady=10)
+        self.undo.pack(pady=10)
+        self.hud.pack(pady=10, fill='x')
+        self.preview.pack(pady=10, fill='x')
+        self.stats.pack(pady=10, fill='x')
         self.restart.pack(side='left', padx=5)
         self.quit.pack(side='left', padx=5)
         self.quit_restart_frame.pack(pady=10)
@@ -0,0 +1,118 @@
+import random
+
+import numpy as np
+
+from modules.LookaheadSolver import LookaheadSolver
+from modules.ProbeAdvisor import ProbeAdvisor
+
+
+class Policy:
+    """
+    Base class for automated players.
+
+    A policy looks at a `GameEngine` and decides the next action, returned as
+    ("detect", row, column) or ("dig", row, column). The shared dig rule digs at the
+    most likely cell once its posterior reaches `dig_threshold`, when the next probe
+    would use up the remaining HP (counted in whole probes, as the HP is lowered by
+    repeated float subtractions), or when every cell has been probed. Subclasses
+    only choose which cell to probe.
+
+    :ivar dig_threshold: Posterior probability at which the policy stops probing and digs.
+    :type dig_threshold: float
+    :ivar rng: Random number generator for the policy's own choices.
+    :type rng: random.Random
+    """
+    name = None
+
+    def __init__(self, dig_threshold=0.9, seed=None):
+        self.dig_threshold = dig_threshold
+        self.rng = random.Random(seed)
+
+    def seed(self, seed):
+        self.rng.seed(seed)
+
+    def choose(self, engine):
+        belief = engine.network.belief.probabilities
+        best = int(belief.argmax())
+        if (belief[best] >= self.dig_threshold
+                or LookaheadSolver.probe_budget(engine) == 0
+                or len(engine.signals) == engine.totalLocations):
+            return "dig", best // engine.columns + 1, best % engine.columns + 1
+
+        index = self.choose_probe(engine, belief, self.unprobed(engine))
+        return "detect", index // engine.columns + 1, index % engine.columns + 1
+
+    @staticmethod
+    def unprobed(engine):
+        """
+        Returns a boolean mask of the cells that can still be probed, in row-major order.
+        """
+        mask = np.ones(engine.totalLocations, dtype=bool)
+        for row, column in engine.signals:
+            mask[(row - 1) * engine.columns + (column - 1)] = False
+        return mask
+
+    def choose_probe(self, engine, belief, unprobed):
+        raise NotImplementedError
+
+
+class RandomPolicy(Policy):
+    """
+    Probes uniformly at random among the cells not probed yet.
+    """
+    name = "random"
+
+    def choose_probe(self, engine, belief, unprobed):
+        return self.rng.choice(np.flatnonzero(unprobed).tolist())
+
+
+class MaxPosteriorPolicy(Policy):
+    """
+    Probes the not yet probed cell with the highest posterior probability.
+    """
+    name = "max-posterior"
+
+    def choose_probe(self, engine, belief, unprobed):
+        return int(np.where(unprobed, belief, -1.0).argmax())
+
+
+class EntropyGreedyPolicy(Policy):
+    """
+    Probes the not yet probed cell that minimizes the expected entropy of the
+    posterior after reading its signal, i.e. the one with the highest expected
+    information gain.
+    """
+    name = "entropy-greedy"
+
+    def __init__(self, dig_threshold=0.9, seed=None):
+        super().__init__(dig_threshold, seed)
+        self.advisor = None
+
+    def choose_probe(self, engine, belief, unprobed):
+        if self.advisor is None or self.advisor.cpt is not engine.network.cpt:
+            self.advisor = ProbeAdvisor(engine.network.cpt)
+        gain = self.advisor.information_gain(belief)
+        return int(np.where(unprobed, gain, -np.inf).argmax())
+
+
+class LookaheadPolicy(Policy):
+    """
+    Plays the moves of a `LookaheadSolver`, which decides itself when digging beats
+    probing further, so `dig_threshold` is not used. The solver, and its cache of
+    posteriors, is kept across the games played on the same grid.
+    """
+    name = "lookahead"
+
+    def __init__(self, dig_threshold=0.9, seed=None, depth=2, width=6, hp_weight=1.0):
+        super().__init__(dig_threshold, seed)
+        self.options = {"depth": depth, "width": width, "hp_weight": hp_weight}
+        self.solver = None
+
+    def choose(self, engine):
+        if self.solver is None or self.solver.cpt is not engine.network.cpt:
+            self.solver = LookaheadSolver(engine.network.cpt, **self.options)
+        action, row, column, _ = self.solver.plan(engine)
+        return action, row, column
+
+
+POLICIES = {policy.name: policy for policy in (RandomPolicy, MaxPosteriorPolicy, EntropyGreedyPolicy, LookaheadPolicy)}
@@ -0,0 +1,132 @@
+from bisect import insort
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PosteriorCache:
+    """
+    Transposition table of posteriors over the treasure position, keyed by the
+    evidence they were computed from.
+
+    Evidence updates commute: the posterior after a set of probes does not depend on
+    the order they were made in, and starting from the uniform prior it only depends
+    on the probes and their signals. Posteriors are therefore keyed by the sorted
+    tuple of (row, column, signal level) items, so every ordering of the same probes
+    shares one entry. The cache is bound to one `CPTStore` and can be shared by the
+    nodes of a search tree and across games on the same grid.
+
+    Memory is bounded: once the posteriors take more than `max_bytes`, the least
+    recently used ones are evicted. Search values, keyed by an evidence key and any
+    extra state, are kept in a second LRU table of at most `max_values` entries.
+
+    :ivar cpt: The CPTStore the posteriors are computed with.
+    :type cpt: CPTStore
+    :ivar nbytes: Bytes held by the cached posteriors.
+    :type nbytes: int
+    :ivar hits: Number of lookups that found their posterior or value.
+    :type hits: int
+    :ivar misses: Number of lookups that did not.
+    :type misses: int
+    """
+    def __init__(self, cpt, max_bytes=64 << 20, max_values=200_000):
+        self.cpt = cpt
+        self.max_bytes = max_bytes
+        self.max_values = max_values
+        self._posteriors = OrderedDict()
+        self._values = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._posteriors)
+
+    def __contains__(self, key):
+        return key in self._posteriors
+
+    @staticmethod
+    def key(evidences):
+        """
+        Returns the canonical key of (row, column, signal level) evidence items.
+        """
+        return tuple(sorted(evidences))
+
+    @staticmethod
+    def extend(key, row, column, level):
+        """
+        Returns the key of the evidence of `key` plus one (row, column, signal level) item.
+        """
+        items = list(key)
+        insort(items, (row, column, level))
+        return tuple(items)
+
+    def get(self, key):
+        """
+        Returns the cached posterior probabilities for `key`, or None.
+        """
+        probabilities = self._posteriors.get(key)
+        if probabilities is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._posteriors.move_to_end(key)
+        return probabilities
+
+    def put(self, key, probabilities):
+        """
+        Caches the posterior probabilities for `key`. The array is kept, read-only,
+        and must not be modified afterwards.
+        """
+        probabilities.flags.writeable = False
+        previous = self._posteriors.pop(key, None)
+        if previous is not None:
+            self.nbytes -= previous.nbytes
+        self._posteriors[key] = probabilities
+        self.nbytes += probabilities.nbytes
+        while self.nbytes > self.max_bytes and len(self._posteriors) > 1:
+            _, evicted = self._posteriors.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def posterior(self, key):
+        """
+        Returns the posterior probabilities for `key`, computing them from the longest
+        cached prefix of the key (or from the uniform prior) and caching every step.
+        """
+        probabilities = self.get(key)
+        if probabilities is not None:
+            return probabilities
+
+        cached = max(len(key) - 1, 0)
+        while cached > 0 and key[:cached] not in self._posteriors:
+            cached -= 1
+        if cached:
+            probabilities = self.get(key[:cached])
+        else:
+            probabilities = np.full(self.cpt.total, 1 / self.cpt.total)
+        for end in range(cached + 1, len(key) + 1):
+            row, column, level = key[end - 1]
+            probabilities = probabilities * self.cpt.table[self.cpt.distance_class(row, column), level]
+            probabilities /= probabilities.sum()
+            self.put(key[:end], probabilities)
+        return probabilities
+
+    def get_value(self, key):
+        value = self._values.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._values.move_to_end(key)
+        return value
+
+    def put_value(self, key, value):
+        self._values[key] = value
+        self._values.move_to_end(key)
+        if len(self._values) > self.max_values:
+            self._values.popitem(last=False)
+
+    def clear(self):
+        self._posteriors.clear()
+        self._values.clear()
+        self.nbytes = 0
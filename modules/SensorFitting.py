@@ -0,0 +1,180 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import numpy as np
+
+from modules.GameRecords import read_records
+from modules.SensorModels import METRICS, SensorModel
+
+
+class ProbeObservations:
+    """
+    The probes of a corpus of games, in compact arrays grouped by grid size, so the
+    corpus is parsed once and every EM iteration runs over arrays.
+
+    `grids` maps (rows, columns) to a dict of int arrays: "row", "column" (0-based)
+    and "level" of every probe, "game" (index of its game within the grid, probes of
+    a game being contiguous) and "treasure" (flat index of the treasure of every game).
+
+    :ivar grids: Observations of every grid size.
+    :type grids: dict
+    :ivar games: Number of games with at least one probe.
+    :type games: int
+    :ivar probes: Number of probes.
+    :type probes: int
+    """
+    def __init__(self, records, sensor=None):
+        lists = {}
+        for record in records:
+            if sensor is not None and record.get("sensor", "classic") != sensor or not record["probes"]:
+                continue
+            grid = lists.setdefault((record["rows"], record["columns"]), ([], [], []))
+            grid[0].extend(record["probes"])
+            grid[1].append(len(record["probes"]))
+            grid[2].append((record["treasure"][0] - 1) * record["columns"] + record["treasure"][1] - 1)
+
+        self.grids = {}
+        for grid, (probes, counts, treasure) in lists.items():
+            probes = np.array(probes, dtype=np.int64).reshape(-1, 3)
+            self.grids[grid] = {
+                "row": probes[:, 0] - 1,
+                "column": probes[:, 1] - 1,
+                "level": probes[:, 2],
+                "game": np.repeat(np.arange(len(counts)), counts),
+                "treasure": np.array(treasure, dtype=np.int64),
+            }
+        self.games = sum(len(grid["treasure"]) for grid in self.grids.values())
+        self.probes = sum(len(grid["level"]) for grid in self.grids.values())
+
+    def split(self, parts):
+        """
+        Yields (grid, observations) work units: every grid split into at most `parts`
+        runs of whole games.
+        """
+        for grid, observations in self.grids.items():
+            games = len(observations["treasure"])
+            bounds = np.linspace(0, games, min(parts, games) + 1).astype(np.int64)
+            starts = np.searchsorted(observations["game"], bounds)
+            for first, last, start, stop in zip(bounds[:-1], bounds[1:], starts[:-1], starts[1:]):
+                part = {key: values[start:stop] for key, values in observations.items() if key != "treasure"}
+                part["game"] = part["game"] - first
+                part["treasure"] = observations["treasure"][first:last]
+                yield grid, part
+
+
+def expected_counts(grid, observations, table, metric, latent=False, max_cells=1 << 22):
+    """
+    E-step over the probes of one grid size.
+
+    With the treasure known, every probe counts once for the distance class of the
+    treasure from it. With `latent`, the treasure is unknown: the posterior of every
+    game over the treasure position is computed from all its probes under `table`
+    (with a uniform prior), and every probe counts for the distance class of every
+    cell, weighted by the posterior of that cell. Games are processed in runs of at
+    most `max_cells` (probe, cell) pairs, which bounds the memory used.
+
+    :return: The expected counts of every (distance class, signal level), and the
+        log-likelihood of the signals under `table`.
+    """
+    rows, columns = grid
+    total = rows * columns
+    classes, levels = table.shape
+    log_table = np.log(np.maximum(table, 1e-300)).ravel()
+
+    # Distance class of every (row, column) offset, as in BatchEnv
+    width = 2 * columns - 1
+    d_rows = np.arange(-(rows - 1), rows)[:, None]
+    d_columns = np.arange(-(columns - 1), columns)
+    offset_class = np.minimum(METRICS[metric](d_rows, d_columns), classes - 1).ravel()
+    base = (rows - 1) * width + (columns - 1)
+    probe_offset = observations["row"] * width + observations["column"]
+    level = observations["level"]
+    counts = np.zeros(classes * levels)
+
+    if not latent:
+        treasure_rows, treasure_columns = np.divmod(observations["treasure"][observations["game"]], columns)
+        index = offset_class[base + probe_offset - (treasure_rows * width + treasure_columns)] * levels + level
+        counts += np.bincount(index, minlength=classes * levels)
+        return counts.reshape(classes, levels), float(log_table[index].sum())
+
+    cell_rows, cell_columns = np.divmod(np.arange(total), columns)
+    cell_offset = cell_rows * width + cell_columns
+    game = observations["game"]
+    starts = np.flatnonzero(np.r_[True, game[1:] != game[:-1]])
+    ends = np.r_[starts[1:], len(game)]
+    log_likelihood = 0.0
+    first = 0
+    while first < len(starts):
+        # Whole games, as many as fit in max_cells
+        last = max(int(np.searchsorted(ends - (starts[first]), max_cells // total, side="right")), first + 1)
+        start, stop = starts[first], ends[last - 1]
+        index = offset_class[base + probe_offset[start:stop, None] - cell_offset] * levels + level[start:stop, None]
+        probe_log = log_table[index]
+        game_log = np.add.reduceat(probe_log, starts[first:last] - start, axis=0)
+        shift = game_log.max(axis=1, keepdims=True)
+        posterior = np.exp(game_log - shift)
+        sums = posterior.sum(axis=1, keepdims=True)
+        posterior /= sums
+        log_likelihood += float((shift + np.log(sums)).sum() - (last - first) * np.log(total))
+        weights = posterior[game[start:stop] - game[start]]
+        counts += np.bincount(index.ravel(), weights=weights.ravel(), minlength=classes * levels)
+        first = last
+    return counts.reshape(classes, levels), log_likelihood
+
+
+def _expected_counts(arguments):
+    return expected_counts(*arguments)
+
+
+def fit_sensor(observations, initial, name="fitted", metric=None, latent=False, iterations=100,
+               tolerance=1e-7, prior=1.0, workers=1, max_cells=1 << 22, progress=None):
+    """
+    Fits the table of P(signal | distance) of a sensor model to observed probes.
+
+    With known treasures the maximum likelihood table is the normalized counts, found
+    in one pass. With `latent`, EM alternates the E-step of `expected_counts` with
+    normalizing the expected counts, starting from the table of `initial`, until the
+    log-likelihood improves by less than `tolerance` (relatively) or after
+    `iterations` steps. `prior` pseudo-counts are added to every entry, which keeps
+    distance classes without data uniform and no probability at zero. E-steps are
+    spread over `workers` processes, split by games.
+
+    :param initial: Sensor model giving the metric, the table shape, the colours and,
+        with `latent`, the starting table.
+    :param progress: Called as `progress(iteration, log_likelihood)` after every E-step.
+    :return: The fitted SensorModel and the log-likelihood after every E-step.
+    """
+    metric = metric or initial.metric
+    table = np.array(initial.table)
+    if observations.probes == 0:
+        raise ValueError("No probes to fit the sensor model to")
+    workers = workers or os.cpu_count()
+    units = list(observations.split(workers))
+    history = []
+    with ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(units) > 1 else nullcontext() as pool:
+        for iteration in range(iterations if latent else 1):
+            arguments = [(grid, part, table, metric, latent, max_cells) for grid, part in units]
+            results = pool.map(_expected_counts, arguments) if pool else map(_expected_counts, arguments)
+            counts = np.zeros_like(table)
+            log_likelihood = 0.0
+            for unit_counts, unit_log_likelihood in results:
+                counts += unit_counts
+                log_likelihood += unit_log_likelihood
+            history.append(log_likelihood)
+            if progress is not None:
+                progress(iteration, log_likelihood)
+            table = counts + prior
+            table /= table.sum(axis=1, keepdims=True)
+            if len(history) > 1 and history[-1] - history[-2] <= tolerance * abs(history[-2]):
+                break
+    return SensorModel(name, table, metric, initial.colours), history
+
+
+def fit_archive(path, initial, sensor=None, **options):
+    """
+    Reads the probes of a game record archive (see `GameRecordWriter`) and fits a
+    sensor model to them with `fit_sensor`. `sensor` keeps only the games played
+    with that sensor model.
+    """
+    return fit_sensor(ProbeObservations(read_records(path), sensor), initial, **options)
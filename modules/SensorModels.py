@@ -0,0 +1,163 @@
+import numpy as np
+
+
+def chebyshev(d_rows, d_columns):
+    return np.maximum(np.abs(d_rows), np.abs(d_columns))
+
+
+def manhattan(d_rows, d_columns):
+    return np.abs(d_rows) + np.abs(d_columns)
+
+
+def euclidean(d_rows, d_columns):
+    # Bands of unit width: every cell at a Euclidean distance in [d, d + 1) is at distance d
+    return np.floor(np.hypot(d_rows, d_columns)).astype(np.int64)
+
+
+METRICS = {"chebyshev": chebyshev, "manhattan": manhattan, "euclidean": euclidean}
+
+
+class SensorModel:
+    """
+    A detector: the distance metric between the probe and the treasure, the signal
+    levels it can read and P(signal | distance), compiled once into a dense table.
+
+    The table has one row per distance class and one column per signal level, from
+    the weakest to the strongest. The last row is used for every distance at or
+    beyond it. Every metric is at least the Chebyshev distance, so only the cells
+    within a Chebyshev radius of `distance_classes - 2` around a probe can be in
+    another class than the last one.
+
+    :ivar name: Name of the model in the registry.
+    :type name: str
+    :ivar metric: Name of the distance metric, one of `METRICS`.
+    :type metric: str
+    :ivar signals: Signal labels, from the weakest to the strongest ("+", "++", ...).
+    :type signals: tuple
+    :ivar colours: Tk colour of every signal level, in the same order.
+    :type colours: tuple
+    :ivar table: Array of shape (distance classes, signal levels) with P(signal | distance).
+    :type table: numpy.ndarray
+    """
+    def __init__(self, name, table, metric="chebyshev", colours=None):
+        self.name = name
+        self.metric = metric
+        self.table = np.array(table, dtype=np.float64)
+        self.table.flags.writeable = False
+        levels = self.table.shape[-1] if self.table.ndim == 2 else 0
+        self.signals = tuple("+" * (level + 1) for level in range(levels))
+        self.colours = tuple(colours) if colours is not None else DEFAULT_COLOURS[:levels]
+        self.validate()
+        self.distance = METRICS[metric]
+
+    @property
+    def distance_classes(self):
+        return len(self.table)
+
+    @property
+    def levels(self):
+        return len(self.signals)
+
+    def validate(self, tolerance=1e-6):
+        """
+        :raises ValueError: If the model is not a valid set of distributions.
+        """
+        if self.metric not in METRICS:
+            raise ValueError(f"Sensor model {self.name}: unknown metric {self.metric!r}, "
+                             f"expected one of {', '.join(METRICS)}")
+        if self.table.ndim != 2 or len(self.table) < 1 or self.table.shape[1] < 2:
+            raise ValueError(f"Sensor model {self.name}: the table needs at least one distance "
+                             f"and two signal levels")
+        if (self.table < 0).any() or not np.isfinite(self.table).all():
+            raise ValueError(f"Sensor model {self.name}: probabilities must be finite and non-negative")
+        sums = self.table.sum(axis=1)
+        for distance in np.flatnonzero(np.abs(sums - 1) > tolerance).tolist():
+            raise ValueError(f"Sensor model {self.name}: probabilities at distance {distance} "
+                             f"sum to {sums[distance]:.6g}, not 1")
+        if len(self.colours) != self.levels:
+            raise ValueError(f"Sensor model {self.name}: {len(self.colours)} colours for {self.levels} signal levels")
+
+    def distribution(self, distance):
+        """
+        Returns P(signal | distance) as a {signal: probability} dict.
+        """
+        return dict(zip(self.signals, self.table[min(distance, self.distance_classes - 1)].tolist()))
+
+    @classmethod
+    def from_falloff(cls, name, levels, accuracy, decay=0.5, metric="chebyshev", colours=None):
+        """
+        Builds a model from a parametric falloff. At distance d the expected signal is
+        the strongest level minus d (the weakest one from `levels - 1` on). It is read
+        with probability `accuracy`. The remaining mass goes to the other levels, in
+        proportion to `decay` raised to their distance from the expected level.
+        """
+        table = np.empty((levels, levels))
+        level = np.arange(levels)
+        for distance in range(levels):
+            expected = max(levels - 1 - distance, 0)
+            weights = np.where(level == expected, 0.0, decay ** np.abs(level - expected))
+            table[distance] = (1 - accuracy) * weights / weights.sum()
+            table[distance, expected] = accuracy
+        return cls(name, table, metric, colours)
+
+    @classmethod
+    def from_config(cls, name, config):
+        """
+        Builds a model from its `sensors` entry in config.yaml: a `metric`, optional
+        `colours`, and either `probabilities` (one row per distance, weakest signal
+        first) or a `falloff` with `levels`, `accuracy` and optionally `decay`.
+        """
+        metric = config.get("metric", "chebyshev")
+        colours = config.get("colours")
+        if "probabilities" in config:
+            return cls(name, config["probabilities"], metric, colours)
+        if "falloff" in config:
+            falloff = config["falloff"]
+            return cls.from_falloff(name, falloff["levels"], falloff["accuracy"], falloff.get("decay", 0.5),
+                                    metric, colours)
+        raise ValueError(f"Sensor model {name}: needs either probabilities or a falloff")
+
+    def to_config(self, digits=6):
+        """
+        Returns the `sensors` entry of config.yaml that builds this model, with the
+        probabilities rounded to `digits` decimals (every row still sums to 1).
+        """
+        table = np.round(self.table, digits)
+        rows = np.arange(len(table))
+        table[rows, table.argmax(axis=1)] += 1 - table.sum(axis=1)
+        config = {"metric": self.metric, "probabilities": np.round(table, digits).tolist()}
+        if self.colours != DEFAULT_COLOURS[:self.levels]:
+            config["colours"] = list(self.colours)
+        return config
+
+
+DEFAULT_COLOURS = ("green", "yellow", "orange", "firebrick4", "purple", "magenta", "cyan", "white")
+
+CLASSIC = SensorModel("classic", [
+    [0.03, 0.07, 0.1, 0.8],
+    [0.04, 0.08, 0.8, 0.08],
+    [0.08, 0.8, 0.08, 0.04],
+    [0.8, 0.1, 0.07, 0.03],
+])
+
+SENSOR_MODELS = {CLASSIC.name: CLASSIC}
+
+
+def register(model):
+    SENSOR_MODELS[model.name] = model
+    return model
+
+
+def register_config(sensors):
+    """
+    Compiles and registers every model of the `sensors` section of config.yaml.
+    """
+    for name, config in (sensors or {}).items():
+        register(SensorModel.from_config(name, config))
+
+
+def get_sensor_model(name):
+    try:
+        return SENSOR_MODELS[name]
+    except KeyError:
+        raise ValueError(f"Unknown sensor model {name!r}, expected one of {', '.join(SENSOR_MODELS)}") from None
@@ -0,0 +1,130 @@
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import numpy as np
+
+from modules.GameEngine import GameEngine
+from modules.GameRecords import GameRecordWriter
+from modules.Policies import POLICIES
+
+
+def play_game(engine, policy):
+    """
+    Plays one game to the end with the given policy.
+
+    :return: Tuple (won, remaining hp, number of probes).
+    """
+    while not engine.isOver():
+        action, row, column = policy.choose(engine)
+        if action == "dig":
+            engine.dig(row, column)
+        else:
+            engine.detect(row, column)
+    return engine.isWon(), engine.hp, len(engine.signals)
+
+
+class SimulationResult:
+    """
+    Running totals over a batch of simulated games.
+    """
+    def __init__(self, games=0, wins=0, hp=0.0, probes=0):
+        self.games = games
+        self.wins = wins
+        self.hp = hp
+        self.probes = probes
+
+    def add(self, other):
+        self.games += other.games
+        self.wins += other.wins
+        self.hp += other.hp
+        self.probes += other.probes
+
+    @property
+    def win_rate(self):
+        return self.wins / self.games if self.games else 0.0
+
+    @property
+    def mean_hp(self):
+        return self.hp / self.games if self.games else 0.0
+
+    @property
+    def mean_probes(self):
+        return self.probes / self.games if self.games else 0.0
+
+    def summary(self):
+        return {
+            "games": self.games,
+            "win_rate": self.win_rate,
+            "mean_remaining_hp": self.mean_hp,
+            "mean_probes_to_dig": self.mean_probes,
+        }
+
+
+_worker_engines = {}
+
+
+def play_chunk(rows, columns, policy_name, policy_options, seed_sequence, games, record=None):
+    """
+    Plays `games` games in the current process, seeding every game from the given
+    numpy SeedSequence. The engine of every grid size is built once per process and
+    reused, only its RNG is reseeded.
+
+    :param record: (directory, name) of the game records to write, if any.
+    """
+    engine = _worker_engines.get((rows, columns))
+    if engine is None:
+        engine = _worker_engines[(rows, columns)] = GameEngine(rows, columns)
+    policy = POLICIES[policy_name](**policy_options)
+
+    result = SimulationResult()
+    with GameRecordWriter(*record, append=False) if record else nullcontext() as writer:
+        for game_seed in seed_sequence.generate_state(games, dtype=np.uint64).tolist():
+            engine.seed(game_seed)
+            policy.seed(game_seed)
+            engine.new_game()
+            won, hp, probes = play_game(engine, policy)
+            result.add(SimulationResult(1, int(won), hp, probes))
+            if writer is not None:
+                writer.write(engine, game_seed, policy=policy_name)
+    return result
+
+
+def simulate(rows, columns, policy_name, games, seed=0, workers=None, chunk_size=1000, policy_options=None,
+             record=None):
+    """
+    Plays `games` games with the given policy, spread over a process pool.
+
+    Games are split in chunks, each one with its own seed spawned from `seed`, so the
+    results only depend on `seed` and `chunk_size`, not on the number of workers.
+    Chunk results are yielded in chunk order, as (chunk result, running total).
+    With `record`, a directory, every game is also written to a game record archive
+    there (see `GameRecordWriter`), every chunk under its own name, made of the
+    policy, the grid size and the seed: the same games are the same run.
+
+    :raises ValueError: If `chunk_size` is below 1, or if `record` already holds games of this run.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"Chunk size must be at least 1, not {chunk_size}")
+    policy_options = policy_options or {}
+    workers = workers or os.cpu_count()
+    chunks = [chunk_size] * (games // chunk_size)
+    if games % chunk_size:
+        chunks.append(games % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+
+    run = f"{policy_name}-{rows}x{columns}-seed{seed}"
+    if record and glob.glob(os.path.join(glob.escape(record), f"{glob.escape(run)}-chunk*.jsonl.gz")):
+        raise ValueError(f"{record} already holds the games of {run}: use another --seed or directory")
+
+    total = SimulationResult()
+    records = [(record, f"{run}-chunk{index:06d}") if record else None
+               for index in range(len(chunks))]
+    arguments = ([rows] * len(chunks), [columns] * len(chunks), [policy_name] * len(chunks),
+                 [policy_options] * len(chunks), seeds, chunks, records)
+    with ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext() as pool:
+        results = pool.map(play_chunk, *arguments) if pool else map(play_chunk, *arguments)
+        for result in results:
+            total.add(result)
+            yield result, total
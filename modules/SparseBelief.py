@@ -0,0 +1,258 @@
+import numpy as np
+
+from modules.BeliefState import BeliefState, BeliefView, block_sum, entropy, stats_dict, top_cells
+
+BACKGROUND = -1
+PRUNED = -2
+
+
+class SparseBelief:
+    """
+    Belief whose per-probe cost scales with the live support instead of the grid size.
+
+    A cell that was never within the near radius of a probe has only ever seen the
+    far-distance likelihoods, so all such "background" cells share the same value and
+    are stored as a single log-probability and a count. Only cells around probes are
+    tracked individually (the support). Support cells falling below `epsilon` are
+    pruned: they are dropped to zero and their mass moves to a residual bucket,
+    which is not tracked per cell but bounded from above by multiplying it with the
+    largest likelihood the pruned cells around each probe can have; `residual_mass`
+    reports that bound.
+
+    Evidence applied while sparse is also queued for an exact dense `BeliefState`.
+    When the support grows past `sparse_fraction` of the grid, when the residual
+    bound exceeds `max_residual`, or when the belief is replaced wholesale, the
+    queue is applied in one batch and the belief falls back to dense. `reset()`
+    returns to sparse mode.
+
+    It exposes the same interface as `BeliefState`; `probabilities` and `log_belief`
+    are materialized on demand while sparse. The entropy is kept by the
+    normalization from the support and the background, leaving out the pruned
+    cells, and the top cells are searched in the support (see `top_k`).
+
+    :ivar dense: The exact dense belief, behind by `pending` while sparse.
+    :type dense: BeliefState
+    :ivar pending: Evidence applied while sparse and not yet applied to `dense`.
+    :type pending: list
+    :ivar support: Flat indices of the individually tracked cells.
+    :type support: numpy.ndarray
+    :ivar pruned: Flat indices of the pruned cells.
+    :type pruned: numpy.ndarray
+    """
+    def __init__(self, cpt, epsilon=1e-12, sparse_fraction=0.25, max_residual=1e-6, top=5):
+        self.cpt = cpt
+        self.epsilon = epsilon
+        self.sparse_fraction = sparse_fraction
+        self.max_residual = max_residual
+        self.top = top
+        self.dense = BeliefState(cpt)
+        self._log_table = self.dense._log_table
+        self._near_radius = cpt.distance_classes - 2
+        self._position = np.empty(cpt.total, dtype=np.int64)
+        self._materialized = None
+        self.reset()
+
+    @property
+    def is_sparse(self):
+        return self.support is not None
+
+    @property
+    def residual_mass(self):
+        """
+        Upper bound on the probability mass of the pruned cells.
+        """
+        if not self.is_sparse:
+            return 0.0
+        residual = float(np.exp(self._log_residual))
+        return residual / (1 + residual)
+
+    def reset(self):
+        """
+        Restores the uniform prior, in sparse mode.
+        """
+        self.dense.reset()
+        self.pending = []
+        self._position.fill(BACKGROUND)
+        self.support = np.empty(0, dtype=np.int64)
+        self.pruned = np.empty(0, dtype=np.int64)
+        self._support_rows = np.empty(0, dtype=np.int64)
+        self._support_columns = np.empty(0, dtype=np.int64)
+        self._support_log = np.empty(0)
+        self._support_probabilities = np.empty(0)
+        self._log_background = -np.log(self.cpt.total)
+        self._background_count = self.cpt.total
+        self._log_residual = -np.inf
+        self._materialized = None
+        self._entropy = float(np.log(self.cpt.total))
+
+    @property
+    def entropy(self):
+        return self._entropy if self.is_sparse else self.dense.entropy
+
+    def set_probabilities(self, probabilities):
+        self._to_dense(replay=False)
+        self.dense.set_probabilities(probabilities)
+
+    def set_log_belief(self, log_belief):
+        self._to_dense(replay=False)
+        self.dense.set_log_belief(log_belief)
+
+    def apply(self, row, column, signal):
+        self.apply_batch(((row, column, signal),))
+
+    def apply_batch(self, evidences):
+        evidences = list(evidences)
+        if not self.is_sparse:
+            self.dense.apply_batch(evidences)
+            return
+
+        self.pending.extend(evidences)
+        far = self.cpt.distance_classes - 1
+        for row, column, signal in evidences:
+            level = self.cpt.signal_index[signal]
+            pruned = self._track_neighbourhood(row, column)
+            distance = self.cpt.metric(self._support_rows - row, self._support_columns - column)
+            np.minimum(distance, far, out=distance)
+            self._support_log += self._log_table[distance, level]
+            self._log_background += self._log_table[far, level]
+            # Pruned cells away from the probe see the far likelihood, like the background;
+            # the ones around it are bounded by the largest likelihood among their distances
+            self._log_residual += self._log_table[np.append(pruned, far), level].max()
+        self._normalize()
+
+        if self.residual_mass > self.max_residual or len(self.support) > self.sparse_fraction * self.cpt.total:
+            self._to_dense(replay=True)
+        else:
+            self._prune()
+
+    def _track_neighbourhood(self, row, column):
+        """
+        Moves the background cells close enough to the probe to see another
+        likelihood than the far one into the support.
+
+        :return: The distance classes of the pruned cells around the probe.
+        """
+        if self._near_radius < 0:
+            return np.empty(0, dtype=np.int64)
+        rows = np.arange(max(row - self._near_radius, 1), min(row + self._near_radius, self.cpt.rows) + 1)
+        columns = np.arange(max(column - self._near_radius, 1), min(column + self._near_radius, self.cpt.columns) + 1)
+        window = np.add.outer((rows - 1) * self.cpt.columns, columns - 1).ravel()
+        position = self._position[window]
+        pruned = window[position == PRUNED]
+        pruned = self.cpt.metric(self.cpt.row_index[pruned] - row, self.cpt.column_index[pruned] - column)
+        new = window[position == BACKGROUND]
+        if not len(new):
+            return pruned
+
+        self._position[new] = np.arange(len(self.support), len(self.support) + len(new))
+        self.support = np.concatenate((self.support, new))
+        self._support_rows = np.concatenate((self._support_rows, self.cpt.row_index[new]))
+        self._support_columns = np.concatenate((self._support_columns, self.cpt.column_index[new]))
+        self._support_log = np.concatenate((self._support_log, np.full(len(new), self._log_background)))
+        self._background_count -= len(new)
+        return pruned
+
+    def _normalize(self):
+        shift = max(self._support_log.max(initial=-np.inf),
+                    self._log_background if self._background_count else -np.inf)
+        self._support_probabilities = np.exp(self._support_log - shift)
+        total = self._support_probabilities.sum() + self._background_count * np.exp(self._log_background - shift)
+        self._support_probabilities /= total
+
+        log_total = shift + np.log(total)
+        self._support_log -= log_total
+        self._log_background -= log_total
+        self._log_residual -= log_total
+        self._materialized = None
+        self._entropy = entropy(self._support_probabilities, self._support_log)
+        if self._background_count:
+            self._entropy -= self._background_count * np.exp(self._log_background) * self._log_background
+
+    def _prune(self):
+        live = self._support_probabilities >= self.epsilon
+        if live.all():
+            return
+
+        pruned = self._support_probabilities[~live].sum()
+        self._position[self.support[~live]] = PRUNED
+        self.pruned = np.concatenate((self.pruned, self.support[~live]))
+        self.support = self.support[live]
+        self._position[self.support] = np.arange(len(self.support))
+        self._support_rows = self._support_rows[live]
+        self._support_columns = self._support_columns[live]
+        self._support_log = self._support_log[live]
+        if pruned > 0:
+            self._log_residual = np.logaddexp(self._log_residual, np.log(pruned))
+        self._normalize()
+
+    def _to_dense(self, replay):
+        if self.is_sparse and replay:
+            self.dense.apply_batch(self.pending)
+        self.pending = []
+        self.support = None
+        self._materialized = None
+
+    @property
+    def probabilities(self):
+        if not self.is_sparse:
+            return self.dense.probabilities
+        if self._materialized is None:
+            probabilities = np.full(self.cpt.total, np.exp(self._log_background))
+            probabilities[self.pruned] = 0.0
+            probabilities[self.support] = self._support_probabilities
+            self._materialized = probabilities
+        return self._materialized
+
+    @property
+    def log_belief(self):
+        if not self.is_sparse:
+            return self.dense.log_belief
+        log_belief = np.full(self.cpt.total, self._log_background)
+        log_belief[self.pruned] = -np.inf
+        log_belief[self.support] = self._support_log
+        return log_belief
+
+    def top_k(self, k=None):
+        """
+        Returns the flat indices and probabilities of the k most likely cells, most
+        likely first, ties by cell. While sparse, only the support is searched, plus
+        the first background cells if they are among the most likely.
+        """
+        k = k or self.top
+        if not self.is_sparse:
+            indices, probabilities = np.arange(self.cpt.total), self.dense.probabilities
+        else:
+            indices, probabilities = self.support, self._support_probabilities
+            background = np.exp(self._log_background)
+            if self._background_count and (len(probabilities) < k or np.partition(probabilities, -k)[-k] <= background):
+                extra = self._first_background(k)
+                indices = np.concatenate((indices, extra))
+                probabilities = np.concatenate((probabilities, np.full(len(extra), background)))
+
+        return top_cells(probabilities, k, indices)
+
+    def _first_background(self, k):
+        """
+        Returns the flat indices of the first k background cells. Only the support and
+        the pruned cells are not background, so they are among the first
+        k + len(support) + len(pruned) cells, found without a pass over the grid.
+        """
+        candidates = np.arange(min(k + len(self.support) + len(self.pruned), self.cpt.total))
+        return candidates[self._position[candidates] == BACKGROUND][:k]
+
+    def stats(self, top=5):
+        """
+        Returns the largest probability, its cell, the entropy and the `top` most
+        likely cells, like `BeliefState.stats`.
+        """
+        if not self.is_sparse:
+            return self.dense.stats(top)
+        cells, probabilities = self.top_k(max(top, 1))
+        return stats_dict(probabilities[0], cells[0], self.entropy, cells[:top], probabilities[:top], self.cpt.columns)
+
+    def window(self, row0, row1, column0, column1, block=1):
+        grid = self.probabilities.reshape(self.cpt.rows, self.cpt.columns)
+        return block_sum(grid[row0:row1, column0:column1], block)
+
+    def view(self):
+        return BeliefView(self)
@@ -0,0 +1,235 @@
+import math
+import mmap
+import tempfile
+
+import numpy as np
+
+from modules.BeliefState import BeliefView, block_sum, stats_dict, top_cells
+
+
+class TiledBelief:
+    """
+    Belief for grids larger than RAM, kept in a memory-mapped float64 file split into
+    square tiles.
+
+    The file holds an unnormalized log-belief. A probe multiplies every cell beyond
+    the near radius by the same far-distance likelihood, which cancels out in the
+    normalization, so only the cells around the probe are written (with their
+    likelihood relative to the far one) and only the tiles holding them are read.
+    Normalization is done in two passes: the log-sum-exp of every touched tile is
+    recomputed, then the per-tile partial sums are combined into a single log
+    offset added to every cell when reading. Untouched parts of the file are never
+    paged in; a fresh file is sparse and all zeros, which is the uniform prior.
+
+    The statistics shown in the HUD are kept per tile by the same pass: the mean
+    log-belief of every tile, weighted by its own cells, gives the entropy when the
+    tiles are combined, and the `top` most likely cells of every tile hold the top
+    cells of the grid.
+
+    Only windows of the grid are meant to be read (see `window`);
+    `probabilities` and `log_belief` are materialized for grids of at most
+    `max_materialized` cells.
+
+    :ivar cpt: The CPTStore providing the grid layout and sensor model.
+    :type cpt: CPTStore
+    :ivar tile: Side of the square tiles, in cells.
+    :type tile: int
+    :ivar data: Unnormalized log-belief, of shape (rows, columns), on the memory map of the file.
+    :type data: numpy.ndarray
+    :ivar tile_log_sums: Log-sum-exp of `data` over every tile.
+    :type tile_log_sums: numpy.ndarray
+    :ivar offset: Log normalization constant added to `data`.
+    :type offset: float
+    :ivar entropy: Entropy of the belief, in nats.
+    :type entropy: float
+    """
+    max_materialized = 1 << 24
+
+    def __init__(self, cpt, path=None, tile=256, top=5):
+        self.cpt = cpt
+        self.tile = tile
+        self.top = top
+        with np.errstate(divide="ignore"):
+            self._log_table = np.log(cpt.table)
+        self._far = cpt.distance_classes - 1
+        if np.isinf(self._log_table[self._far]).any():
+            raise ValueError("Tiled beliefs need a non-zero likelihood of every signal far from the probe")
+
+        self._file = open(path, "w+b") if path is not None else tempfile.TemporaryFile()
+        self._size = cpt.total * np.dtype(np.float64).itemsize
+        self._file.truncate(self._size)
+        self._mmap = mmap.mmap(self._file.fileno(), self._size)
+        self.data = np.ndarray((cpt.rows, cpt.columns), dtype=np.float64, buffer=self._mmap)
+
+        tiles = (math.ceil(cpt.rows / tile), math.ceil(cpt.columns / tile))
+        heights = np.minimum(tile, cpt.rows - np.arange(tiles[0]) * tile)
+        widths = np.minimum(tile, cpt.columns - np.arange(tiles[1]) * tile)
+        self._log_tile_cells = np.log(np.outer(heights, widths).astype(np.float64))
+
+        # The first cells of every tile are its top cells while it is uniform
+        self._uniform_top_cells = np.zeros((*tiles, top), dtype=np.int64)
+        self._uniform_top_values = np.full((*tiles, top), -np.inf)
+        for tile_row, tile_column in np.ndindex(tiles):
+            local = np.arange(min(top, heights[tile_row] * widths[tile_column]))
+            rows, columns = np.divmod(local, widths[tile_column])
+            self._uniform_top_cells[tile_row, tile_column, :len(local)] = (
+                (tile_row * tile + rows) * cpt.columns + tile_column * tile + columns)
+            self._uniform_top_values[tile_row, tile_column, :len(local)] = 0.0
+        self.reset()
+
+    def close(self):
+        # The map cannot be closed while an array still uses it
+        self.data = None
+        self._mmap.close()
+        self._file.close()
+
+    def reset(self):
+        """
+        Restores the uniform prior by emptying the file, without touching any page.
+        """
+        try:
+            self._file.truncate(0)
+            self._file.truncate(self._size)
+        except OSError:
+            # Some platforms cannot truncate a mapped file: clear it band by band instead
+            for row0 in range(0, self.cpt.rows, self.tile):
+                self.data[row0:row0 + self.tile] = 0.0
+                self._release(row0, row0 + self.tile)
+        self.tile_log_sums = self._log_tile_cells.copy()
+        self._tile_means = np.zeros_like(self.tile_log_sums)
+        self._tile_top_cells = self._uniform_top_cells.copy()
+        self._tile_top_values = self._uniform_top_values.copy()
+        self.offset = -np.log(self.cpt.total)
+        self.entropy = float(np.log(self.cpt.total))
+
+    def set_probabilities(self, probabilities):
+        with np.errstate(divide="ignore"):
+            self._stream(probabilities, np.log)
+
+    def set_log_belief(self, log_belief):
+        self._stream(log_belief, None)
+
+    def _stream(self, values, transform):
+        # Copies a (possibly memory-mapped) flat array into the file one tile row at a time
+        grid = np.asarray(values).reshape(self.cpt.rows, self.cpt.columns)
+        for row0 in range(0, self.cpt.rows, self.tile):
+            chunk = np.asarray(grid[row0:row0 + self.tile], dtype=np.float64)
+            self.data[row0:row0 + self.tile] = chunk if transform is None else transform(chunk)
+        for tile_row, tile_column in np.ndindex(self.tile_log_sums.shape):
+            self._sum_tile(tile_row, tile_column)
+        self._normalize()
+
+    def apply(self, row, column, signal):
+        self.apply_batch(((row, column, signal),))
+
+    def apply_batch(self, evidences):
+        """
+        Applies several (row, column, signal) evidence items, writing only the cells
+        around each probe, and normalizes once.
+        """
+        radius = self._far - 1
+        dirty = set()
+        for row, column, signal in evidences:
+            if radius < 0:
+                continue
+            level = self.cpt.signal_index[signal]
+            row0, row1 = max(row - 1 - radius, 0), min(row + radius, self.cpt.rows)
+            column0, column1 = max(column - 1 - radius, 0), min(column + radius, self.cpt.columns)
+
+            distance = self.cpt.metric((np.arange(row0, row1) + 1 - row)[:, None], np.arange(column0, column1) + 1 - column)
+            np.minimum(distance, self._far, out=distance)
+            self.data[row0:row1, column0:column1] += self._log_table[distance, level] - self._log_table[self._far, level]
+
+            dirty.update((tile_row, tile_column)
+                         for tile_row in range(row0 // self.tile, (row1 - 1) // self.tile + 1)
+                         for tile_column in range(column0 // self.tile, (column1 - 1) // self.tile + 1))
+
+        for tile_row, tile_column in dirty:
+            self._sum_tile(tile_row, tile_column)
+        self._normalize()
+
+    def _sum_tile(self, tile_row, tile_column):
+        row0, column0 = tile_row * self.tile, tile_column * self.tile
+        values = self.data[row0:row0 + self.tile, column0:column0 + self.tile]
+        shift = values.max()
+        if shift == -np.inf:
+            self.tile_log_sums[tile_row, tile_column] = -np.inf
+            self._tile_means[tile_row, tile_column] = 0.0
+            self._tile_top_values[tile_row, tile_column] = -np.inf
+            return
+
+        flat = values.ravel()
+        weights = np.exp(flat - shift)
+        total = weights.sum()
+        self.tile_log_sums[tile_row, tile_column] = shift + np.log(total)
+        mean = np.dot(weights, flat)
+        if np.isnan(mean):
+            with np.errstate(invalid="ignore"):
+                mean = np.nansum(weights * flat)
+        self._tile_means[tile_row, tile_column] = mean / total
+
+        top = min(self.top, len(flat))
+        local, _ = top_cells(weights, top)
+        rows, columns = np.divmod(local, values.shape[1])
+        self._tile_top_cells[tile_row, tile_column, :top] = (row0 + rows) * self.cpt.columns + column0 + columns
+        self._tile_top_values[tile_row, tile_column, :top] = flat[local]
+
+    def _normalize(self):
+        shift = self.tile_log_sums.max()
+        self.offset = -(shift + np.log(np.exp(self.tile_log_sums - shift).sum()))
+        # H = -sum p (data + offset), and the tile weights are the mass of every tile
+        self.entropy = float(-self.offset - np.dot(np.exp(self.tile_log_sums + self.offset).ravel(),
+                                                   self._tile_means.ravel()))
+
+    def stats(self, top=5):
+        """
+        Returns the largest probability, its cell, the entropy and the `top` most
+        likely cells, like `BeliefState.stats`. At most the `top` cells given to the
+        constructor are kept per tile, which bounds the cells listed.
+        """
+        cells, probabilities = top_cells(np.exp(self._tile_top_values.ravel() + self.offset),
+                                         max(min(top, self.top), 1), self._tile_top_cells.ravel())
+        return stats_dict(probabilities[0], cells[0], self.entropy, cells[:top], probabilities[:top], self.cpt.columns)
+
+    def window(self, row0, row1, column0, column1, block=1):
+        """
+        Returns the probabilities of the 0-based, end-exclusive window of cells, summed
+        over block x block squares. The window is read in bands of whole blocks, so
+        the memory used does not depend on its height, and each band is released from
+        the process once read.
+        """
+        band = max(block, self.tile // block * block)
+        bands = []
+        for start in range(row0, row1, band):
+            values = np.exp(self.data[start:min(start + band, row1), column0:column1] + self.offset)
+            bands.append(block_sum(values, block))
+            self._release(start, min(start + band, row1))
+        if not bands:
+            return np.zeros((0, -(-(column1 - column0) // block)))
+        return np.concatenate(bands)
+
+    def _release(self, row0, row1):
+        # Unmaps the pages of the rows from the process; they stay in the file and the page cache
+        if not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        row1 = min(row1, self.cpt.rows)
+        start = row0 * self.cpt.columns * self.data.itemsize // mmap.PAGESIZE * mmap.PAGESIZE
+        end = row1 * self.cpt.columns * self.data.itemsize
+        self._mmap.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    def _materialize(self):
+        if self.cpt.total > self.max_materialized:
+            raise ValueError(f"A {self.cpt.rows}x{self.cpt.columns} tiled belief is too large to be "
+                             f"materialized, read it with window()")
+        return np.asarray(self.data).ravel() + self.offset
+
+    @property
+    def log_belief(self):
+        return self._materialize()
+
+    @property
+    def probabilities(self):
+        return np.exp(self._materialize())
+
+    def view(self):
+        return BeliefView(self)
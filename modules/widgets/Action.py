@@ -1,4 +1,3 @@
-import os
 from tkinter import ttk, PhotoImage
 import tkinter as tk
 
@@ -71,7 +70,6 @@ class Action(ttk.Button):
             'search': PhotoImage(file=r'assets/search.png'),
             'treasure': PhotoImage(file=r'assets/shovel.png')
         }
-        print(os.listdir(r'assets/'))
 
     def mode_changer_event(self):
         """
@@ -86,6 +84,13 @@ class Action(ttk.Button):
         """
         self._toggle_mode()
 
+    def reset_mode(self):
+        """
+        Shows the button in 'Detect' mode, the mode every game starts in.
+        """
+        self.modeString.set("Mode: Detect")
+        self.config(image=self.image['search'], style='Search.Action.TButton')
+
     def _toggle_mode(self):
         """
         Toggles the current mode between 'Detect' and 'Dig', updates the button appearance,
@@ -1,3 +1,4 @@
+import tkinter as tk
 from tkinter import ttk
 
 from modules.GameData import GameData
@@ -8,7 +9,8 @@ class HpBar(ttk.Frame):
 
     This class is designed to create, configure, and manage a custom HP progress bar using tkinter's ttk module.
     It provides a vertical progress indicator, along with labels displaying current points and the "Points" label.
-    The purpose of this class is to visually represent a player's health points in real-time.
+    The purpose of this class is to visually represent a player's health points in real-time: it observes the
+    current `GameEngine` and refreshes its value after every game event.
 
     :ivar progressbar: A ttk.Progressbar widget that visually indicates the current health points as a vertical bar.
     :type progressbar: ttk.Progressbar
@@ -16,13 +18,19 @@ class HpBar(ttk.Frame):
     :type value_label: ttk.Label
     :ivar points_label: A ttk.Label widget displaying the text "Points" as an annotation to the bar.
     :type points_label: ttk.Label
+    :ivar points: The displayed health points.
+    :type points: tk.IntVar
     """
     progressbar: ttk.Progressbar
     value_label: ttk.Label
     points_label: ttk.Label
+    points: tk.IntVar
 
     def __init__(self, parent):
         super().__init__(parent, height = 50)
+        engine = GameData.getEngine()
+        self.points = tk.IntVar(master=self, value=int(engine.hp))
+        engine.subscribe(self.on_game_event)
 
         self.hpbar_setup()
         self.create_widgets()
@@ -40,14 +48,14 @@ class HpBar(ttk.Frame):
             master=self,
             mode='determinate',
             orient='vertical',
-            variable= GameData.getPointsVar(),
+            variable= self.points,
             length=150,
             style = 'TProgressbar'
         )
 
         self.value_label = ttk.Label(
             master=self,
-            textvariable=GameData.getPointsVar(),
+            textvariable=self.points,
             font=("Helvetica", 16, "bold"),
             style="HpBar.TLabel"
         )
@@ -63,3 +71,6 @@ class HpBar(ttk.Frame):
         self.progressbar.grid(row=0, column=0, sticky='nsew')
         self.value_label.grid(row=0, column=1, sticky='nsew', padx=(5, 0))
         self.points_label.grid(row=0, column=2, sticky='nsew')
+
+    def on_game_event(self, event, engine):
+        self.points.set(int(engine.hp))
@@ -0,0 +1,100 @@
+import tkinter as tk
+from tkinter import filedialog
+from tkinter import ttk
+
+from modules.Instrumentation import instrumentation
+
+
+class StatsPanel(ttk.Frame):
+    """
+    StatsPanel is a collapsible panel of the MenuBar showing the hot-path timings
+    recorded by `instrumentation`.
+
+    The header button expands or collapses the panel. Expanded, it shows a switch to
+    turn recording on and off, the p50/p95/max of every phase in milliseconds, the
+    counters, and buttons to export the recording as JSON or as a Chrome trace. The
+    table is refreshed every `refresh_ms` while the panel is expanded.
+
+    :ivar expanded: Whether the panel body is shown.
+    :type expanded: bool
+    :ivar recording: Mirrors `instrumentation.enabled`.
+    :type recording: tk.BooleanVar
+    :ivar table: Label showing the per-phase statistics and the counters.
+    :type table: ttk.Label
+    """
+    refresh_ms = 500
+
+    def __init__(self, parent):
+        super().__init__(parent, style='MenuBar.TFrame')
+        self.expanded = False
+        self.recording = tk.BooleanVar(master=self, value=instrumentation.enabled)
+        self._refresh_id = None
+
+        self._setup_ui()
+        self.create_widgets()
+        self.create_layout()
+
+    @staticmethod
+    def _setup_ui():
+        style = ttk.Style()
+        style.configure("Stats.TLabel", foreground="white", background="black", font=("Courier", 9))
+        style.configure("Stats.TCheckbutton", foreground="white", background="black")
+
+    def create_widgets(self):
+        self.header = ttk.Button(self, text="Stats ▸", command=self.toggle,
+                                 style="QRButton.MenuBar.TButton")
+        self.body = ttk.Frame(self, style='QRFrame.MenuBar.TFrame')
+        self.switch = ttk.Checkbutton(self.body, text="Record", variable=self.recording,
+                                      command=self.on_switch, style="Stats.TCheckbutton")
+        self.table = ttk.Label(self.body, justify="left", style="Stats.TLabel")
+        self.export_json = ttk.Button(self.body, text="JSON", command=self.save_json,
+                                      style="QRButton.MenuBar.TButton")
+        self.export_trace = ttk.Button(self.body, text="Trace", command=self.save_trace,
+                                       style="QRButton.MenuBar.TButton")
+
+    def create_layout(self):
+        self.header.pack(fill='x')
+        self.switch.grid(row=0, column=0, columnspan=2, sticky='w', pady=5)
+        self.table.grid(row=1, column=0, columnspan=2, sticky='nsew')
+        self.export_json.grid(row=2, column=0, padx=2, pady=5)
+        self.export_trace.grid(row=2, column=1, padx=2, pady=5)
+
+    def toggle(self):
+        self.expanded = not self.expanded
+        if self.expanded:
+            self.header.config(text="Stats ▾")
+            self.body.pack(fill='both')
+            self.refresh()
+        else:
+            self.header.config(text="Stats ▸")
+            self.body.pack_forget()
+            if self._refresh_id is not None:
+                self.after_cancel(self._refresh_id)
+                self._refresh_id = None
+
+    def on_switch(self):
+        instrumentation.enable(self.recording.get())
+
+    def refresh(self):
+        self.table.config(text=self.format_stats())
+        self._refresh_id = self.after(self.refresh_ms, self.refresh)
+
+    @staticmethod
+    def format_stats():
+        lines = [f"{'phase':<13}{'p50':>7}{'p95':>7}{'max':>7}"]
+        for phase, stats in instrumentation.stats().items():
+            lines.append(f"{phase:<13}{stats['p50'] * 1e3:7.2f}{stats['p95'] * 1e3:7.2f}{stats['max'] * 1e3:7.2f}")
+        lines.extend(f"{counter:<13}{value:>21}" for counter, value in instrumentation.counters.items())
+        return "\n".join(lines)
+
+    def save_json(self):
+        path = filedialog.asksaveasfilename(parent=self, defaultextension=".json",
+                                            initialfile="stats.json", filetypes=[("JSON", "*.json")])
+        if path:
+            instrumentation.to_json(path)
+
+    def save_trace(self):
+        path = filedialog.asksaveasfilename(parent=self, defaultextension=".json",
+                                            initialfile="trace.json", filetypes=[("Chrome trace", "*.json")])
+        if path:
+            instrumentation.to_chrome_trace(path)
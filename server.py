@@ -0,0 +1,28 @@
+import argparse
+import asyncio
+
+from modules.GameServer import GameServer, SessionManager
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Host many treasure hunts over a JSON-lines TCP protocol.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-sessions", type=int, default=10000,
+                        help="sessions kept before evicting the least recently used one")
+    parser.add_argument("--idle-timeout", type=float, default=600.0,
+                        help="seconds after which an unused session is evicted")
+    parser.add_argument("--max-cells", type=int, default=1_000_000, help="largest grid a session may ask for")
+    parser.add_argument("--max-total-cells", type=int, default=20_000_000,
+                        help="cells of all the sessions together before evicting the least recently used ones")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    server = GameServer(SessionManager(args.max_sessions, args.idle_timeout, args.max_cells, args.max_total_cells))
+    print(f"Serving on {args.host}:{args.port}", flush=True)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,51 @@
+import argparse
+import json
+import sys
+import time
+
+from modules.Config import Config
+from modules.Policies import POLICIES
+from modules.Simulation import simulate
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive number")
+    return number
+
+
+def parse_args():
+    gamedata = Config.static_gamedata()
+    parser = argparse.ArgumentParser(description="Play treasure hunts headlessly and report how a policy performs.")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="max-posterior")
+    parser.add_argument("--games", type=positive_int, default=10000)
+    parser.add_argument("--rows", type=int, default=gamedata['rows'])
+    parser.add_argument("--columns", type=int, default=gamedata['columns'])
+    parser.add_argument("--dig-threshold", type=float, default=0.9,
+                        help="posterior probability at which the policy digs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=positive_int, default=None, help="processes to use (default: all cores)")
+    parser.add_argument("--chunk-size", type=positive_int, default=1000, help="games per work unit")
+    parser.add_argument("--record", metavar="DIR", help="also write every game to a record archive in DIR")
+    parser.add_argument("--quiet", action="store_true", help="only print the final summary")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    start = time.perf_counter()
+    total = None
+    try:
+        for _, total in simulate(args.rows, args.columns, args.policy, args.games, seed=args.seed,
+                                 workers=args.workers, chunk_size=args.chunk_size,
+                                 policy_options={"dig_threshold": args.dig_threshold}, record=args.record):
+            if not args.quiet:
+                print(f"{total.games}/{args.games} games, win rate {total.win_rate:.4f}", flush=True)
+    except ValueError as error:
+        sys.exit(str(error))
+
+    elapsed = time.perf_counter() - start
+    summary = {"policy": args.policy, "rows": args.rows, "columns": args.columns, **total.summary(),
+               "seconds": elapsed, "games_per_second": total.games / elapsed}
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,40 @@
+import argparse
+import time
+
+from modules.BeliefPublisher import BeliefReader
+from modules.BeliefState import summarize
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Follow a game published by main.py --publish.")
+    parser.add_argument("name", help="name of the shared memory segment printed by main.py")
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between checks for a new snapshot")
+    parser.add_argument("--top", type=int, default=5, help="most likely cells to show")
+    parser.add_argument("--once", action="store_true", help="print the current snapshot and exit")
+    return parser.parse_args()
+
+
+def print_snapshot(snapshot, top):
+    stats = summarize(snapshot["belief"].ravel(), snapshot["belief"].shape[1], top)
+    status = "won" if snapshot["won"] else "lost" if snapshot["over"] else "playing"
+    treasure = " treasure ({},{})".format(*snapshot["treasure"]) if snapshot["treasure"] else ""
+    print(f"#{snapshot['version']} {status}{treasure}, hp {snapshot['hp']:.1f}, {snapshot['moves']} probes, "
+          f"entropy {stats['entropy']:.2f}, top " + " ".join(f"({row},{column}) {probability:.3f}"
+                                                              for row, column, probability in stats["top"]),
+          flush=True)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    with BeliefReader(args.name) as reader:
+        version = None
+        while True:
+            if reader.begin() != version:
+                snapshot = reader.snapshot()
+                version = 2 * snapshot["version"]
+                print_snapshot(snapshot, args.top)
+                if snapshot["closed"]:
+                    break
+            if args.once:
+                break
+            time.sleep(args.interval)
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from modules.BatchEnv import BatchEnv
+from modules.BeliefState import BeliefState
+from modules.ConditionalProbabilities import CPTStore
+from modules.GameEngine import GameEngine
+from modules.SensorModels import SensorModel
+
+
+@pytest.mark.parametrize("metric", ["chebyshev", "manhattan", "euclidean"])
+def test_probe_updates_beliefs_like_belief_state(metric):
+    cpt = CPTStore(5, 7, SensorModel.from_falloff("test", 4, 0.7, metric=metric))
+    env = BatchEnv(16, 5, 7, cpt=cpt, seed=0)
+    beliefs = [BeliefState(cpt) for _ in range(env.games)]
+    rng = np.random.default_rng(1)
+    for _ in range(6):
+        cells = rng.integers(0, env.total, env.games)
+        signals, _ = env.probe(cells)
+        for belief, cell, level in zip(beliefs, cells.tolist(), signals.tolist()):
+            if level >= 0:
+                belief.apply(cell // 7 + 1, cell % 7 + 1, cpt.signals[level])
+    expected = np.array([belief.probabilities for belief in beliefs])
+    np.testing.assert_allclose(env.belief, expected, rtol=0, atol=1e-12)
+
+
+def test_signals_follow_the_sensor_model():
+    env = BatchEnv(20000, 4, 4, seed=2)
+    env.treasure[:] = 0
+    signals, _ = env.probe(np.full(env.games, 5))  # (2,2), at distance 1 from the treasure at (1,1)
+    frequencies = np.bincount(signals, minlength=4) / env.games
+    np.testing.assert_allclose(frequencies, env.cpt.table[1], atol=0.015)
+
+
+def test_reset_only_restarts_the_masked_games():
+    env = BatchEnv(4, 3, 3, seed=3)
+    env.probe(np.zeros(4, dtype=np.int64))
+    before = env.belief.copy()
+    mask = np.array([True, False, True, False])
+    env.reset(mask)
+    np.testing.assert_array_equal(env.belief[mask], 1 / 9)
+    np.testing.assert_array_equal(env.belief[~mask], before[~mask])
+    assert env.moves.tolist() == [0, 1, 0, 1]
+    assert env.hp[mask].tolist() == [GameEngine.initialHp] * 2
+    assert not env.probed[mask].any() and env.probed[~mask, 0].all()
+
+
+def test_probes_cost_hp_until_the_games_are_over():
+    env = BatchEnv(2, 2, 2, seed=4)
+    for cell in range(4):
+        signals, done = env.probe(np.full(2, cell))
+        assert (signals >= 0).all()
+    assert done.all() and (env.hp <= 1e-9).all() and env.moves.tolist() == [4, 4]
+
+    # Games that are over read nothing and stay unchanged
+    before = env.belief.copy()
+    signals, _ = env.probe(np.zeros(2, dtype=np.int64))
+    assert signals.tolist() == [-1, -1]
+    np.testing.assert_array_equal(env.belief, before)
+
+
+def test_probing_a_cell_again_is_free():
+    env = BatchEnv(1, 3, 3, seed=5)
+    env.probe(np.array([4]))
+    signals, _ = env.probe(np.array([4]))
+    assert signals.tolist() == [-1]
+    assert env.moves.tolist() == [1] and env.hp[0] == GameEngine.initialHp - env.pointDmg
+
+
+def test_dig_ends_every_game_and_wins_at_the_treasure():
+    env = BatchEnv(3, 3, 3, seed=6)
+    cells = env.treasure.copy()
+    cells[1] = (cells[1] + 1) % env.total
+    won, done = env.dig(cells)
+    assert won.tolist() == [True, False, True] and done.all()
+
+
+def test_cells_outside_the_grid_are_rejected():
+    env = BatchEnv(2, 3, 3)
+    with pytest.raises(ValueError):
+        env.probe(np.array([0, 9]))
+    with pytest.raises(ValueError):
+        env.dig(np.array([0]))
@@ -0,0 +1,105 @@
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+
+from modules.BeliefPublisher import BeliefPublisher, BeliefReader
+from modules.GameEngine import GameEngine
+from modules.InferenceWorker import InferenceWorker
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def engine():
+    return GameEngine(5, 6, seed=0)
+
+
+def test_snapshot_matches_the_engine(engine):
+    with BeliefPublisher(engine) as publisher, BeliefReader(publisher.name) as reader:
+        engine.detect(2, 3)
+        engine.detect(4, 1)
+        snapshot = reader.snapshot()
+        assert (reader.rows, reader.columns) == (5, 6)
+        assert snapshot["version"] == publisher.version
+        assert snapshot["moves"] == 2 and snapshot["hp"] == engine.hp
+        np.testing.assert_array_equal(snapshot["belief"].ravel(), engine.network.belief.probabilities)
+        signals = snapshot["signals"]
+        assert signals[1, 2] == engine.network.cpt.signal_index[engine.signals[(2, 3)]]
+        assert (signals >= 0).sum() == 2
+        assert not snapshot["over"] and snapshot["treasure"] is None
+
+        engine.undo()
+        assert reader.snapshot()["moves"] == 1
+        engine.dig(*engine.treasure)
+        snapshot = reader.snapshot()
+        assert snapshot["over"] and snapshot["won"] and snapshot["treasure"] == engine.treasure
+
+
+def test_views_are_consistent_between_begin_and_retry(engine):
+    with BeliefPublisher(engine) as publisher, BeliefReader(publisher.name) as reader:
+        version = reader.begin()
+        assert version % 2 == 0 and not reader.retry(version)
+        engine.detect(1, 1)
+        assert reader.retry(version)
+        assert reader.begin() == version + 2
+
+
+def test_close_is_visible_to_attached_readers(engine):
+    publisher = BeliefPublisher(engine)
+    reader = BeliefReader(publisher.name)
+    assert not reader.snapshot()["closed"]
+    publisher.close()
+    assert reader.snapshot()["closed"]
+    reader.close()
+    with pytest.raises(FileNotFoundError):
+        BeliefReader(publisher.name)
+
+
+def test_a_reader_process_does_not_remove_the_segment(engine):
+    with BeliefPublisher(engine) as publisher:
+        engine.detect(3, 3)
+        code = ("import sys; from modules.BeliefPublisher import BeliefReader; "
+                "reader = BeliefReader(sys.argv[1]); print(reader.snapshot()['moves']); reader.close()")
+        for _ in range(2):
+            output = subprocess.run([sys.executable, "-c", code, publisher.name], cwd=ROOT,
+                                    capture_output=True, text=True, check=True)
+            assert output.stdout.strip() == "1"
+        with BeliefReader(publisher.name) as reader:
+            assert reader.snapshot()["moves"] == 1
+
+
+def test_not_a_published_game():
+    from multiprocessing import shared_memory
+    memory = shared_memory.SharedMemory(create=True, size=4096)
+    try:
+        with pytest.raises(ValueError):
+            BeliefReader(memory.name)
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def test_worker_batches_are_published_from_the_worker(engine):
+    worker = InferenceWorker(engine)
+    try:
+        with BeliefPublisher(engine, worker=worker) as publisher, BeliefReader(publisher.name) as reader:
+            for column in range(1, 6):
+                worker.submit("detect", 1, column)
+            while worker.busy:
+                for action, *_ in worker.collect():
+                    engine.notify(action)
+                time.sleep(0.001)
+            snapshot = reader.snapshot()
+            assert snapshot["moves"] == 5
+            np.testing.assert_array_equal(snapshot["belief"].ravel(), engine.network.belief.probabilities)
+    finally:
+        worker.stop()
+
+
+def test_tiled_beliefs_are_not_published():
+    with pytest.raises(ValueError):
+        BeliefPublisher(GameEngine(5, 5, storage="tiled"))
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from modules.BayesianNetwork import BayesianNetwork
+from modules.BeliefState import BeliefState
+from modules.ConditionalProbabilities import CPTStore
+from modules.SensorModels import CLASSIC, SensorModel
+
+# A detector that never reads "++" or "+++" right on the treasure, nor "++++" far from it
+STRICT = SensorModel("strict", [
+    [0.2, 0.0, 0.0, 0.8],
+    [0.1, 0.1, 0.7, 0.1],
+    [0.1, 0.7, 0.1, 0.1],
+    [0.7, 0.2, 0.1, 0.0],
+])
+PROBES = [(1, 1, "+"), (3, 4, "+++"), (2, 2, "++"), (5, 5, "+"), (4, 3, "++")]
+
+
+def bayes(cpt, probes):
+    """
+    The posterior by Bayes' rule, multiplying the likelihoods of every probe in linear space.
+    """
+    posterior = np.full(cpt.total, 1 / cpt.total)
+    for row, column, signal in probes:
+        posterior *= cpt.likelihood(row, column, signal)
+        posterior /= posterior.sum()
+    return posterior
+
+
+@pytest.mark.parametrize("sensor", [CLASSIC, STRICT])
+def test_log_space_updates_match_bayes_rule(sensor):
+    cpt = CPTStore(5, 6, sensor)
+    belief = BeliefState(cpt)
+    for count, probe in enumerate(PROBES, 1):
+        belief.apply(*probe)
+        expected = bayes(cpt, PROBES[:count])
+        np.testing.assert_allclose(belief.probabilities, expected, rtol=1e-12, atol=1e-300)
+        np.testing.assert_allclose(np.exp(belief.log_belief), expected, rtol=1e-12, atol=1e-300)
+        with np.errstate(divide="ignore"):
+            log_expected = np.log(expected)
+        positive = expected > 0
+        assert belief.entropy == pytest.approx(-np.dot(expected[positive], log_expected[positive]), rel=1e-12)
+
+    batched = BeliefState(cpt)
+    batched.apply_batch(PROBES)
+    np.testing.assert_allclose(batched.probabilities, belief.probabilities, rtol=1e-12, atol=1e-300)
+
+
+def test_zero_likelihood_cells_are_ruled_out():
+    cpt = CPTStore(5, 6, STRICT)
+    belief = BeliefState(cpt)
+    belief.apply(3, 4, "+++")
+    # "+++" is never read on the treasure, so the probed cell cannot hold it
+    assert belief.probabilities[cpt.index(3, 4)] == 0 and belief.log_belief[cpt.index(3, 4)] == -np.inf
+    belief.apply(1, 1, "++++")
+    ruled_out = bayes(cpt, [(3, 4, "+++"), (1, 1, "++++")]) == 0
+    # Nor "++++" from three cells away: only the 3x3 corner around (1,1) is left
+    assert ruled_out.sum() == cpt.total - 9
+    assert not belief.probabilities[ruled_out].any()
+    assert belief.probabilities.sum() == pytest.approx(1.0) and np.isfinite(belief.entropy)
+
+
+def test_many_unlikely_probes_do_not_underflow():
+    cpt = CPTStore(4, 4)
+    belief = BeliefState(cpt)
+    for _ in range(400):
+        belief.apply(1, 1, "++++")
+        belief.apply(4, 4, "+")
+    assert np.isfinite(belief.log_belief).all() and belief.probabilities[0] == pytest.approx(1.0)
+
+
+def test_update_belief_returns_a_live_view():
+    network = BayesianNetwork(3, 3)
+    prior = network.get_initial_belief()
+    assert dict(prior) == pytest.approx({key: 1 / 9 for key in network.cpt.keys})
+
+    network.network["evidences"].append(("S(1,1)", "++++"))
+    first = network.update_belief(prior)
+    copy = dict(first)
+    network.network["evidences"].append(("S(3,3)", "++++"))
+    second = network.update_belief(first)
+    # Unlike the dicts it used to return, a view follows the later updates: copy it to keep a belief
+    assert first["(1,1)"] == second["(1,1)"] != copy["(1,1)"]
+    assert prior["(1,1)"] == second["(1,1)"]
+    assert dict(second) == pytest.approx(dict(zip(network.cpt.keys, bayes(network.cpt, [(1, 1, "++++"), (3, 3, "++++")]))))
+
+
+def test_a_plain_dict_prior_is_loaded():
+    network = BayesianNetwork(3, 3)
+    prior = {key: 0.0 for key in network.cpt.keys}
+    prior["(2,2)"], prior["(3,3)"] = 0.25, 0.75
+    network.network["evidences"].append(("S(3,3)", "++++"))
+    belief = network.update_belief(prior)
+    expected = np.array([prior[key] for key in network.cpt.keys]) * network.cpt.likelihood(3, 3, "++++")
+    assert list(belief.values()) == pytest.approx((expected / expected.sum()).tolist())
+    assert prior["(2,2)"] == 0.25
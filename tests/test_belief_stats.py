@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from modules.BayesianNetwork import BayesianNetwork
+from modules.BeliefState import summarize, top_cells
+
+
+def test_top_cells_breaks_ties_by_cell():
+    probabilities = np.array([0.1, 0.3, 0.3, 0.3, 0.2, 0.3])
+    cells, best = top_cells(probabilities, 2)
+    assert cells.tolist() == [1, 2] and best.tolist() == [0.3, 0.3]
+    cells, _ = top_cells(probabilities, 2, np.array([9, 8, 7, 6, 5, 4]))
+    assert cells.tolist() == [4, 6]
+    assert len(top_cells(probabilities, 0)[0]) == 0
+
+
+def test_rounding_errors_are_ties():
+    probabilities = np.array([0.25, 0.25 * (1 + 1e-15), 0.25, 0.25])
+    assert top_cells(probabilities, 1)[0].tolist() == [0]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_every_storage_reports_the_same_stats(seed):
+    rng = np.random.default_rng(seed)
+    networks = {storage: BayesianNetwork(40, 40, storage=storage, **({"tile": 16} if storage == "tiled" else {}))
+                for storage in ("dense", "sparse", "tiled")}
+    for _ in range(rng.integers(0, 6)):
+        row, column = rng.integers(1, 41, 2).tolist()
+        signal = ("+", "++", "+++", "++++")[rng.integers(0, 4)]
+        for network in networks.values():
+            network.belief.apply(row, column, signal)
+
+    expected = summarize(networks["dense"].belief.probabilities, 40, 5)
+    for storage, network in networks.items():
+        stats = network.belief.stats(5)
+        assert stats["map"] == expected["map"], storage
+        assert [cell[:2] for cell in stats["top"]] == [cell[:2] for cell in expected["top"]], storage
+        assert stats["max"] == pytest.approx(expected["max"], rel=1e-9)
+        assert stats["entropy"] == pytest.approx(expected["entropy"], rel=1e-9)
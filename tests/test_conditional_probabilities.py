@@ -0,0 +1,60 @@
+import pytest
+
+from modules.BayesianNetwork import BayesianNetwork
+
+
+def detector(distance):
+    # detectorFactoryProb of the original network
+    match distance:
+        case 0:
+            return {"++++": 0.8, "+++": 0.1, "++": 0.07, "+": 0.03}
+        case 1:
+            return {"++++": 0.08, "+++": 0.8, "++": 0.08, "+": 0.04}
+        case 2:
+            return {"++++": 0.04, "+++": 0.08, "++": 0.8, "+": 0.08}
+        case _:
+            return {"++++": 0.03, "+++": 0.07, "++": 0.1, "+": 0.8}
+
+
+def baseline_probabilities(rows, columns):
+    """
+    The dict-of-dicts CPTs the original network filled, one entry per probe/treasure pair.
+    """
+    positions = [(row, column) for row in range(1, rows + 1) for column in range(1, columns + 1)]
+    probabilities = {"Treasure": {f"({row},{column})": 1 / (rows * columns) for row, column in positions}}
+    for s_row, s_column in positions:
+        probabilities[f"S({s_row},{s_column})"] = {
+            f"({t_row},{t_column})": detector(max(abs(t_row - s_row), abs(t_column - s_column)))
+            for t_row, t_column in positions
+        }
+    return probabilities
+
+
+@pytest.mark.parametrize("rows, columns", [(4, 4), (3, 5), (6, 2)])
+def test_the_tables_match_the_original_cpts(rows, columns):
+    network = BayesianNetwork(rows, columns)
+    probabilities = network.network["probabilities"]
+    expected = baseline_probabilities(rows, columns)
+    assert list(probabilities) == list(expected) and len(probabilities) == len(expected)
+    assert dict(probabilities["Treasure"]) == pytest.approx(expected["Treasure"])
+    for node, table in expected.items():
+        if node == "Treasure":
+            continue
+        assert list(probabilities[node]) == list(table)
+        for position, distribution in table.items():
+            assert dict(probabilities[node][position]) == distribution
+
+
+def test_rows_and_columns_are_not_swapped():
+    network = BayesianNetwork(2, 5)
+    nodes = list(network.network["nodes"])
+    assert len(nodes) == 11 and nodes[0] == "Treasure"
+    assert nodes[-1] == "S(2,5)" and "S(5,2)" not in nodes
+    assert ("Treasure", "S(1,5)") in list(network.network["edges"])
+    assert "(2,5)" in network.network["probabilities"]["Treasure"]
+    # The probe at (1,5) is two columns away from (1,3) and next to (2,4)
+    assert network.network["probabilities"]["S(1,5)"]["(1,3)"]["++"] == 0.8
+    assert network.network["probabilities"]["S(1,5)"]["(2,4)"]["+++"] == 0.8
+    network.network["evidences"].append(("S(2,5)", "++++"))
+    belief = network.update_belief(network.get_initial_belief())
+    assert max(belief, key=belief.get) == "(2,5)"
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from modules.EvidenceLog import EvidenceLog
+from modules.GameEngine import GameEngine
+
+CELLS = [(1, 1), (4, 5), (2, 6), (6, 2), (3, 3), (5, 5), (1, 6)]
+
+
+def play(engine, cells=CELLS):
+    return [engine.detect(row, column) for row, column in cells]
+
+
+def test_undo_rewinds_the_generator_so_probing_again_reads_the_same_signal():
+    engine = GameEngine(6, 6, seed=7)
+    play(engine, CELLS[:4])
+    state = engine.rng.bit_generator.state
+    signal = engine.detect(*CELLS[4])
+    after = engine.network.belief.probabilities.copy()
+
+    engine.undo()
+    assert engine.moves == 4 and not engine.isProbed(*CELLS[4])
+    assert engine.rng.bit_generator.state == state
+    assert engine.detect(*CELLS[4]) == signal
+    np.testing.assert_allclose(engine.network.belief.probabilities, after, atol=1e-15)
+
+
+def test_redo_restores_the_last_move_and_its_generator():
+    engine = GameEngine(6, 6, seed=7)
+    signals = play(engine)
+    head = engine.rng.bit_generator.state
+    belief = engine.network.belief.probabilities.copy()
+    engine.undo(3)
+    assert engine.hp == pytest.approx(engine.initialHp - 4 * engine.pointDmg)
+    engine.redo(3)
+    assert engine.moves == len(CELLS) and engine.rng.bit_generator.state == head
+    assert [engine.signals[cell] for cell in CELLS] == signals
+    np.testing.assert_allclose(engine.network.belief.probabilities, belief, atol=1e-15)
+
+
+def test_snapshots_restore_the_same_belief_as_a_replay():
+    engine = GameEngine(6, 6, seed=2)
+    engine.log = EvidenceLog(snapshot_interval=2)
+    play(engine)
+    assert set(engine.log.snapshots) == {2, 4, 6}
+    for move in (5, 2, 0, 7):
+        engine.jump_to(move)
+        replay = GameEngine(6, 6, seed=2)
+        play(replay, CELLS[:move])
+        np.testing.assert_allclose(engine.network.belief.probabilities, replay.network.belief.probabilities,
+                                   atol=1e-15)
+
+
+@pytest.mark.parametrize("snapshot_interval", [100, 0])
+def test_a_saved_game_loads_with_the_same_belief_and_moves(tmp_path, snapshot_interval):
+    engine = GameEngine(6, 6, seed=5)
+    engine.log = EvidenceLog(snapshot_interval)
+    play(engine)
+    engine.undo(2)
+    engine.save(tmp_path)
+
+    loaded = GameEngine.load(tmp_path)
+    assert loaded.moves == engine.moves == len(CELLS) - 2
+    assert loaded.signals == engine.signals and loaded.treasure == engine.treasure
+    assert loaded.hp == pytest.approx(engine.hp)
+    np.testing.assert_allclose(loaded.network.belief.probabilities, engine.network.belief.probabilities,
+                               atol=1e-15)
+    # The generator continues where the saved game left it
+    assert loaded.detect(*CELLS[-1]) == engine.detect(*CELLS[-1])
+
+
+def test_a_finished_game_loads_as_finished(tmp_path):
+    engine = GameEngine(6, 6, seed=5)
+    play(engine, CELLS[:2])
+    won = engine.dig(*engine.treasure)
+    engine.save(tmp_path)
+
+    loaded = GameEngine.load(tmp_path)
+    assert loaded.isOver() and loaded.isWon() == won and loaded.dug == engine.dug
+    with pytest.raises(ValueError):
+        loaded.detect(*CELLS[2])
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from modules.ConditionalProbabilities import CPTStore
+from modules.EvidenceSampler import EvidenceSampler
+from modules.SensorModels import SensorModel
+
+DRAWS = 200_000
+
+
+def assert_follows(levels, probabilities):
+    frequencies = np.bincount(levels, minlength=len(probabilities)) / len(levels)
+    # Within 5 standard deviations of every probability
+    tolerance = 5 * np.sqrt(probabilities * (1 - probabilities) / len(levels)) + 1e-12
+    assert (np.abs(frequencies - probabilities) <= tolerance).all(), (frequencies, probabilities)
+
+
+@pytest.mark.parametrize("distance", range(5))
+def test_batches_follow_the_cpt(distance):
+    cpt = CPTStore(9, 9)
+    sampler = EvidenceSampler(cpt, rng=distance)
+    treasure = np.full(DRAWS, 5)
+    levels = sampler.sample_batch(5, 5 + distance, treasure, treasure)
+    assert_follows(levels, cpt.table[min(distance, cpt.distance_classes - 1)])
+
+
+def test_single_draws_follow_the_cpt():
+    cpt = CPTStore(4, 4)
+    sampler = EvidenceSampler(cpt, rng=1)
+    levels = np.array([sampler.sample(1, 2, 2, 3) for _ in range(50_000)])
+    assert_follows(levels, cpt.table[1])
+
+
+def test_impossible_signals_are_never_drawn():
+    # Rows that sum to 1 only up to the validation tolerance, with zeros
+    model = SensorModel("strict", [[0.0, 0.0, 0.9999996], [0.5, 0.5, 0.0]])
+    sampler = EvidenceSampler(CPTStore(3, 3, model), rng=2)
+    assert sampler.cumulative[:, -1].tolist() == [1.0, 1.0]
+    near = sampler.sample_batch(np.full(DRAWS, 2), 2, 2, 2)
+    far = sampler.sample_batch(np.full(DRAWS, 1), 1, 3, 3)
+    assert (near == 2).all() and set(far.tolist()) == {0, 1}
+
+
+def test_draws_are_reproducible():
+    cpt = CPTStore(6, 6)
+    rows, columns = np.divmod(np.arange(36), 6)
+    first = EvidenceSampler(cpt, rng=7).sample_batch(rows + 1, columns + 1, 3, 4)
+    second = EvidenceSampler(cpt, rng=np.random.default_rng(7)).sample_batch(rows + 1, columns + 1, 3, 4)
+    np.testing.assert_array_equal(first, second)
+    sampler = EvidenceSampler(cpt, rng=0)
+    own = [sampler.sample(1, 1, 3, 3) for _ in range(20)]
+    # A generator given to a draw is used instead of the sampler's own
+    rng = np.random.default_rng(0)
+    assert [sampler.sample(1, 1, 3, 3, rng) for _ in range(20)] == own
@@ -0,0 +1,73 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from modules.GameEngine import GameEngine
+
+
+def test_the_engine_runs_without_a_user_interface():
+    code = "import sys; import modules.GameEngine; print('tkinter' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_observers_receive_every_event():
+    engine = GameEngine(4, 4, seed=0)
+    events = []
+    engine.subscribe(lambda event, source: events.append((event, source.moves)))
+    engine.detect(1, 1)
+    engine.detect_batch([(2, 2), (3, 3)])
+    engine.undo()
+    engine.redo()
+    engine.dig(4, 4)
+    engine.new_game()
+    assert events == [("detect", 1), ("detect", 3), ("restore", 2), ("restore", 3), ("dig", 3), ("reset", 0)]
+
+    callback = engine.observers[0]
+    engine.unsubscribe(callback)
+    engine.detect(1, 1)
+    assert len(events) == 6
+
+
+def test_probing_costs_hp_and_updates_the_belief():
+    engine = GameEngine(5, 4, seed=1)
+    assert engine.hp == engine.initialHp and engine.pointDmg == pytest.approx(5)
+    signal = engine.detect(2, 3)
+    assert signal in engine.network.cpt.signals and engine.signals == {(2, 3): signal}
+    assert engine.hp == pytest.approx(95) and engine.moves == 1
+    likelihood = engine.network.cpt.likelihood(2, 3, signal)
+    np.testing.assert_allclose(engine.network.belief.probabilities, likelihood / likelihood.sum())
+    with pytest.raises(ValueError, match="Already probed"):
+        engine.detect(2, 3)
+
+
+def test_the_treasure_is_only_revealed_once_the_game_is_over():
+    engine = GameEngine(3, 3, seed=4)
+    state = engine.state()
+    assert state["treasure"] is None and not state["over"] and state["rows"] == 3
+    assert engine.dig(*engine.treasure)
+    state = engine.state()
+    assert state["over"] and state["won"] and state["treasure"] == engine.treasure
+    with pytest.raises(ValueError, match="over"):
+        engine.detect(1, 1)
+    with pytest.raises(ValueError, match="over"):
+        engine.dig(1, 1)
+
+
+def test_a_batch_stops_when_the_hp_runs_out():
+    engine = GameEngine(2, 2, seed=0)
+    probed = engine.detect_batch([(1, 1), (1, 1), (1, 2), (2, 1), (2, 2)])
+    assert [cell[:2] for cell in probed] == [(1, 1), (1, 2), (2, 1), (2, 2)]
+    assert engine.isPlayerDead() and engine.isOver() and not engine.isWon()
+
+
+def test_engines_are_independent_and_reproducible():
+    first, second, other = GameEngine(6, 6, seed=9), GameEngine(6, 6, seed=9), GameEngine(6, 6, seed=10)
+    cells = [(1, 1), (3, 4), (6, 6), (2, 5)]
+    signals = [first.detect(*cell) for cell in cells]
+    assert first.treasure == second.treasure
+    assert [second.detect(*cell) for cell in cells] == signals
+    assert other.moves == 0 and other.hp == other.initialHp
+    np.testing.assert_array_equal(first.network.belief.probabilities, second.network.belief.probabilities)
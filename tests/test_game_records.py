@@ -0,0 +1,78 @@
+import gzip
+
+import numpy as np
+import pytest
+
+from modules.GameEngine import GameEngine
+from modules.GameRecords import Calibration, GameRecordWriter, calibrate, read_records
+from modules.Simulation import simulate
+
+
+def play(engine, writer, games):
+    for _ in range(games):
+        engine.new_game()
+        engine.detect(1, 1)
+        best = int(engine.network.belief.probabilities.argmax())
+        engine.dig(best // engine.columns + 1, best % engine.columns + 1)
+        writer.write(engine)
+
+
+def test_records_round_trip_in_chunks(tmp_path):
+    engine = GameEngine(3, 3, seed=0)
+    with GameRecordWriter(tmp_path, chunk_records=4) as writer:
+        play(engine, writer, 10)
+    assert len(list(tmp_path.glob("records-*.jsonl.gz"))) == 3
+    records = list(read_records(tmp_path))
+    assert len(records) == 10
+    assert all(len(record["belief"]) == 9 and len(record["probes"]) == 1 for record in records)
+
+
+def test_a_truncated_chunk_is_read_up_to_its_last_record(tmp_path):
+    engine = GameEngine(3, 3, seed=0)
+    with GameRecordWriter(tmp_path) as writer:
+        play(engine, writer, 5)
+    path = next(tmp_path.glob("*.jsonl.gz"))
+    data = gzip.decompress(path.read_bytes())
+    path.write_bytes(gzip.compress(data)[:-30])
+    assert 0 < len(list(read_records(tmp_path))) <= 5
+
+
+def test_new_writers_add_chunks_unless_told_not_to(tmp_path):
+    engine = GameEngine(3, 3, seed=0)
+    for _ in range(2):
+        with GameRecordWriter(tmp_path, name="run") as writer:
+            play(engine, writer, 1)
+    assert len(list(read_records(tmp_path))) == 2
+    with pytest.raises(ValueError):
+        GameRecordWriter(tmp_path, name="run", append=False)
+
+
+def test_simulating_the_same_run_twice_is_refused(tmp_path):
+    list(simulate(3, 3, "max-posterior", 4, seed=0, workers=1, record=str(tmp_path)))
+    with pytest.raises(ValueError):
+        list(simulate(3, 3, "max-posterior", 4, seed=0, workers=1, record=str(tmp_path)))
+    list(simulate(3, 3, "max-posterior", 4, seed=1, workers=1, record=str(tmp_path)))
+    assert len(list(read_records(tmp_path))) == 8
+
+
+def test_calibration_counts_every_cell_as_a_forecast():
+    record = {"rows": 1, "columns": 2, "sensor": "classic", "probes": [[1, 1, 0]], "dig": [1, 2],
+              "treasure": [1, 2], "won": True, "hp": 50, "belief": [0.25, 0.75]}
+    calibration = Calibration(bins=4)
+    calibration.update([record, dict(record, treasure=[1, 1], won=False)])
+    assert calibration.counts.tolist() == [0, 2, 0, 2]
+    assert calibration.hits.tolist() == [0, 1, 0, 1]
+    summary = calibration.summary()
+    assert summary["games"] == 2 and summary["win_rate"] == 0.5
+    # Brier: (0.25^2 + 0.25^2) and (0.75^2 + 0.75^2), averaged
+    assert summary["brier"] == pytest.approx((0.125 + 1.125) / 2)
+    assert summary["log_loss"] == pytest.approx(-(np.log(0.75) + np.log(0.25)) / 2)
+    assert summary["breakdowns"]["grid"] == {"1x2 classic": {"games": 2, "win_rate": 0.5}}
+
+
+def test_calibrate_streams_an_archive(tmp_path):
+    engine = GameEngine(3, 3, seed=0)
+    with GameRecordWriter(tmp_path, chunk_records=3) as writer:
+        play(engine, writer, 7)
+    calibration = calibrate(tmp_path, batch_size=2)
+    assert calibration.games == 7 and calibration.counts.sum() == 63
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+
+from modules.GameServer import GameServer, SessionManager
+
+
+def request(server, **fields):
+    return server.handle(json.dumps(fields).encode())
+
+
+def test_a_game_over_the_protocol():
+    server = GameServer()
+    session = request(server, op="new", rows=4, columns=4, seed=0)["session"]
+    detected = request(server, op="detect", session=session, row=1, column=1)
+    assert detected["ok"] and detected["signal"] in ("+", "++", "+++", "++++")
+    state = request(server, op="state", session=session, top=3)
+    assert state["moves"] == 1 and len(state["top"]) == 3
+    assert request(server, op="state", session=session, top=0)["top"] == []
+    assert request(server, op="close", session=session)["ok"]
+    assert not request(server, op="state", session=session)["ok"]
+
+
+@pytest.mark.parametrize("line", [
+    b'{"op": "new", "rows": Infinity, "columns": 3}',
+    b'{"op": "new", "rows": 0, "columns": 3}',
+    b'{"op": "detect", "session": "missing", "row": 1, "column": 1}',
+    b'not json',
+])
+def test_bad_requests_get_errors(line):
+    response = GameServer().handle(line)
+    assert not response["ok"] and response["error"]
+
+
+def test_sessions_are_bounded_by_their_total_cells():
+    manager = SessionManager(max_cells=100, max_total_cells=250)
+    for _ in range(5):
+        manager.create(10, 10)
+    assert len(manager.sessions) == 2 and manager.cells == 200 and manager.evicted == 3
+
+
+def test_tables_are_dropped_with_their_last_session():
+    manager = SessionManager()
+    first = manager.create(3, 3)
+    second = manager.create(3, 3)
+    other = manager.create(4, 5)
+    other.engine.detect(1, 1)
+    assert set(manager.tables) == {(3, 3), (4, 5)}
+    assert manager.memory()["shared_tables"] > manager.tables[(3, 3)].table.nbytes * 2
+    manager.close(first.id)
+    assert (3, 3) in manager.tables
+    manager.close(second.id)
+    manager.close(other.id)
+    assert manager.tables == {} and manager.cells == 0
+
+
+def test_an_overlong_line_gets_one_error():
+    async def exchange():
+        server = GameServer()
+        listener = await asyncio.start_server(server.handle_client, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        # Several times the 64 KiB stream limit, so the line spans more than one buffer
+        writer.write(b'{"op": "new", "rows": ' + b"1" * 300_000 + b', "columns": 3}\n{"op": "stats"}\n')
+        await writer.drain()
+        responses = []
+        while not responses or not responses[-1]["ok"]:
+            responses.append(json.loads(await asyncio.wait_for(reader.readline(), 5)))
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        return responses
+
+    too_long, stats = asyncio.run(exchange())
+    assert too_long == {"ok": False, "error": "Request line too long"}
+    assert stats["ok"] and stats["requests"] == 1
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from modules.GameArea import GameArea
+from modules.GameData import GameData
+
+
+class Button:
+    def __init__(self, text):
+        self.text = text
+        self.updates = 0
+
+    def config(self, text):
+        self.text = text
+        self.updates += 1
+
+
+def grid(probabilities):
+    """
+    The state `GameArea.flush_probabilities` works on, without a Tk window.
+    """
+    belief = SimpleNamespace(probabilities=np.array(probabilities, dtype=np.float64))
+    texts = [GameData.getProbText(prob) for prob in belief.probabilities.tolist()]
+    return SimpleNamespace(
+        engine=SimpleNamespace(network=SimpleNamespace(belief=belief)),
+        button_grid=[Button(text) for text in texts], _rendered=texts,
+        _rendered_keys=GameArea._display_keys(belief.probabilities),
+        _display_keys=GameArea._display_keys, _near_tie=GameArea._near_tie, _flush_id=None)
+
+
+def flush(area, probabilities):
+    area.engine.network.belief.probabilities = np.array(probabilities, dtype=np.float64)
+    return GameArea.flush_probabilities(area)
+
+
+def test_only_the_cells_whose_text_changed_are_updated():
+    area = grid([0.25, 0.25, 0.25, 0.25])
+    assert flush(area, [0.25, 0.25, 0.2500001, 0.2499999]) == 0
+    assert flush(area, [0.4, 0.25, 0.25, 0.1]) == 2
+    assert [button.updates for button in area.button_grid] == [1, 0, 0, 1]
+    assert [button.text for button in area.button_grid] == ["0.4000", "0.2500", "0.2500", "0.1000"]
+
+
+@pytest.mark.parametrize("old, new", [(0.0002, 0.00025), (0.0004, 0.00035), (0.001, 0.00095)])
+def test_a_text_rounding_across_a_tie_is_updated(old, new):
+    # The integer keys round half to even and agree, the text does not
+    assert GameArea._display_keys(np.array([old])) == GameArea._display_keys(np.array([new]))
+    assert GameData.getProbText(old) != GameData.getProbText(new)
+    area = grid([old, 1 - old])
+    flush(area, [new, 1 - new])
+    assert area.button_grid[0].text == GameData.getProbText(new)
+
+
+def test_the_grid_always_shows_the_text_of_the_belief():
+    rng = np.random.default_rng(0)
+    # Probabilities on the 1e-4 grid and halfway between, where the rounding is decided
+    values = np.concatenate((np.arange(0, 2000) / 1e4, (np.arange(0, 2000) + 0.5) / 1e4))
+    area = grid(rng.choice(values, 64))
+    for _ in range(200):
+        probabilities = rng.choice(values, 64)
+        before = [button.text for button in area.button_grid]
+        updated = flush(area, probabilities)
+        texts = [GameData.getProbText(prob) for prob in probabilities.tolist()]
+        assert [button.text for button in area.button_grid] == texts == area._rendered
+        assert updated == sum(old != new for old, new in zip(before, texts))
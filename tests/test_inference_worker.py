@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from modules.GameEngine import GameEngine
+from modules.InferenceWorker import InferenceWorker
+
+
+def collect_all(worker, timeout=5.0):
+    finished = []
+    deadline = time.monotonic() + timeout
+    while worker.busy:
+        assert time.monotonic() < deadline, "the worker did not finish"
+        finished += worker.collect()
+        time.sleep(0.001)
+    return finished
+
+
+@pytest.fixture
+def engine():
+    return GameEngine(5, 5, seed=0)
+
+
+@pytest.fixture
+def worker(engine):
+    worker = InferenceWorker(engine)
+    yield worker
+    worker.stop()
+
+
+def test_probes_queued_while_busy_are_batched(engine, worker):
+    entered, release = threading.Event(), threading.Event()
+    batches = []
+
+    def hold(action):
+        batches.append((action, threading.current_thread().name))
+        entered.set()
+        release.wait(5)
+    worker.listeners.append(hold)
+    events = []
+    engine.subscribe(lambda event, source: events.append(event))
+
+    worker.submit("detect", 1, 1)
+    assert entered.wait(5) and worker.busy
+    for cell in ((1, 2), (2, 2), (3, 3)):
+        worker.submit("detect", *cell)
+    worker.submit("dig", 5, 5)
+    worker.submit("detect", 4, 4)
+    release.set()
+
+    finished = collect_all(worker)
+    assert [(action, count) for action, count, _, _ in finished] == [("detect", 1), ("detect", 3), ("dig", 1),
+                                                                      ("detect", 1)]
+    assert [cell[:2] for cell in finished[1][2]] == [(1, 2), (2, 2), (3, 3)]
+    assert finished[2][2] == engine.isWon()
+    assert batches == [(action, "inference") for action, _, _, _ in finished]
+    # The worker sends no engine events; the interface sends them once it collects the results
+    assert events == [] and worker.pending == 0 and engine.moves == 4
+
+
+def test_errors_are_returned_and_the_worker_keeps_running(engine, worker):
+    worker.submit("dig", 1, 1)
+    worker.submit("detect", 2, 2)
+    worker.submit("dig", 3, 3)
+    (dig, _, _, error), (detect, count, result, detect_error), (_, _, _, dig_error) = collect_all(worker)
+    assert dig == "dig" and error is None
+    assert detect == "detect" and count == 1 and result is None
+    assert isinstance(detect_error, ValueError) and isinstance(dig_error, ValueError)
+
+    engine.new_game()
+    worker.submit("detect", 2, 2)
+    (_, _, result, error), = collect_all(worker)
+    assert error is None and [cell[:2] for cell in result] == [(2, 2)]
+
+
+def test_probing_a_cell_twice_in_a_batch_probes_it_once(engine, worker):
+    worker.submit("detect", 1, 1)
+    worker.submit("detect", 1, 1)
+    finished = collect_all(worker)
+    assert sum(count for _, count, _, _ in finished) == 2
+    assert [cell[:2] for _, _, result, _ in finished for cell in result] == [(1, 1)]
+    assert engine.moves == 1
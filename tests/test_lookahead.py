@@ -0,0 +1,70 @@
+import numpy as np
+
+from modules.BeliefState import BeliefState
+from modules.ConditionalProbabilities import CPTStore
+from modules.GameEngine import GameEngine
+from modules.LookaheadSolver import LookaheadSolver
+from modules.Policies import MaxPosteriorPolicy
+from modules.PosteriorCache import PosteriorCache
+
+
+def test_posteriors_do_not_depend_on_the_probe_order():
+    cpt = CPTStore(5, 5)
+    probes = [(1, 2, 3), (4, 4, 0), (3, 1, 2)]
+    belief = BeliefState(cpt)
+    for row, column, level in probes:
+        belief.apply(row, column, cpt.signals[level])
+
+    cache = PosteriorCache(cpt)
+    forward = cache.posterior(PosteriorCache.key(probes))
+    np.testing.assert_allclose(forward, belief.probabilities, atol=1e-12)
+    key = PosteriorCache.extend(PosteriorCache.key(probes[::-1][:2]), *probes[0])
+    assert key == PosteriorCache.key(probes)
+    assert cache.posterior(key) is forward
+
+
+def test_posteriors_are_evicted_least_recently_used_first():
+    cpt = CPTStore(4, 4)
+    cache = PosteriorCache(cpt, max_bytes=3 * 16 * 8)
+    keys = [((1, column, 0),) for column in range(1, 5)]
+    for key in keys[:3]:
+        cache.posterior(key)
+    cache.get(keys[0])
+    cache.posterior(keys[3])
+    assert keys[1] not in cache and keys[0] in cache and len(cache) == 3
+    assert cache.nbytes <= cache.max_bytes
+
+
+def test_the_solver_digs_when_it_is_sure_and_probes_otherwise():
+    engine = GameEngine(4, 4, seed=0)
+    solver = LookaheadSolver(engine.network.cpt)
+    action, row, column, value = solver.plan(engine)
+    assert action == "detect" and not engine.isProbed(row, column) and 0 < value
+
+    engine.network.belief.set_probabilities(np.eye(1, 16, 5).ravel() * 0.999 + 0.001 / 16)
+    engine.signals[(1, 1)] = "+"
+    solver.cache.clear()
+    solver.cache.put(solver.evidence_key(engine), np.array(engine.network.belief.probabilities))
+    assert solver.plan(engine)[:3] == ("dig", 2, 2)
+
+
+def test_the_probe_budget_keeps_one_move_of_hp():
+    engine = GameEngine(2, 2, seed=0)
+    assert LookaheadSolver.probe_budget(engine) == 3
+    engine.detect(1, 1)
+    engine.detect(1, 2)
+    engine.detect(2, 1)
+    assert LookaheadSolver.probe_budget(engine) == 0
+
+
+def test_policies_dig_before_the_last_probe_despite_rounding():
+    # On 3x4, the HP left after 11 probes is one probe's worth plus 3.6e-15
+    engine = GameEngine(3, 4, seed=0)
+    policy = MaxPosteriorPolicy(dig_threshold=2.0)
+    while True:
+        action, row, column = policy.choose(engine)
+        if action == "dig":
+            break
+        engine.detect(row, column)
+    assert len(engine.signals) == 11 and LookaheadSolver.probe_budget(engine) == 0
+    assert engine.hp - engine.pointDmg > 0
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from modules.BeliefState import summarize
+from modules.GameEngine import GameEngine
+from modules.LookaheadSolver import LookaheadSolver
+
+
+def test_a_preview_matches_the_probe_it_previews():
+    engine = GameEngine(6, 6, seed=3)
+    engine.detect(2, 2)
+    engine.detect(5, 4)
+    before = engine.network.belief.probabilities.copy()
+    previews = {preview["signal"]: preview for preview in engine.preview([(3, 5)])}
+    assert sum(preview["probability"] for preview in previews.values()) == pytest.approx(1.0)
+    np.testing.assert_array_equal(engine.network.belief.probabilities, before)
+
+    signal = engine.detect(3, 5)
+    expected = summarize(engine.network.belief.probabilities, engine.columns)
+    preview = previews[signal]
+    assert preview["map"] == expected["map"]
+    assert preview["entropy"] == pytest.approx(expected["entropy"], rel=1e-9)
+    assert [cell[:2] for cell in preview["top"]] == [cell[:2] for cell in expected["top"]]
+
+    engine.undo()
+    np.testing.assert_allclose(engine.network.belief.probabilities, before, atol=1e-15)
+    cache = engine.network.posterior_cache
+    hits = cache.hits
+    assert engine.preview([(3, 5, signal)]) == [preview]
+    assert cache.hits > hits
+
+
+def test_an_approximate_belief_is_not_cached():
+    engine = GameEngine(30, 30, seed=1, storage="sparse", epsilon=1e-3, max_residual=1.0)
+    for row, column in ((10, 10), (10, 12), (12, 11), (20, 20)):
+        engine.detect(row, column)
+    belief = engine.network.belief
+    assert belief.is_sparse and len(belief.pruned) and not engine.network.belief_is_exact
+
+    dense = GameEngine(30, 30, seed=1)
+    for (row, column), signal in engine.signals.items():
+        dense.signals[(row, column)] = signal
+        dense.network.belief.apply(row, column, signal)
+    for preview, expected in zip(engine.preview([(15, 15)]), dense.preview([(15, 15)]), strict=True):
+        assert preview["signal"] == expected["signal"] and preview["map"] == expected["map"]
+        assert preview["probability"] == pytest.approx(expected["probability"], rel=1e-9)
+        assert preview["entropy"] == pytest.approx(expected["entropy"], rel=1e-9)
+    # The cache holds the exact posterior, replayed from the probes, not the pruned belief
+    key = LookaheadSolver(engine.network.cpt).evidence_key(engine)
+    posterior = engine.network.posterior_cache.get(key)
+    np.testing.assert_allclose(posterior, dense.network.belief.probabilities, rtol=1e-9)
+    assert (posterior[belief.pruned] > 0).all()
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from modules.ConditionalProbabilities import CPTStore
+from modules.ProbeAdvisor import ProbeAdvisor
+from modules.SensorModels import CLASSIC, SensorModel
+
+
+def entropy(probabilities):
+    positive = probabilities[probabilities > 0]
+    return -np.dot(positive, np.log(positive))
+
+
+def brute_force_gain(cpt, belief):
+    """
+    H(T) minus the expected entropy of the posterior, computed by applying every
+    signal of every probe to the whole belief.
+    """
+    gains = np.empty(cpt.total)
+    for index in range(cpt.total):
+        row, column = index // cpt.columns + 1, index % cpt.columns + 1
+        expected = 0.0
+        for signal in cpt.signals:
+            joint = belief * cpt.likelihood(row, column, signal)
+            probability = joint.sum()
+            if probability > 0:
+                expected += probability * entropy(joint / probability)
+        gains[index] = entropy(belief) - expected
+    return gains
+
+
+SENSORS = [CLASSIC, SensorModel.from_falloff("diamond", 5, 0.7, metric="manhattan"),
+           SensorModel.from_falloff("radar", 4, 0.8, metric="euclidean")]
+
+
+@pytest.mark.parametrize("sensor", SENSORS, ids=lambda sensor: sensor.metric)
+@pytest.mark.parametrize("rows, columns", [(7, 7), (5, 9)])
+def test_the_gain_matches_a_brute_force_computation(sensor, rows, columns):
+    cpt = CPTStore(rows, columns, sensor)
+    advisor = ProbeAdvisor(cpt)
+    rng = np.random.default_rng(rows * columns)
+    belief = rng.dirichlet(np.full(cpt.total, 0.5))
+    belief[rng.integers(0, cpt.total, 3)] = 0.0
+    belief /= belief.sum()
+    np.testing.assert_allclose(advisor.information_gain(belief), brute_force_gain(cpt, belief), atol=1e-12)
+    np.testing.assert_allclose(advisor.expected_entropy(belief), entropy(belief) - brute_force_gain(cpt, belief),
+                               atol=1e-12)
+
+
+def test_ring_masses_add_up_to_the_belief():
+    cpt = CPTStore(6, 8)
+    belief = np.random.default_rng(0).dirichlet(np.ones(cpt.total))
+    masses = ProbeAdvisor(cpt).ring_masses(belief)
+    np.testing.assert_allclose(masses.sum(axis=1), 1.0)
+    # From a corner, the first ring is the corner itself
+    assert masses[0, 0] == pytest.approx(belief[0])
+
+
+def test_the_best_probe_skips_probed_cells():
+    cpt = CPTStore(5, 5)
+    advisor = ProbeAdvisor(cpt)
+    belief = np.full(cpt.total, 1 / cpt.total)
+    gain = advisor.information_gain(belief)
+    best = advisor.best_probe(belief)
+    assert gain[cpt.index(*best)] == pytest.approx(gain.max())
+    assert advisor.best_probe(belief, [best]) != best
+    everything = [(row, column) for row in range(1, 6) for column in range(1, 6)]
+    assert advisor.best_probe(belief, everything) is None
+
+
+def test_a_known_treasure_has_nothing_to_gain():
+    cpt = CPTStore(4, 4)
+    belief = np.zeros(cpt.total)
+    belief[5] = 1.0
+    np.testing.assert_allclose(ProbeAdvisor(cpt).information_gain(belief), 0.0, atol=1e-12)
@@ -0,0 +1,48 @@
+import numpy as np
+
+from modules.GameData import GameData
+from modules.GameEngine import GameEngine
+
+
+def test_a_new_game_reuses_the_network_and_clears_the_game():
+    engine = GameEngine(6, 5, seed=3)
+    network, cpt, belief = engine.network, engine.network.cpt, engine.network.belief
+    sampler, cache = network.sampler, network.posterior_cache
+    for cell in ((1, 1), (2, 4), (6, 5)):
+        engine.detect(*cell)
+    engine.dig(3, 3)
+    state = engine.rng.bit_generator.state
+
+    engine.new_game()
+    assert engine.network is network and network.cpt is cpt and network.belief is belief
+    assert network.sampler is sampler and network.posterior_cache is cache
+    assert engine.signals == {} and engine.hp == engine.initialHp and engine.dug is None
+    assert engine.moves == 0 and engine.log.count == 0 and network.network["evidences"] == []
+    assert not engine.isOver()
+    np.testing.assert_array_equal(belief.probabilities, np.full(30, 1 / 30))
+
+    # The treasure is the next draw of the game's generator
+    rng = np.random.default_rng()
+    rng.bit_generator.state = state
+    assert engine.treasure == (int(rng.integers(1, 7)), int(rng.integers(1, 6)))
+
+
+def test_restarts_are_reproducible_and_draw_new_treasures():
+    first, second = GameEngine(8, 8, seed=11), GameEngine(8, 8, seed=11)
+    treasures = []
+    for _ in range(10):
+        first.new_game()
+        second.new_game()
+        assert first.treasure == second.treasure
+        treasures.append(first.treasure)
+    assert len(set(treasures)) > 1
+
+
+def test_the_window_restarts_on_the_same_engine():
+    engine = GameEngine(4, 4, seed=0)
+    GameData.initialize(engine)
+    GameData.changeMode()
+    engine.detect(2, 2)
+    GameData.reset()
+    assert GameData.getEngine() is engine and GameData.isDetectModeOn()
+    assert engine.moves == 0 and engine.signals == {}
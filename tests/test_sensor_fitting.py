@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from modules.GameEngine import GameEngine
+from modules.GameRecords import GameRecordWriter, read_records
+from modules.SensorFitting import ProbeObservations, expected_counts, fit_archive, fit_sensor
+from modules.SensorModels import CLASSIC, SensorModel
+
+TRUE_MODEL = SensorModel("true", [
+    [0.05, 0.05, 0.2, 0.7],
+    [0.05, 0.15, 0.65, 0.15],
+    [0.1, 0.7, 0.15, 0.05],
+    [0.75, 0.15, 0.05, 0.05],
+])
+
+
+@pytest.fixture(scope="module")
+def archive(tmp_path_factory):
+    """
+    Games on a 6x6 grid with the true model, probing 12 random cells each.
+    """
+    directory = tmp_path_factory.mktemp("records")
+    engine = GameEngine(6, 6, seed=0, sensor=TRUE_MODEL)
+    rng = np.random.default_rng(1)
+    with GameRecordWriter(directory, chunk_records=1000) as writer:
+        for _ in range(3000):
+            engine.new_game()
+            for cell in rng.choice(36, 12, replace=False).tolist():
+                engine.detect(cell // 6 + 1, cell % 6 + 1)
+            writer.write(engine)
+    return directory
+
+
+@pytest.fixture(scope="module")
+def observations(archive):
+    return ProbeObservations(read_records(archive))
+
+
+def test_observations_hold_every_probe(observations):
+    grid = observations.grids[(6, 6)]
+    assert observations.games == 3000 and observations.probes == 36000
+    assert len(grid["level"]) == 36000 and len(grid["treasure"]) == 3000
+    assert grid["row"].min() >= 0 and grid["row"].max() <= 5
+
+
+def test_known_treasures_recover_the_table(archive):
+    model, history = fit_archive(archive, CLASSIC, sensor="true", name="fitted")
+    assert model.name == "fitted" and len(history) == 1
+    np.testing.assert_allclose(model.table, TRUE_MODEL.table, atol=0.03)
+
+
+def test_em_over_latent_treasures_recovers_the_table(observations):
+    initial = SensorModel.from_falloff("start", 4, 0.5, 0.8)
+    model, history = fit_sensor(observations, initial, latent=True, workers=1)
+    np.testing.assert_allclose(model.table, TRUE_MODEL.table, atol=0.04)
+    assert history[-1] > history[0]
+
+
+def test_em_is_the_same_over_a_process_pool(observations):
+    serial, _ = fit_sensor(observations, CLASSIC, latent=True, iterations=3, workers=1)
+    parallel, _ = fit_sensor(observations, CLASSIC, latent=True, iterations=3, workers=2)
+    np.testing.assert_allclose(parallel.table, serial.table, rtol=1e-9)
+
+
+@pytest.mark.parametrize("latent", [False, True])
+def test_chunking_does_not_change_the_counts(observations, latent):
+    grid = observations.grids[(6, 6)]
+    whole = expected_counts((6, 6), grid, CLASSIC.table, "chebyshev", latent, max_cells=1 << 30)
+    chunked = expected_counts((6, 6), grid, CLASSIC.table, "chebyshev", latent, max_cells=100)
+    np.testing.assert_allclose(chunked[0], whole[0], rtol=1e-9)
+    assert chunked[1] == pytest.approx(whole[1], rel=1e-12)
+    assert whole[0].sum() == pytest.approx(observations.probes)
+
+
+def test_fitted_model_round_trips_through_its_config(observations):
+    model, _ = fit_sensor(observations, CLASSIC)
+    rebuilt = SensorModel.from_config(model.name, model.to_config())
+    np.testing.assert_allclose(rebuilt.table, model.table, atol=1e-6)
+    assert rebuilt.metric == model.metric
+
+
+def test_no_probes_is_an_error():
+    with pytest.raises(ValueError):
+        fit_sensor(ProbeObservations([]), CLASSIC)
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from modules import SensorModels
+from modules.Config import Config
+from modules.ConditionalProbabilities import CPTStore
+from modules.EvidenceSampler import EvidenceSampler
+from modules.SensorModels import CLASSIC, SensorModel, get_sensor_model, register_config
+
+# detectorFactoryProb of the original network, by Chebyshev distance (3 and beyond share the last row)
+BASELINE = [
+    {"++++": 0.8, "+++": 0.1, "++": 0.07, "+": 0.03},
+    {"++++": 0.08, "+++": 0.8, "++": 0.08, "+": 0.04},
+    {"++++": 0.04, "+++": 0.08, "++": 0.8, "+": 0.08},
+    {"++++": 0.03, "+++": 0.07, "++": 0.1, "+": 0.8},
+]
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(SensorModels, "SENSOR_MODELS", dict(SensorModels.SENSOR_MODELS))
+
+
+def test_the_classic_model_is_the_original_detector():
+    assert get_sensor_model("classic") is CLASSIC and CLASSIC.metric == "chebyshev"
+    for distance in range(8):
+        assert CLASSIC.distribution(distance) == BASELINE[min(distance, 3)]
+
+    cpt = CPTStore(5, 7)
+    for signal in CLASSIC.signals:
+        expected = [BASELINE[min(max(abs(row - 2), abs(column - 6)), 3)][signal]
+                    for row in range(1, 6) for column in range(1, 8)]
+        np.testing.assert_array_equal(cpt.likelihood(2, 6, signal), expected)
+
+
+def test_the_configured_models_are_registered(registry):
+    register_config(Config.sensor_models())
+    radar = get_sensor_model("radar")
+    assert radar.metric == "euclidean" and radar.levels == 5 and len(radar.colours) == 5
+    diamond = get_sensor_model("diamond")
+    np.testing.assert_array_equal(diamond.table, CLASSIC.table)
+    with pytest.raises(ValueError, match="Unknown sensor model"):
+        get_sensor_model("missing")
+
+
+def test_a_falloff_reads_the_expected_signal_with_its_accuracy():
+    model = SensorModel.from_falloff("test", 5, 0.7, decay=0.5)
+    assert model.table.shape == (5, 5)
+    np.testing.assert_allclose(model.table.sum(axis=1), 1)
+    for distance in range(5):
+        expected = max(4 - distance, 0)
+        assert model.table[distance, expected] == pytest.approx(0.7)
+        others = np.delete(model.table[distance], expected)
+        # The other signals get less the further they are from the expected one
+        weights = 0.5 ** np.abs(np.delete(np.arange(5), expected) - expected)
+        np.testing.assert_allclose(others, 0.3 * weights / weights.sum())
+
+
+@pytest.mark.parametrize("config", [
+    {"probabilities": [[0.5, 0.4], [0.5, 0.5]]},
+    {"probabilities": [[0.5, 0.5], [1.2, -0.2]]},
+    {"probabilities": [[1.0]]},
+    {"probabilities": [[0.5, 0.5], [0.3, 0.3, 0.4]]},
+    {"metric": "hamming", "probabilities": [[0.5, 0.5]]},
+    {"colours": ["red"], "probabilities": [[0.5, 0.5]]},
+    {"metric": "chebyshev"},
+])
+def test_invalid_configs_are_rejected(registry, config):
+    with pytest.raises(ValueError):
+        register_config({"bad": config})
+    assert "bad" not in SensorModels.SENSOR_MODELS
+
+
+def test_a_store_rejects_another_number_of_distance_classes():
+    with pytest.raises(ValueError, match="distance classes"):
+        CPTStore(4, 4, CLASSIC, distance_classes=5)
+
+
+def test_to_config_round_trips():
+    model = SensorModel("fitted", [[0.1234567, 0.8765433], [0.3333333, 0.6666667]], "manhattan", ("red", "blue"))
+    config = model.to_config(digits=4)
+    assert config["metric"] == "manhattan" and config["colours"] == ["red", "blue"]
+    rebuilt = SensorModel.from_config("fitted", config)
+    np.testing.assert_allclose(rebuilt.table, model.table, atol=1e-4)
+    np.testing.assert_allclose(rebuilt.table.sum(axis=1), 1, atol=1e-12)
+    assert "colours" not in CLASSIC.to_config()
+
+
+@pytest.mark.parametrize("metric, distance", [
+    ("chebyshev", lambda d_rows, d_columns: max(abs(d_rows), abs(d_columns))),
+    ("manhattan", lambda d_rows, d_columns: abs(d_rows) + abs(d_columns)),
+    ("euclidean", lambda d_rows, d_columns: int((d_rows ** 2 + d_columns ** 2) ** 0.5)),
+])
+def test_distance_classes_follow_the_metric(metric, distance):
+    model = SensorModel.from_falloff(metric, 6, 0.8, metric=metric)
+    cpt = CPTStore(7, 9, model)
+    sampler = EvidenceSampler(cpt)
+    rows, columns = np.divmod(np.arange(cpt.total), 9)
+    for probe_row, probe_column in ((1, 1), (4, 5), (7, 2)):
+        expected = [min(distance(row + 1 - probe_row, column + 1 - probe_column), 5)
+                    for row, column in zip(rows, columns)]
+        assert cpt.distance_class(probe_row, probe_column).tolist() == expected
+        assert sampler.distance_class(probe_row, probe_column, rows + 1, columns + 1).tolist() == expected
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from modules.BeliefState import BeliefState
+from modules.ConditionalProbabilities import CPTStore
+from modules.SparseBelief import SparseBelief
+
+# Probes around (10, 10) whose signals point at it, then a few elsewhere
+EVIDENCE = [(10, 10, "++++"), (10, 11, "+++"), (11, 10, "+++"), (9, 9, "++"), (12, 12, "++"),
+            (10, 12, "++"), (3, 25, "+"), (10, 10, "++++"), (20, 5, "+"), (11, 11, "+++")]
+
+
+def dense_belief(cpt, evidence):
+    belief = BeliefState(cpt)
+    belief.apply_batch(evidence)
+    return belief
+
+
+def test_an_exact_sparse_belief_matches_the_dense_one():
+    cpt = CPTStore(30, 30)
+    sparse = SparseBelief(cpt, epsilon=0.0)
+    for evidence in EVIDENCE:
+        sparse.apply(*evidence)
+    assert sparse.is_sparse and len(sparse.pruned) == 0 and sparse.residual_mass == 0.0
+    dense = dense_belief(cpt, EVIDENCE)
+    np.testing.assert_allclose(sparse.probabilities, dense.probabilities, rtol=1e-9)
+    np.testing.assert_allclose(sparse.log_belief, dense.log_belief, rtol=1e-9)
+    assert sparse.entropy == pytest.approx(dense.entropy, rel=1e-9)
+
+
+def test_falling_back_to_dense_replays_the_pending_evidence():
+    cpt = CPTStore(30, 30)
+    sparse = SparseBelief(cpt, epsilon=1e-3, sparse_fraction=0.05)
+    for count, evidence in enumerate(EVIDENCE, 1):
+        sparse.apply(*evidence)
+        if not sparse.is_sparse:
+            break
+    assert not sparse.is_sparse and sparse.pending == []
+    # The pruned cells are exact again once the pending evidence is replayed
+    np.testing.assert_allclose(sparse.probabilities, dense_belief(cpt, EVIDENCE[:count]).probabilities, rtol=1e-9)
+    sparse.apply_batch(EVIDENCE[count:])
+    np.testing.assert_allclose(sparse.probabilities, dense_belief(cpt, EVIDENCE).probabilities, rtol=1e-9)
+
+
+def test_a_large_residual_falls_back_to_dense():
+    cpt = CPTStore(30, 30)
+    sparse = SparseBelief(cpt, epsilon=1e-2, max_residual=1e-9)
+    sparse.apply(*EVIDENCE[0])
+    # The cells pruned after the first probe are only checked against the bound on the next one
+    assert sparse.is_sparse and sparse.residual_mass > sparse.max_residual
+    sparse.apply(*EVIDENCE[1])
+    assert not sparse.is_sparse
+    np.testing.assert_allclose(sparse.probabilities, dense_belief(cpt, EVIDENCE[:2]).probabilities, rtol=1e-9)
+
+
+def test_pruning_is_bounded_by_the_residual_mass():
+    cpt = CPTStore(30, 30)
+    sparse = SparseBelief(cpt, epsilon=1e-4, max_residual=1.0, sparse_fraction=1.0)
+    dense = BeliefState(cpt)
+    for evidence in EVIDENCE:
+        sparse.apply(*evidence)
+        dense.apply(*evidence)
+        assert sparse.is_sparse
+        # The exact mass of the pruned cells never exceeds the bound
+        assert dense.probabilities[sparse.pruned].sum() <= sparse.residual_mass * (1 + 1e-9)
+
+    assert len(sparse.pruned) > 0 and sparse.residual_mass > 0
+    probabilities = sparse.probabilities
+    assert not probabilities[sparse.pruned].any()
+    assert probabilities.sum() == pytest.approx(1.0)
+    # The other cells keep their relative probabilities, renormalized without the pruned mass
+    live = np.ones(cpt.total, dtype=bool)
+    live[sparse.pruned] = False
+    expected = dense.probabilities[live] / dense.probabilities[live].sum()
+    np.testing.assert_allclose(probabilities[live], expected, rtol=1e-9)
+
+
+def test_top_cells_include_the_first_background_cells():
+    cpt = CPTStore(30, 30)
+    sparse = SparseBelief(cpt)
+    sparse.apply(15, 15, "+")
+    cells, probabilities = sparse.top_k(5)
+    expected = BeliefState(cpt)
+    expected.apply(15, 15, "+")
+    assert cells.tolist() == [0, 1, 2, 3, 4]
+    np.testing.assert_allclose(probabilities, expected.probabilities[:5], rtol=1e-9)
+
+
+def test_reset_returns_to_a_uniform_sparse_belief():
+    cpt = CPTStore(10, 10)
+    sparse = SparseBelief(cpt, sparse_fraction=0.01)
+    sparse.apply_batch(EVIDENCE[:2])
+    assert not sparse.is_sparse
+    sparse.reset()
+    assert sparse.is_sparse and len(sparse.support) == 0 and len(sparse.pruned) == 0
+    np.testing.assert_allclose(sparse.probabilities, np.full(100, 0.01))
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from modules.BeliefState import BeliefState, block_sum
+from modules.ConditionalProbabilities import CPTStore
+from modules.TiledBelief import TiledBelief
+
+ROWS, COLUMNS = 45, 38
+# Probes on and across tile boundaries (tiles of 8 cells)
+EVIDENCE = [(8, 8, "++++"), (9, 16, "+++"), (1, 1, "+"), (45, 38, "++"), (20, 30, "+++"), (8, 9, "++++")]
+
+
+@pytest.fixture
+def tiled(tmp_path):
+    belief = TiledBelief(CPTStore(ROWS, COLUMNS), path=tmp_path / "belief.bin", tile=8)
+    yield belief
+    belief.close()
+
+
+def dense(evidence=EVIDENCE):
+    belief = BeliefState(CPTStore(ROWS, COLUMNS))
+    belief.apply_batch(evidence)
+    return belief
+
+
+def test_probes_match_the_dense_belief(tiled):
+    for evidence in EVIDENCE:
+        tiled.apply(*evidence)
+    expected = dense()
+    np.testing.assert_allclose(tiled.probabilities, expected.probabilities, rtol=1e-9)
+    assert tiled.entropy == pytest.approx(expected.entropy, rel=1e-9)
+
+
+@pytest.mark.parametrize("block", [1, 2, 3, 16])
+@pytest.mark.parametrize("window", [(0, ROWS, 0, COLUMNS), (5, 29, 7, 33), (40, 45, 0, 3)])
+def test_windows_are_read_band_by_band(tiled, block, window):
+    tiled.apply_batch(EVIDENCE)
+    row0, row1, column0, column1 = window
+    grid = dense().probabilities.reshape(ROWS, COLUMNS)
+    expected = block_sum(grid[row0:row1, column0:column1], block)
+    result = tiled.window(row0, row1, column0, column1, block)
+    assert result.shape == expected.shape
+    np.testing.assert_allclose(result, expected, rtol=1e-9)
+    # Releasing the bands read keeps their content in the file
+    np.testing.assert_allclose(tiled.window(row0, row1, column0, column1, block), result)
+
+
+def test_an_empty_window_has_no_rows(tiled):
+    assert tiled.window(10, 10, 0, COLUMNS, 4).shape == (0, 10)
+
+
+def test_reset_clears_the_file(tiled, tmp_path):
+    tiled.apply_batch(EVIDENCE)
+    tiled.reset()
+    assert not np.fromfile(tmp_path / "belief.bin").any()
+    assert not tiled.data.any()
+    np.testing.assert_allclose(tiled.probabilities, np.full(ROWS * COLUMNS, 1 / (ROWS * COLUMNS)))
+    assert [cell[:2] for cell in tiled.stats(3)["top"]] == [(1, 1), (1, 2), (1, 3)]
+
+    tiled.apply(*EVIDENCE[0])
+    np.testing.assert_allclose(tiled.probabilities, dense(EVIDENCE[:1]).probabilities, rtol=1e-9)
+
+
+def test_a_replaced_belief_is_streamed_into_the_file(tiled):
+    expected = dense()
+    tiled.set_log_belief(expected.log_belief)
+    np.testing.assert_allclose(tiled.window(0, ROWS, 0, COLUMNS).ravel(), expected.probabilities, rtol=1e-9)
+    stats, expected_stats = tiled.stats(5), expected.stats(5)
+    assert stats["map"] == expected_stats["map"] and stats["entropy"] == pytest.approx(expected_stats["entropy"])
+
+
+def test_large_beliefs_are_not_materialized(tiled, monkeypatch):
+    monkeypatch.setattr(TiledBelief, "max_materialized", 100)
+    with pytest.raises(ValueError, match="window"):
+        tiled.probabilities